@@ -1,35 +1,367 @@
 """Flask API for NCAA Women's Basketball Tournament Predictions"""
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
+import io
+import os
+import numpy as np
 import pandas as pd
+import sys
+import threading
+import time
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+from matchup_matrix import MatchupMatrix, ROUND_FAMILIES
+from bracket_paths import PathExplorer
+from probabilities import build_round_matrices, calculate_advancement_probabilities
+from scoring import SCORING_SCHEMES, BracketLayout, BracketValues
+from contest import ContestStore
+from jobs import JOB_TYPES, JobManager
+from live import ProbabilityFeed
+from compression import MIN_SIZE, CompressedCache, compress, negotiate
+from metrics import metrics
+from profiling import ProfileStore, RequestProfiler
+from utils import TeamNameIndex
+
 app = Flask(__name__)
-CORS(app, resources={r"/api/*": {"origins": "http://localhost:3000"}})
+CORS_ORIGINS = ['http://localhost:3000']
+CORS(app, resources={r"/api/*": {"origins": CORS_ORIGINS}})
 
 DATA_DIR = Path(__file__).parent / 'data' / 'women'
+MODELS_DIR = Path(__file__).parent / 'models'
+CONTESTS_DIR = Path(__file__).parent / 'data' / 'contests'
+JOBS_DIR = Path(__file__).parent / 'data' / 'jobs'
+CACHE_DIR = Path(__file__).parent / 'cache'
+PROFILES_DIR = CACHE_DIR / 'profiles'
+
+# Profiling is off unless PROFILING=1; then a request opts in with
+# ?profile=sample|cprofile or an X-Profile header
+app.config['PROFILING'] = os.getenv('PROFILING') == '1'
+app.config['PROFILE_INTERVAL'] = float(os.getenv('PROFILE_INTERVAL', 0.001))
 
 teams_data = None
 matchups_data = None
 historical_data = None
 bracket_template_data = None
+matchup_matrix = None
+path_explorer = None
+contest_store = None
+bracket_values = None
+team_names = None
+job_manager = None
+probability_feed = None
+profile_store = None
+# Where the current snapshot was loaded from, and the matchups file's mtime then
+loaded_paths = {}
+snapshot_mtime = None
+# Called (in the watcher thread) after every snapshot reload
+snapshot_listeners = []
+
+# Dataset routes whose responses only change when the data is reloaded, with
+# the query arguments each one reads; other arguments don't make new entries
+CACHED_ENDPOINTS = {
+    'get_teams': (),
+    'get_team': (),
+    'get_matchups': ('team',),
+    'get_team_matchups': (),
+    'get_historical': ('tier', 'year'),
+    'get_bracket_template': (),
+    'get_stats': (),
+    'get_heatmap': ('family', 'regions', 'seeds', 'teams'),
+    'get_bracket_values': ('limit', 'scheme'),
+}
+# Compressed at the highest levels once at load time; other cache entries
+# are filled on first request at the fast levels
+PRECOMPRESSED_PATHS = ['/api/women/teams', '/api/women/matchups', '/api/women/historical',
+                       '/api/women/bracket-template', '/api/women/stats']
+PRECOMPRESS_ENVIRON_KEY = 'app.precompress'
+# Routes that read or change contest state, which other workers may have saved
+CONTEST_ENDPOINTS = {'upload_contest_entries', 'get_contest_leaderboard', 'get_results', 'post_results',
+                     'stream_probabilities'}
+response_cache = CompressedCache(max_bytes=int(os.getenv('RESPONSE_CACHE_MB', 64)) * 2**20)
+
+def cache_key(endpoint, view_args, args):
+    """
+    Response cache key: the endpoint, its path arguments and the query
+    arguments it reads (first value, as request.args.get returns it)
+    """
+    return (endpoint, tuple(sorted((view_args or {}).items())),
+            tuple((name, args.get(name)) for name in CACHED_ENDPOINTS[endpoint]))
 
-def load_csv_data():
-    global teams_data, matchups_data, historical_data, bracket_template_data
+def load_snapshot(data_dir, models_dir, layout=None):
+    """
+    Read the pipeline's output files and rebuild everything derived from them
+
+    Args:
+        data_dir: Directory with the pipeline's output files
+        models_dir: Directory with the trained matchup models
+        layout: BracketLayout to keep (built from the matchups if None)
+
+    Returns:
+        tuple: (layout, round_matrices, reach)
+    """
+    global teams_data, matchups_data, historical_data, bracket_template_data, matchup_matrix
+    global path_explorer, bracket_values, team_names, snapshot_mtime
     
-    teams_data = pd.read_csv(DATA_DIR / 'women_composites_current.csv')
-    matchups_data = pd.read_csv(DATA_DIR / 'women_matchups_with_probs.csv')
-    historical_data = pd.read_csv(DATA_DIR / 'women_composites_historical.csv')
-    bracket_template_data = pd.read_csv(DATA_DIR / 'bracket_template.csv')
+    data_dir = Path(data_dir)
+    snapshot_mtime = os.path.getmtime(data_dir / 'women_matchups_with_probs.csv')
+    with metrics.stage('read_csv'):
+        teams = pd.read_csv(data_dir / 'women_composites_current.csv')
+        matchups = pd.read_csv(data_dir / 'women_matchups_with_probs.csv')
+        historical = pd.read_csv(data_dir / 'women_composites_historical.csv')
+        template = pd.read_csv(data_dir / 'bracket_template.csv')
+    with metrics.stage('team_name_index'):
+        names = TeamNameIndex(teams['team'])
+    with metrics.stage('matchup_matrix'):
+        matrix = MatchupMatrix.from_files(data_dir, models_dir)
+    with metrics.stage('path_explorer'):
+        explorer = PathExplorer(matchups)
+    
+    with metrics.stage('bracket_layout'):
+        layout = layout if layout is not None else BracketLayout(matchups)
+        round_matrices = build_round_matrices(matchups, layout.teams)
+        reach = calculate_advancement_probabilities(round_matrices)
+    values = BracketValues(layout.teams, layout.seeds, round_matrices, reach)
+    
+    # Swapped in only once everything is built
+    teams_data, matchups_data, historical_data, bracket_template_data = teams, matchups, historical, template
+    team_names, matchup_matrix, path_explorer, bracket_values = names, matrix, explorer, values
+    response_cache.clear()
+    return layout, round_matrices, reach
+
+def load_csv_data(data_dir=DATA_DIR, models_dir=MODELS_DIR, contests_dir=CONTESTS_DIR):
+    global contest_store, job_manager, probability_feed
+    
+    data_dir = Path(data_dir)
+    loaded_paths.update(data_dir=data_dir, models_dir=models_dir)
+    layout, round_matrices, reach = load_snapshot(data_dir, models_dir)
+    with metrics.stage('contest_store'):
+        contest_store = ContestStore(layout, round_matrices, reach, storage_dir=str(contests_dir))
+    with metrics.stage('probability_feed'):
+        probability_feed = ProbabilityFeed(layout, round_matrices, results=contest_store.results)
+    job_manager = JobManager(
+        str(JOBS_DIR),
+        paths={'data_dir': data_dir, 'models_dir': models_dir, 'cache_dir': CACHE_DIR / 'backtest'},
+        data_files=[data_dir / 'women_matchups_with_probs.csv',
+                    data_dir / 'women_matchups_training.csv'],
+        max_workers=int(os.getenv('JOB_WORKERS', 2))
+    )
     
     print(f"✓ Loaded {len(teams_data)} teams")
     print(f"✓ Loaded {len(matchups_data)} matchups")
     print(f"✓ Loaded {len(historical_data)} historical records")
     print(f"✓ Loaded {len(bracket_template_data)} bracket template entries")
+    print(f"✓ Loaded {len(contest_store.contests)} contests")
+    print(f"✓ Built {len(matchup_matrix.teams)}x{len(matchup_matrix.teams)} probability matrices "
+          f"(on-demand models: {', '.join(matchup_matrix.models) or 'none, using log5'})")
+
+def precompress_responses():
+    # Compress the large datasets now, once, instead of on first request
+    with metrics.stage('precompress'):
+        for path in PRECOMPRESSED_PATHS:
+            with app.test_request_context(path, environ_overrides={PRECOMPRESS_ENVIRON_KEY: True}):
+                app.full_dispatch_request()
+
+def reload_snapshot():
+    """
+    Switch to a probability snapshot the pipeline rewrote: the data routes,
+    contest expected scores, bracket values and the live feed all move to
+    it together, and snapshot_listeners are called
+    """
+    layout, round_matrices, reach = load_snapshot(loaded_paths['data_dir'], loaded_paths['models_dir'],
+                                                  contest_store.layout)
+    contest_store.set_probabilities(round_matrices, reach)
+    precompress_responses()
+    probability_feed.update(round_matrices=round_matrices, reason='snapshot')
+    for listener in snapshot_listeners:
+        listener()
+
+def create_app(data_dir=DATA_DIR, models_dir=MODELS_DIR, contests_dir=CONTESTS_DIR):
+    """
+    Load every dataset and index once and return the app
+
+    Under gunicorn with preload_app (see gunicorn.conf.py) this runs in the
+    master before forking, so workers inherit the parsed data copy-on-write
+    and boot without reading any file.
+    """
+    global profile_store
+    if app.config['PROFILING'] and profile_store is None:
+        profile_store = ProfileStore(str(PROFILES_DIR))
+    if teams_data is None:
+        load_csv_data(data_dir, models_dir, contests_dir)
+        precompress_responses()
+    return app
+
+_watcher_lock = threading.Lock()
+_watcher_pid = None
+
+def watch_data(interval=5.0):
+    """
+    Poll for a rewritten probability snapshot and for results saved by
+    other workers (one daemon thread per process, started on its first
+    request because threads don't survive the fork into gunicorn workers)
+    """
+    global _watcher_pid
+    with _watcher_lock:
+        if _watcher_pid == os.getpid():
+            return
+        _watcher_pid = os.getpid()
+    matchups_path = Path(loaded_paths['data_dir']) / 'women_matchups_with_probs.csv'
+
+    def poll():
+        while True:
+            time.sleep(interval)
+            try:
+                if os.path.getmtime(matchups_path) != snapshot_mtime:
+                    reload_snapshot()
+                refresh_contests()
+            except (OSError, ValueError, KeyError, pd.errors.ParserError):
+                # Missing or half-written file; retried on the next poll
+                continue
+
+    threading.Thread(target=poll, daemon=True).start()
+
+def skip_watcher():
+    """Never start a watcher in this process (its owner tells it when to reload)"""
+    global _watcher_pid
+    with _watcher_lock:
+        _watcher_pid = os.getpid()
+
+# Registered before the cache hook, which answers most requests
+@app.before_request
+def start_watcher():
+    # Not from the load-time precompression, which runs in the gunicorn
+    # master before it forks
+    if not request.environ.get(PRECOMPRESS_ENVIRON_KEY):
+        watch_data()
+
+def route_label():
+    # The rule template, not the raw path, so team names don't multiply series
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+# Registered before the cache hook so requests answered from the cache are
+# timed too, and (after_request hooks run in reverse) sizes are measured
+# after compression
+@app.before_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    metrics.inc('api_requests_in_flight', (('route', route_label()),))
+
+@app.after_request
+def measure_response(response):
+    g.response_status = response.status_code
+    g.response_size = None if response.is_streamed else response.content_length
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if 'request_start' not in g:
+        return
+    route = route_label()
+    metrics.inc('api_requests_in_flight', (('route', route),), -1)
+    status = 500 if exc is not None else g.get('response_status', 500)
+    metrics.observe_request(route, request.method, status,
+                            time.perf_counter() - g.request_start, g.get('response_size'))
+
+def requested_profile(args, headers):
+    """Profiler mode a request asks for, or None (always None when profiling is off)"""
+    if profile_store is None:
+        return None
+    return args.get('profile') or headers.get('X-Profile')
+
+@app.before_request
+def start_profiling():
+    mode = requested_profile(request.args, request.headers)
+    if not mode:
+        return
+    try:
+        profiler = RequestProfiler('sample' if mode in ('1', 'true') else mode,
+                                   interval=app.config['PROFILE_INTERVAL'])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    g.profiler = profiler
+    profiler.start()
+
+@app.after_request
+def save_profile(response):
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    report, stacks = profiler.stop()
+    report.update(route=route_label(), path=request.full_path, method=request.method,
+                  status=response.status_code)
+    response.headers['X-Profile-Id'] = profile_store.save(report, stacks)
+    response.headers['Server-Timing'] = f"app;dur={report['duration_ms']}, cpu;dur={report['cpu_ms']}"
+    return response
+
+@app.teardown_request
+def stop_profiling(exc):
+    # Only still running if the request failed before after_request
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+
+def refresh_contests():
+    """Pick up entries and results saved by other worker processes"""
+    if contest_store.refresh():
+        probability_feed.update(results=contest_store.results)
+
+@app.before_request
+def refresh_contest_state():
+    if request.endpoint in CONTEST_ENDPOINTS:
+        refresh_contests()
+
+def send_cached(entry):
+    if entry['etag'] in request.if_none_match:
+        response = Response(status=304)
+    else:
+        encoding = negotiate(request.headers.get('Accept-Encoding'))
+        response = Response(entry.get(encoding, entry[None]), content_type=entry['content_type'])
+        if encoding in entry:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(entry['etag'])
+    response.vary.add('Accept-Encoding')
+    g.from_cache = True
+    return response
+
+@app.before_request
+def serve_cached_response():
+    # A profiled request renders fresh, so the route itself is profiled
+    if 'profiler' in g:
+        return
+    if request.method == 'GET' and request.endpoint in CACHED_ENDPOINTS:
+        entry = response_cache.get(cache_key(request.endpoint, request.view_args, request.args))
+        metrics.cache('responses', entry is not None)
+        if entry is not None:
+            return send_cached(entry)
+
+@app.after_request
+def compress_response(response):
+    if g.get('from_cache') or response.is_streamed or 'Content-Encoding' in response.headers:
+        return response
+    if (request.method == 'GET' and request.endpoint in CACHED_ENDPOINTS and response.status_code == 200
+            and 'profiler' not in g):
+        key = cache_key(request.endpoint, request.view_args, request.args)
+        precompressed = request.environ.get(PRECOMPRESS_ENVIRON_KEY, False)
+        return send_cached(response_cache.put(key, response.get_data(), response.content_type, precompressed))
+    
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(request.headers.get('Accept-Encoding'))
+    if encoding and response.content_length and response.content_length >= MIN_SIZE:
+        start = time.perf_counter()
+        response.set_data(compress(response.get_data(), encoding))
+        metrics.observe('api_stage_duration_seconds', (('route', route_label()), ('stage', 'compress')),
+                        time.perf_counter() - start)
+        response.headers['Content-Encoding'] = encoding
+    return response
 
 def clean_df(df):
-    return df.where(pd.notnull(df), None).to_dict('records')
+    start = time.perf_counter()
+    records = df.where(pd.notnull(df), None).to_dict('records')
+    metrics.observe('api_stage_duration_seconds', (('route', route_label()), ('stage', 'serialize')),
+                    time.perf_counter() - start)
+    return records
 
 @app.route('/api/women/teams', methods=['GET'])
 def get_teams():
@@ -37,25 +369,66 @@ def get_teams():
 
 @app.route('/api/women/teams/<team_name>', methods=['GET'])
 def get_team(team_name):
-    team = teams_data[teams_data['team'].str.lower() == team_name.lower()]
-    if team.empty:
-        return jsonify({"error": f"Team '{team_name}' not found"}), 404
+    try:
+        team = teams_data[teams_data['team'] == team_names.resolve(team_name)]
+    except KeyError as e:
+        return jsonify({"error": e.args[0]}), 404
     return jsonify(clean_df(team)[0]), 200
 
+@app.route('/api/women/teams/<team_name>/paths', methods=['GET'])
+def get_team_paths(team_name):
+    k = min(request.args.get('k', 10, type=int), 1000)
+    n_rounds = request.args.get('rounds', len(path_explorer.rounds), type=int)
+    if k < 1 or not 1 <= n_rounds <= len(path_explorer.rounds):
+        return jsonify({"error": "k must be positive and rounds between 1 and "
+                                 f"{len(path_explorer.rounds)}"}), 400
+    try:
+        total, paths = path_explorer.top_paths(team_name, k=k, n_rounds=n_rounds)
+    except KeyError as e:
+        return jsonify({"error": e.args[0]}), 404
+    
+    pe = path_explorer
+    position = pe.team_position(team_name)
+    return jsonify({
+        "team": pe.teams[position],
+        "seed": int(pe.seeds[position]),
+        "region": pe.regions[position],
+        "through": pe.rounds[n_rounds - 1],
+        "probability": total,
+        "paths": [{
+            "probability": prob,
+            "share": prob / total if total > 0 else None,
+            "opponents": [{
+                "round": pe.rounds[r],
+                "opponent": pe.teams[j],
+                "seed": int(pe.seeds[j]),
+                "reach_prob": float(pe.reach[r, j]),
+                "win_prob": float(pe.round_matrices[r, position, j]),
+            } for r, j in enumerate(opponents)]
+        } for prob, opponents in paths]
+    }), 200
+
 @app.route('/api/women/matchups', methods=['GET'])
 def get_matchups():
     team_filter = request.args.get('team')
     if team_filter:
+        try:
+            team = team_names.resolve(team_filter)
+        except KeyError as e:
+            return jsonify({"error": e.args[0]}), 404
         filtered = matchups_data[
-            (matchups_data['team'].str.lower() == team_filter.lower()) |
-            (matchups_data['opponent'].str.lower() == team_filter.lower())
+            (matchups_data['team'] == team) | (matchups_data['opponent'] == team)
         ]
         return jsonify(clean_df(filtered)), 200
     return jsonify(clean_df(matchups_data)), 200
 
 @app.route('/api/women/matchups/<team_name>', methods=['GET'])
 def get_team_matchups(team_name):
-    team_matchups = matchups_data[matchups_data['team'].str.lower() == team_name.lower()]
+    try:
+        team = team_names.resolve(team_name)
+    except KeyError as e:
+        return jsonify({"error": e.args[0]}), 404
+    team_matchups = matchups_data[matchups_data['team'] == team]
     if team_matchups.empty:
         return jsonify({"error": f"No matchups found for '{team_name}'"}), 404
     return jsonify(clean_df(team_matchups)), 200
@@ -87,13 +460,208 @@ def get_stats():
     }
     return jsonify(stats), 200
 
+@app.route('/api/women/probabilities/heatmap', methods=['GET'])
+@app.route('/api/probabilities/heatmap', methods=['GET'])
+def get_heatmap():
+    family = request.args.get('family', 'elite').lower()
+    if family not in ROUND_FAMILIES:
+        return jsonify({"error": f"Unknown round family '{family}'"}), 400
+    
+    seeds = request.args.get('seeds', '1-3' if not request.args.get('teams') else None)
+    seed_range = None
+    if seeds:
+        low, _, high = seeds.partition('-')
+        try:
+            seed_range = (int(low), int(high or low))
+        except ValueError:
+            return jsonify({"error": f"Invalid seed range '{seeds}'"}), 400
+    
+    teams = request.args.get('teams')
+    regions = request.args.get('regions')
+    try:
+        positions = matchup_matrix.select(
+            teams=[t.strip() for t in teams.split(',')] if teams else None,
+            seed_range=seed_range,
+            regions=[r.strip() for r in regions.split(',')] if regions else None
+        )
+    except KeyError as e:
+        return jsonify({"error": e.args[0]}), 404
+    
+    matrix = matchup_matrix.submatrix(positions, family)
+    return jsonify({"data": {
+        "family": family,
+        "teams": matchup_matrix.teams[positions].tolist(),
+        "seeds": matchup_matrix.seeds[positions].tolist(),
+        "matrix": np.where(np.isnan(matrix), None, matrix.round(4)).tolist()
+    }}), 200
+
+@app.route('/api/women/bracket-values', methods=['GET'])
+def get_bracket_values():
+    schemes = [s.strip() for s in request.args.get('scheme', 'standard').split(',') if s.strip()]
+    try:
+        if not schemes:
+            raise KeyError("No scoring scheme given")
+        values = bracket_values.values(schemes)
+    except KeyError as e:
+        return jsonify({"error": e.args[0], "schemes": list(SCORING_SCHEMES)}), 400
+    
+    values = values.sort_values(schemes[0], ascending=False).round(2)
+    values.insert(0, 'seed', bracket_values.seeds[bracket_values.teams.get_indexer(values.index)])
+    limit = request.args.get('limit', type=int)
+    if limit:
+        values = values.head(limit)
+    return jsonify({
+        "schemes": schemes,
+        "data": clean_df(values.rename_axis('team').reset_index())
+    }), 200
+
+@app.route('/api/women/contests/<contest_id>/entries', methods=['POST'])
+def upload_contest_entries(contest_id):
+    layout = contest_store.layout
+    try:
+        if request.mimetype == 'text/csv':
+            # One row per entry: name plus one column per game_id
+            entries = pd.read_csv(io.StringIO(request.get_data(as_text=True)), dtype=str)
+            names = entries['name'].tolist()
+            picks = layout.encode(entries)
+        else:
+            entries = (request.get_json(silent=True) or {}).get('entries', [])
+            names = [entry['name'] for entry in entries]
+            picks = layout.encode([entry['picks'] for entry in entries])
+        stored, rejected = contest_store.add_entries(contest_id, names, picks)
+    except (KeyError, ValueError, TypeError) as e:
+        return jsonify({"error": f"Invalid upload: {e}"}), 400
+    
+    return jsonify({
+        "contest": contest_id,
+        "stored": stored,
+        "rejected": rejected[:100],
+        "rejected_count": len(rejected),
+        "entries": len(contest_store.contests.get(contest_id, {}).get('names', []))
+    }), 200
+
+@app.route('/api/women/contests/<contest_id>/leaderboard', methods=['GET'])
+def get_contest_leaderboard(contest_id):
+    scheme = request.args.get('scheme', 'standard')
+    limit = min(request.args.get('limit', 100, type=int), 1000)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    try:
+        board = contest_store.scores(contest_id, scheme)
+    except KeyError as e:
+        return jsonify({"error": e.args[0]}), 404
+    
+    decided = int((contest_store.results >= 0).sum())
+    return jsonify({
+        "contest": contest_id,
+        "scheme": scheme,
+        "entries": len(board),
+        "games_decided": decided,
+        "leaderboard": clean_df(board.iloc[offset:offset + limit])
+    }), 200
+
+@app.route('/api/women/results', methods=['GET'])
+def get_results():
+    return jsonify(contest_store.layout.decode(contest_store.results)), 200
+
+@app.route('/api/women/results', methods=['POST'])
+def post_results():
+    winners = request.get_json(silent=True)
+    if not isinstance(winners, dict):
+        return jsonify({"error": "Expected a JSON object of game_id -> winner"}), 400
+    try:
+        contest_store.set_results(winners)
+    except KeyError as e:
+        return jsonify({"error": e.args[0]}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    probability_feed.update(results=contest_store.results)
+    return jsonify(contest_store.layout.decode(contest_store.results)), 200
+
+def stream_request_args():
+    """Followed team positions and resume id of a probability stream request"""
+    teams = request.args.get('teams')
+    positions = None
+    if teams:
+        positions = probability_feed.team_positions([t.strip() for t in teams.split(',')])
+    last_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+    return positions, int(last_id) if last_id and last_id.isdigit() else None
+
+@app.route('/api/women/probabilities/stream', methods=['GET'])
+def stream_probabilities():
+    try:
+        positions, last_id = stream_request_args()
+    except KeyError as e:
+        return jsonify({"error": e.args[0]}), 404
+    return Response(probability_feed.subscribe(last_id, positions), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def job_response(status):
+    return {k: v for k, v in status.items() if k not in ('traceback', 'pid', 'owner')}
+
+@app.route('/api/women/jobs', methods=['POST'])
+def submit_job():
+    body = request.get_json(silent=True) or {}
+    params = body.get('params', {})
+    if not isinstance(params, dict):
+        return jsonify({"error": "params must be a JSON object"}), 400
+    try:
+        status, created = job_manager.submit(body.get('type'), params)
+    except KeyError as e:
+        return jsonify({"error": e.args[0], "types": list(JOB_TYPES)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 503
+    return jsonify(job_response(status)), 202 if created else 200
+
+@app.route('/api/women/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    status = job_manager.status(job_id)
+    if status is None:
+        return jsonify({"error": f"Job '{job_id}' not found"}), 404
+    return jsonify(job_response(status)), 200
+
+@app.route('/api/women/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    status = job_manager.status(job_id)
+    if status is None:
+        return jsonify({"error": f"Job '{job_id}' not found"}), 404
+    result = job_manager.result(job_id)
+    if result is None:
+        return jsonify(job_response(status)), 409
+    return jsonify({"job": job_response(status), "result": result}), 200
+
+@app.route('/api/women/jobs/<job_id>/events', methods=['GET'])
+def stream_job(job_id):
+    if job_manager.status(job_id) is None:
+        return jsonify({"error": f"Job '{job_id}' not found"}), 404
+    return Response(job_manager.events(job_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    metrics.set('api_response_cache_entries', (), len(response_cache))
+    metrics.set('api_response_cache_bytes', (), response_cache.size)
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/profiles', methods=['GET'])
+def list_profiles():
+    if profile_store is None:
+        return jsonify({"error": "Profiling is disabled (set PROFILING=1)"}), 404
+    return jsonify(profile_store.recent(request.args.get('limit', default=50, type=int))), 200
+
+@app.route('/api/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    report = profile_store.get(profile_id) if profile_store is not None else None
+    if report is None:
+        return jsonify({"error": f"Profile '{profile_id}' not found"}), 404
+    return jsonify(report), 200
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "healthy", "data_loaded": teams_data is not None}), 200
 
 if __name__ == '__main__':
     print("Loading CSV data...")
-    load_csv_data()
+    create_app()
     print("\nStarting Flask API server...")
     print("API available at: http://localhost:5001\n")
     app.run(debug=True, port=5001, host='0.0.0.0')
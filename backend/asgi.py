@@ -0,0 +1,314 @@
+"""ASGI serving mode for the NCAA Women's Basketball Tournament API
+
+Serves the same routes as app.py for many concurrent clients:
+
+- Responses of the read-only data routes only change when the data is
+  reloaded, so they are rendered once per snapshot and then served from
+  memory on the event loop. They are keyed like app.py's response cache
+  (endpoint, path arguments and the query arguments the view reads), plus
+  the negotiated encoding and the CORS origin class, and the cache is
+  bounded by bytes (ASGI_CACHE_MB). Profiled requests (?profile with
+  PROFILING=1) bypass it and render in Flask
+- CPU-heavy routes (path search, heatmaps with on-demand model inference)
+  run in a bounded process pool; when its queue is full new requests get
+  503 with Retry-After instead of piling up. Pool workers don't watch the
+  data themselves: each task carries the snapshot the main process
+  serves, and a worker that is behind reloads it before rendering
+- Routes that read or change contest state run in the main process's
+  thread pool, so every request sees the same contests and results
+- Request metrics (/api/metrics) cover all of the above: requests answered
+  here without entering Flask are recorded here, the rest by app.py's hooks
+- Job progress events are streamed as they happen; live probability
+  subscribers wait on one shared asyncio event instead of a thread each
+
+Run with: uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+import app as flask_api
+from compression import negotiate
+from metrics import metrics
+
+PROCESS_WORKERS = int(os.getenv('ASGI_PROCESS_WORKERS', multiprocessing.cpu_count()))
+MAX_PENDING = int(os.getenv('ASGI_MAX_PENDING', 4 * PROCESS_WORKERS))
+CACHE_BYTES = int(os.getenv('ASGI_CACHE_MB', 64)) * 2**20
+
+# Routes whose responses depend only on the loaded data
+CACHED_ROUTES = re.compile(
+    r'^/api/women/(teams(/[^/]+)?|matchups(/[^/]+)?|historical|bracket-template|stats|bracket-values)$'
+)
+# Read-only routes with enough computation to keep them off the event loop
+PROCESS_ROUTES = re.compile(r'^/api/(women/teams/[^/]+/paths|(women/)?probabilities/heatmap)$')
+# Event streams stay open, so they are streamed rather than rendered whole
+JOB_EVENTS_ROUTE = re.compile(r'^/api/women/jobs/([^/]+)/events$')
+HEARTBEAT_SECONDS = 15
+
+flask_api.create_app()
+
+_response_cache = OrderedDict()
+_cache_bytes = 0
+_url_adapter = flask_api.app.url_map.bind('localhost')
+_pool = None
+_pending = None
+_loop = None
+_feed_changed = None
+
+
+def _render(method, path, query_string, headers, body):
+    """Run one request through the Flask app; returns (status, headers, body)"""
+    environ = EnvironBuilder(path=path, method=method, query_string=query_string,
+                             headers=headers, data=body).get_environ()
+    app_iter, status, response_headers = run_wsgi_app(flask_api.app.wsgi_app, environ, buffered=True)
+    try:
+        content = b''.join(app_iter)
+    finally:
+        if hasattr(app_iter, 'close'):
+            app_iter.close()
+    return int(status.split(' ', 1)[0]), list(response_headers.items()), content
+
+
+def _route_label(method, path):
+    try:
+        return _url_adapter.match(path, method, return_rule=True)[0].rule
+    except HTTPException:
+        return 'unmatched'
+
+
+def _load_worker():
+    flask_api.create_app()
+    flask_api.skip_watcher()
+    flask_api.snapshot_listeners.clear()
+
+
+def _pool_render(snapshot, *request_args):
+    # Catch up with the snapshot the main process serves; a file rewritten
+    # again mid-load is picked up by the next task
+    if flask_api.snapshot_mtime != snapshot:
+        try:
+            flask_api.load_snapshot(flask_api.loaded_paths['data_dir'], flask_api.loaded_paths['models_dir'],
+                                    flask_api.contest_store.layout)
+        except (OSError, ValueError, KeyError, pd.errors.ParserError):
+            pass
+    return _render(*request_args)
+
+
+def _response(rendered):
+    status, headers, content = rendered
+    response = Response(content, status_code=status)
+    response.raw_headers = [(k.lower().encode('latin-1'), v.encode('latin-1'))
+                            for k, v in headers if k.lower() != 'content-length']
+    response.raw_headers.append((b'content-length', str(len(content)).encode('latin-1')))
+    return response
+
+
+async def _request_args(request):
+    headers = [(k.decode('latin-1'), v.decode('latin-1')) for k, v in request.headers.raw]
+    return (request.method, request.url.path, request.url.query, headers, await request.body())
+
+
+def _cache_key(request):
+    """
+    The app.py response cache key plus what else the rendered headers vary
+    with: the negotiated encoding and the origin (any origin CORS doesn't
+    allow gets the same headers); None for routes app.py doesn't cache
+    """
+    try:
+        rule, view_args = _url_adapter.match(request.url.path, request.method, return_rule=True)
+    except HTTPException:
+        return None
+    if rule.endpoint not in flask_api.CACHED_ENDPOINTS:
+        return None
+    origin = request.headers.get('origin')
+    if origin is not None and origin not in flask_api.CORS_ORIGINS:
+        origin = 'other'
+    # A MultiDict, so a repeated argument keys on the first value as in Flask
+    args = MultiDict(request.query_params.multi_items())
+    return (flask_api.cache_key(rule.endpoint, view_args, args), origin,
+            negotiate(request.headers.get('accept-encoding')), rule.rule)
+
+
+def _cache_put(key, rendered):
+    global _cache_bytes
+    status, headers, content = rendered
+    size = len(content) + sum(len(k) + len(v) for k, v in headers)
+    if size > CACHE_BYTES:
+        return
+    _response_cache[key] = (rendered, size)
+    _cache_bytes += size
+    while _cache_bytes > CACHE_BYTES:
+        _, (_, evicted) = _response_cache.popitem(last=False)
+        _cache_bytes -= evicted
+
+
+def _cache_clear():
+    global _cache_bytes
+    _response_cache.clear()
+    _cache_bytes = 0
+
+
+async def cached_route(request):
+    start = time.perf_counter()
+    key = _cache_key(request)
+    # Profiled requests skip the cache so the route itself is profiled
+    if key is None or flask_api.requested_profile(request.query_params, request.headers):
+        return await flask_route(request)
+    cached = _response_cache.get(key)
+    metrics.cache('asgi_responses', cached is not None)
+    if cached is None:
+        # Timed by the Flask app's own request hooks; not kept if the
+        # snapshot changed while it rendered
+        snapshot = flask_api.snapshot_mtime
+        rendered = await run_in_threadpool(_render, *await _request_args(request))
+        if rendered[0] == 200 and snapshot == flask_api.snapshot_mtime and key not in _response_cache:
+            _cache_put(key, rendered)
+        return _response(rendered)
+
+    _response_cache.move_to_end(key)
+    rendered, _ = cached
+    metrics.observe_request(key[-1], request.method, rendered[0], time.perf_counter() - start,
+                            len(rendered[2]))
+    return _response(rendered)
+
+
+async def process_route(request):
+    # Recorded here: the Flask hooks run in the pool worker's own registry
+    start = time.perf_counter()
+    route = _route_label(request.method, request.url.path)
+    if _pending.locked():
+        metrics.observe_request(route, request.method, 503, time.perf_counter() - start)
+        return JSONResponse({"error": "Server busy, retry shortly"}, status_code=503,
+                            headers={'Retry-After': '1'})
+    async with _pending:
+        loop = asyncio.get_running_loop()
+        rendered = await loop.run_in_executor(_pool, _pool_render, flask_api.snapshot_mtime,
+                                              *await _request_args(request))
+    metrics.observe_request(route, request.method, rendered[0], time.perf_counter() - start,
+                            len(rendered[2]))
+    return _response(rendered)
+
+
+async def flask_route(request):
+    return _response(await run_in_threadpool(_render, *await _request_args(request)))
+
+
+async def job_events(request, job_id):
+    if flask_api.job_manager.status(job_id) is None:
+        return JSONResponse({"error": f"Job '{job_id}' not found"}, status_code=404)
+    return StreamingResponse(flask_api.job_manager.events(job_id), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache'})
+
+
+def _on_feed_event(event_id):
+    # Called from whichever thread published; wake every subscriber at once
+    _loop.call_soon_threadsafe(_wake_subscribers)
+
+
+def _on_snapshot():
+    # Rendered responses hold the previous snapshot's probabilities
+    _loop.call_soon_threadsafe(_cache_clear)
+
+
+def _wake_subscribers():
+    global _feed_changed
+    _feed_changed.set()
+    _feed_changed = asyncio.Event()
+
+
+async def probability_stream(request):
+    feed = flask_api.probability_feed
+    teams = request.query_params.get('teams')
+    try:
+        positions = feed.team_positions([t.strip() for t in teams.split(',')]) if teams else None
+    except KeyError as e:
+        return JSONResponse({"error": e.args[0]}, status_code=404)
+    last_id = request.headers.get('last-event-id', request.query_params.get('last_event_id'))
+    last_id = int(last_id) if last_id and last_id.isdigit() else None
+
+    async def stream(last_id):
+        yield 'retry: 3000\n\n'
+        while True:
+            messages, last_id = feed.events_since(last_id, positions)
+            for message in messages:
+                yield message
+            changed = _feed_changed
+            if feed.version > last_id:
+                continue
+            try:
+                await asyncio.wait_for(changed.wait(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+
+    return StreamingResponse(stream(last_id), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+async def health_check(request):
+    return JSONResponse({
+        "status": "healthy",
+        "data_loaded": flask_api.teams_data is not None,
+        "cached_responses": len(_response_cache),
+        "cached_bytes": _cache_bytes,
+        "process_workers": PROCESS_WORKERS,
+    })
+
+
+async def dispatch(request):
+    path = request.url.path
+    events = JOB_EVENTS_ROUTE.match(path)
+    if request.method == 'GET' and events:
+        return await job_events(request, events.group(1))
+    if request.method == 'GET' and CACHED_ROUTES.match(path):
+        return await cached_route(request)
+    if request.method == 'GET' and PROCESS_ROUTES.match(path):
+        return await process_route(request)
+    return await flask_route(request)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    global _pool, _pending, _loop, _feed_changed
+    # Forked workers inherit the loaded data; they are started here, before
+    # the server has any threads, and _load_worker only turns off their
+    # watcher and the listeners they inherited
+    _pool = ProcessPoolExecutor(max_workers=PROCESS_WORKERS,
+                                mp_context=multiprocessing.get_context('fork'),
+                                initializer=_load_worker)
+    await asyncio.get_running_loop().run_in_executor(_pool, _load_worker)
+    _pending = asyncio.Semaphore(MAX_PENDING)
+
+    _loop = asyncio.get_running_loop()
+    _feed_changed = asyncio.Event()
+    flask_api.probability_feed.add_listener(_on_feed_event)
+    flask_api.snapshot_listeners.append(_on_snapshot)
+    flask_api.watch_data()
+    try:
+        yield
+    finally:
+        _pool.shutdown(cancel_futures=True)
+
+
+app = Starlette(
+    routes=[
+        Route('/api/health', health_check, methods=['GET']),
+        Route('/api/women/probabilities/stream', probability_stream, methods=['GET']),
+        Route('/{path:path}', dispatch, methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS']),
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,269 @@
+"""
+HTTP load test of the API on localhost
+Starts the API under gunicorn (gunicorn.conf.py settings, one worker by
+default so throughput is per worker) on a synthetic 64-team dataset or a
+fixture directory, then drives a weighted mix of dataset routes with a
+fixed number of concurrent clients per level and reports throughput and
+p50/p95/p99 latency per level and route:
+
+    python benchmarks/load_test.py --concurrency 1,8,32 --duration 20
+    python benchmarks/load_test.py --mix teams=1,historical=1 --seasons 50
+    python benchmarks/load_test.py --data-dir data/women --workers 2
+    python benchmarks/load_test.py --url http://127.0.0.1:5000   # running server
+
+--seasons sets the size of the synthetic history, so the payloads of
+/historical grow with it. Clients are asyncio connections in this process;
+on a small machine they share the CPU with the server, so compare levels
+and runs on the same machine rather than reading absolute numbers.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from urllib.parse import quote, urlsplit
+
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.normpath(os.path.join(script_dir, '..'))
+sys.path.insert(0, script_dir)
+import synthetic
+
+OUTPUT_DIR = os.path.join(backend_dir, 'cache', 'loadtests')
+
+# Route name -> path for one request, given the dataset's teams and years
+ROUTES = {
+    'teams': lambda rng, data: '/api/women/teams',
+    'matchups': lambda rng, data: f"/api/women/matchups?team={quote(rng.choice(data['teams']))}",
+    'historical': lambda rng, data: f"/api/women/historical?year={rng.choice(data['years'])}",
+    'stats': lambda rng, data: '/api/women/stats',
+}
+DEFAULT_MIX = 'teams=4,matchups=3,historical=2,stats=1'
+
+
+def parse_mix(text):
+    """'teams=4,stats=1' -> (route names, probabilities)"""
+    weights = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ROUTES:
+            raise ValueError(f"Unknown route '{name}' (expected one of {list(ROUTES)})")
+        weights[name] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Route weights must add up to more than 0")
+    return list(weights), np.array(list(weights.values())) / total
+
+
+async def fetch(host, port, path, encoding='gzip', timeout=30.0):
+    """
+    One GET request on a new connection
+
+    Returns:
+        tuple: (status code, response body bytes)
+    """
+    async def request():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nAccept-Encoding: {encoding}\r\n'
+                         f'Connection: close\r\n\r\n'.encode())
+            await writer.drain()
+            return await reader.read()
+        finally:
+            writer.close()
+
+    data = await asyncio.wait_for(request(), timeout)
+    head, _, body = data.partition(b'\r\n\r\n')
+    return int(head.split(b' ', 2)[1]), body
+
+
+async def run_level(host, port, routes, weights, data, concurrency, duration, encoding, timeout, seed):
+    """
+    Closed-loop load: each client sends its next request when the last ends
+
+    Returns:
+        tuple: (samples as (route, status, seconds, bytes) with status 0 for
+            failed connections and timeouts, elapsed seconds)
+    """
+    samples = []
+    deadline = time.perf_counter() + duration
+
+    async def client(rng):
+        while time.perf_counter() < deadline:
+            route = routes[rng.choice(len(routes), p=weights)]
+            path = ROUTES[route](rng, data)
+            start = time.perf_counter()
+            try:
+                status, body = await fetch(host, port, path, encoding, timeout)
+                size = len(body)
+            except (OSError, ValueError, IndexError, asyncio.TimeoutError):
+                status, size = 0, 0
+            samples.append((route, status, time.perf_counter() - start, size))
+
+    start = time.perf_counter()
+    rngs = [np.random.default_rng([seed, c]) for c in range(concurrency)]
+    await asyncio.gather(*(client(rng) for rng in rngs))
+    return samples, time.perf_counter() - start
+
+
+def summarize(samples, elapsed):
+    """Throughput, error count, size and latency percentiles of samples"""
+    latency = np.array([s[2] for s in samples]) * 1000
+    sizes = np.array([s[3] for s in samples])
+    errors = sum(1 for s in samples if not 200 <= s[1] < 300)
+    if not len(samples):
+        return {'requests': 0, 'errors': 0, 'throughput_rps': 0.0}
+    p50, p95, p99 = np.percentile(latency, [50, 95, 99])
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'throughput_rps': round(len(samples) / elapsed, 1),
+        'mb_per_s': round(sizes.sum() / elapsed / 2**20, 2),
+        'mean_bytes': int(sizes.mean()),
+        'p50_ms': round(p50, 2),
+        'p95_ms': round(p95, 2),
+        'p99_ms': round(p99, 2),
+        'max_ms': round(latency.max(), 2),
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_ready(host, port, server, timeout):
+    """Poll /api/health until it answers 200 (or the server exits)"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            status, _ = asyncio.run(fetch(host, port, '/api/health', 'identity', timeout=5))
+            if status == 200:
+                return
+        except (OSError, ValueError, IndexError, asyncio.TimeoutError):
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server not ready after {timeout}s")
+
+
+def start_server(data_dir, workdir, port, workers, threads, log_path):
+    """gunicorn on 127.0.0.1:port serving create_app() on data_dir"""
+    factory = (f"app:create_app(data_dir={data_dir!r}, models_dir={os.path.join(workdir, 'models')!r}, "
+               f"contests_dir={os.path.join(workdir, 'contests')!r})")
+    command = [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py',
+               '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--threads', str(threads), factory]
+    with open(log_path, 'w') as log:
+        return subprocess.Popen(command, cwd=backend_dir, stdout=log, stderr=subprocess.STDOUT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the API on localhost')
+    parser.add_argument('--concurrency', default='1,4,16,64', help='Comma-separated concurrent clients per level')
+    parser.add_argument('--duration', type=float, default=15.0, help='Seconds per level')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Route weights (default {DEFAULT_MIX})')
+    parser.add_argument('--encoding', default='gzip', help='Accept-Encoding of the requests (identity for none)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Seconds before a request counts as failed')
+    parser.add_argument('--data-dir', help='Dataset to serve (default: a synthetic 64-team dataset)')
+    parser.add_argument('--seasons', type=int, default=5, help='Seasons of synthetic history')
+    parser.add_argument('--workers', type=int, default=1, help='Gunicorn workers')
+    parser.add_argument('--threads', type=int, default=1, help='Gunicorn threads per worker')
+    parser.add_argument('--url', help='Test a server that is already running instead of starting one')
+    parser.add_argument('--startup-timeout', type=float, default=300.0, help='Seconds to wait for the server')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--output', help='Report path (default cache/loadtests/load_test_<time>.json)')
+    args = parser.parse_args()
+
+    try:
+        routes, weights = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    levels = [int(c) for c in args.concurrency.split(',')]
+
+    print("="*80)
+    print("API LOAD TEST")
+    print("="*80 + "\n")
+
+    started = datetime.now()
+    workdir = tempfile.mkdtemp(prefix='load_test_')
+    server = None
+    try:
+        if args.url:
+            target = urlsplit(args.url)
+            host, port = target.hostname, target.port or 80
+        else:
+            data_dir = os.path.abspath(args.data_dir) if args.data_dir else os.path.join(workdir, 'data')
+            if not args.data_dir:
+                print(f"Writing synthetic dataset ({args.seasons} seasons of history)...")
+                synthetic.write_app_dataset(data_dir, args.seasons, args.seed)
+            host, port = '127.0.0.1', free_port()
+            log_path = os.path.join(workdir, 'server.log')
+            print(f"Starting gunicorn on {host}:{port} ({args.workers} worker(s), {args.threads} thread(s))...")
+            server = start_server(data_dir, workdir, port, args.workers, args.threads, log_path)
+            try:
+                wait_until_ready(host, port, server, args.startup_timeout)
+            except RuntimeError:
+                with open(log_path) as f:
+                    print(f.read()[-4000:])
+                raise
+        print(f"✓ Server ready at http://{host}:{port}\n")
+
+        # Query values come from the server, so any dataset works
+        _, body = asyncio.run(fetch(host, port, '/api/women/teams', 'identity', args.timeout))
+        teams = [t['team'] for t in json.loads(body)]
+        _, body = asyncio.run(fetch(host, port, '/api/women/historical', 'identity', args.timeout))
+        data = {'teams': teams, 'years': sorted({r['year'] for r in json.loads(body)})}
+
+        results = []
+        print(f"{'Clients':>7} {'Requests':>9} {'Errors':>7} {'Req/s':>9} {'MB/s':>7} "
+              f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for concurrency in levels:
+            samples, elapsed = asyncio.run(run_level(host, port, routes, weights, data, concurrency,
+                                                     args.duration, args.encoding, args.timeout, args.seed))
+            level = {'concurrency': concurrency, 'elapsed_s': round(elapsed, 2), **summarize(samples, elapsed)}
+            level['routes'] = {route: summarize([s for s in samples if s[0] == route], elapsed)
+                               for route in routes}
+            results.append(level)
+            print(f"{concurrency:>7} {level['requests']:>9} {level['errors']:>7} {level['throughput_rps']:>9.1f} "
+                  f"{level.get('mb_per_s', 0):>7.2f} {level.get('p50_ms', 0):>9.2f} "
+                  f"{level.get('p95_ms', 0):>9.2f} {level.get('p99_ms', 0):>9.2f}")
+            for route, stats in level['routes'].items():
+                if stats['requests']:
+                    print(f"{'':>7}   {route:<12} {stats['requests']:>6} req, {stats['errors']} errors, "
+                          f"p50 {stats['p50_ms']:.2f} / p99 {stats['p99_ms']:.2f} ms, "
+                          f"{stats['mean_bytes']} bytes")
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'script': 'load_test',
+        'started': started.isoformat(timespec='seconds'),
+        'params': vars(args),
+        'cpu_count': os.cpu_count(),
+        'dataset': {'teams': len(data['teams']), 'years': data['years']},
+        'levels': results,
+    }
+    output = args.output or os.path.join(OUTPUT_DIR, f"load_test_{started.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Saved to: {os.path.normpath(output)}")
+
+
+if __name__ == '__main__':
+    main()
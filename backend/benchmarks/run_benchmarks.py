@@ -0,0 +1,274 @@
+"""
+Benchmarks of every pipeline and API stage on synthetic fields
+Runs ingestion, matchup construction, model inference, pairwise
+normalization, advancement probabilities, bracket indexing, API
+serialization, model training and composites on synthetic data (see
+synthetic.py) for each field size and number of seasons, and writes the
+timings as a JSON report in the run report format of src/instrumentation.py,
+so two benchmark runs compare like two pipeline runs:
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --teams 64,256 --seasons 5 --repeat 5
+    python benchmarks/run_benchmarks.py --baseline cache/benchmarks/baseline.json
+
+Each stage runs --repeat times and the fastest run is reported.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, script_dir)
+sys.path.insert(0, os.path.join(script_dir, '..', 'src'))
+import synthetic
+from compression import compress
+from instrumentation import compare_reports, format_comparison, format_steps, peak_rss_mb, reset_peak_rss
+from matchup_features import build_template_matchups, invert_defensive_stats
+from matchup_models import EARLY_FEATURES, ELITE_FEATURES, EARLY_ROUNDS, ELITE_ROUNDS, fit_calibrated_model
+from probabilities import build_round_matrices, calculate_advancement_probabilities, normalize_pairwise_probabilities
+from scoring import BracketLayout
+from utils import TeamNameIndex
+from womens_composite_tier_models import NCAAPredictor
+
+OUTPUT_DIR = os.path.join(script_dir, '..', 'cache', 'benchmarks')
+
+# Seasons of history behind the models used by the field stages
+MODEL_SEASONS = 5
+
+
+def time_stage(fn, repeat):
+    """
+    Run fn repeat times
+
+    Returns:
+        tuple: (result of the last run, dict with the fastest run's wall and
+            CPU seconds and the peak RSS over all runs)
+    """
+    best = None
+    reset_peak_rss()
+    for _ in range(repeat):
+        gc.collect()
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        result = fn()
+        wall, cpu = time.perf_counter() - start_wall, time.process_time() - start_cpu
+        if best is None or wall < best[0]:
+            best = (wall, cpu)
+    return result, {
+        'wall_s': round(best[0], 4),
+        'cpu_s': round(best[1], 4),
+        'child_cpu_s': 0.0,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def serialize(df):
+    """A table as the API sends it: records with NaN as null, compact JSON"""
+    records = df.where(pd.notnull(df), None).to_dict('records')
+    return json.dumps(records, separators=(',', ':'), sort_keys=True).encode()
+
+
+def train_models(training):
+    """Calibrated early and elite round models fit on synthetic history"""
+    early = training[training['round'].isin(EARLY_ROUNDS)]
+    elite = training[training['round'].isin(ELITE_ROUNDS)]
+    return (fit_calibrated_model('early', early[EARLY_FEATURES], early['win']),
+            fit_calibrated_model('elite', elite[ELITE_FEATURES], elite['win']))
+
+
+def field_stages(n_teams, directory, repeat, rng):
+    """
+    Stages that scale with the field size
+
+    Returns:
+        list: (stage, rows, timing dict)
+    """
+    data = synthetic.write_dataset(directory, n_teams, MODEL_SEASONS, seed=int(rng.integers(2**31)))
+    early_model, elite_model = train_models(data['women_matchups_training.csv'])
+    spellings = synthetic.source_spellings(list(data['women_teams_enriched.csv']['team']), rng)
+    _, n_rounds = synthetic.field_shape(n_teams)
+    rounds = synthetic.round_names(n_rounds)
+    results = []
+
+    def ingest():
+        teams = pd.read_csv(os.path.join(directory, 'women_teams_enriched.csv'))
+        template = pd.read_csv(os.path.join(directory, 'bracket_template.csv'))
+        source = TeamNameIndex(spellings)
+        source.positions(teams['team'])
+        return teams, template
+
+    (teams, template), timing = time_stage(ingest, repeat)
+    results.append(('ingestion', len(template), timing))
+
+    matchups, timing = time_stage(lambda: build_template_matchups(template, invert_defensive_stats(teams)), repeat)
+    results.append(('matchup_construction', len(matchups), timing))
+
+    def infer():
+        raw = np.zeros(len(matchups))
+        early = matchups['round'].isin(rounds[:2]).to_numpy()
+        raw[early] = early_model.predict_proba(matchups.loc[early, EARLY_FEATURES])[:, 1]
+        raw[~early] = elite_model.predict_proba(matchups.loc[~early, ELITE_FEATURES])[:, 1]
+        return raw
+
+    matchups['win_prob_raw'], timing = time_stage(infer, repeat)
+    results.append(('inference', len(matchups), timing))
+
+    matchups['win_prob'], timing = time_stage(lambda: normalize_pairwise_probabilities(matchups), repeat)
+    results.append(('normalization', len(matchups), timing))
+
+    team_order = list(teams['team'])
+
+    def advance():
+        return calculate_advancement_probabilities(build_round_matrices(matchups, team_order, rounds))
+
+    reach, timing = time_stage(advance, repeat)
+    results.append(('advancement', n_teams, timing))
+
+    _, timing = time_stage(lambda: BracketLayout(matchups, rounds), repeat)
+    results.append(('bracket_layout', n_teams - 1, timing))
+
+    composites = teams[['team', 'region', 'seed', 'adj_oe', 'adj_de', 'barthag']].copy()
+    for k in range(1, n_rounds + 1):
+        composites[f'round_{k}_prob'] = reach[k]
+
+    # /api/women/teams and /api/women/matchups, serialized and compressed
+    # once per data snapshot by the API
+    def serialize_responses():
+        return [serialize(composites), serialize(matchups)]
+
+    bodies, timing = time_stage(serialize_responses, repeat)
+    results.append(('api_serialization', len(composites) + len(matchups), timing))
+
+    _, timing = time_stage(lambda: [compress(body, 'gzip', precompressed=True) for body in bodies], repeat)
+    results.append(('api_compression', len(composites) + len(matchups), timing))
+    return results
+
+
+def history_stages(n_teams, n_seasons, directory, repeat, rng):
+    """
+    Stages that scale with the seasons of history
+
+    Returns:
+        list: (stage, rows, timing dict)
+    """
+    synthetic.write_dataset(directory, n_teams, n_seasons, seed=int(rng.integers(2**31)))
+    results = []
+
+    def ingest():
+        return (pd.read_csv(os.path.join(directory, 'women_teams_historical.csv')),
+                pd.read_csv(os.path.join(directory, 'women_torvik_historical.csv')),
+                pd.read_csv(os.path.join(directory, 'women_matchups_training.csv')),
+                pd.read_csv(os.path.join(directory, 'women_teams_enriched.csv')))
+
+    (tournament, torvik, training, current), timing = time_stage(ingest, repeat)
+    results.append(('history_ingestion', len(training), timing))
+
+    _, timing = time_stage(lambda: train_models(training), repeat)
+    results.append(('model_training', len(training), timing))
+
+    def composites():
+        # NCAAPredictor reports progress on stdout
+        with contextlib.redirect_stdout(io.StringIO()):
+            predictor = NCAAPredictor()
+            predictor.prepare_historical_data(tournament, torvik)
+            predictor.train_composite_model()
+            predictor.train_tier_model()
+            predictor.batch_predict_by_season(predictor.historical_data, n_jobs=1)
+            return predictor.batch_predict(current)
+
+    _, timing = time_stage(composites, repeat)
+    results.append(('composites', len(tournament) + len(current), timing))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pipeline and API stages on synthetic fields')
+    parser.add_argument('--teams', default='64,128,256,1024',
+                        help='Comma-separated field sizes (16 times a power of two)')
+    parser.add_argument('--seasons', default='1,10,50', help='Comma-separated seasons of history')
+    parser.add_argument('--history-teams', type=int, default=64,
+                        help='Field size of the seasons of history')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per stage (fastest is reported)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--output', help='Report path (default cache/benchmarks/benchmarks_<time>.json)')
+    parser.add_argument('--baseline', help='Earlier report to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown flagged as a regression (default 0.10)')
+    args = parser.parse_args()
+
+    field_sizes = [int(n) for n in args.teams.split(',')]
+    season_counts = [int(s) for s in args.seasons.split(',')]
+    for n_teams in field_sizes + [args.history_teams]:
+        synthetic.field_shape(n_teams)
+
+    print("="*80)
+    print("BENCHMARKS ON SYNTHETIC DATA")
+    print("="*80 + "\n")
+
+    rng = np.random.default_rng(args.seed)
+    started = datetime.now()
+    steps = []
+    with tempfile.TemporaryDirectory() as directory:
+        for n_teams in field_sizes:
+            print(f"Field of {n_teams} teams...")
+            for stage, rows, timing in field_stages(n_teams, directory, args.repeat, rng):
+                steps.append(dict(name=f'{stage} teams={n_teams}', stage=stage, n_teams=n_teams,
+                                  rows=rows, **timing))
+                print(f"  {stage:<22} {timing['wall_s']:>9.4f}s  ({rows} rows)")
+
+        for n_seasons in season_counts:
+            print(f"{n_seasons} seasons of {args.history_teams}-team history...")
+            for stage, rows, timing in history_stages(args.history_teams, n_seasons, directory, args.repeat, rng):
+                steps.append(dict(name=f'{stage} seasons={n_seasons}', stage=stage, n_teams=args.history_teams,
+                                  n_seasons=n_seasons, rows=rows, **timing))
+                print(f"  {stage:<22} {timing['wall_s']:>9.4f}s  ({rows} rows)")
+
+    report = {
+        'script': 'benchmarks',
+        'status': 'completed',
+        'started': started.isoformat(timespec='seconds'),
+        'params': vars(args),
+        'argv': sys.argv[1:],
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'total': {
+            'wall_s': round(sum(s['wall_s'] for s in steps), 4),
+            'cpu_s': round(sum(s['cpu_s'] for s in steps), 4),
+            'child_cpu_s': 0.0,
+            'peak_rss_mb': max(s['peak_rss_mb'] for s in steps),
+        },
+        'steps': steps,
+    }
+
+    output = args.output or os.path.join(OUTPUT_DIR, f"benchmarks_{started.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(format_steps(report))
+    print(f"✓ Saved to: {os.path.normpath(output)}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare_reports(baseline, report, threshold=args.threshold)
+        print("\n" + format_comparison(rows))
+        regressed = [row['name'] for row in rows if row['regression']]
+        if regressed:
+            print(f"\n⚠ Regressions in: {', '.join(regressed)}")
+            sys.exit(1)
+        print("\n✓ No regressions")
+
+
+if __name__ == '__main__':
+    main()
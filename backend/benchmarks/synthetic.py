@@ -0,0 +1,394 @@
+"""
+Synthetic tournament data for benchmarks and load tests
+Generates team stat tables, bracket templates and seasons of tournament
+history in the same layouts as the files in data/women, for fields of any
+power-of-two size from 16 teams up (16 seeds per region). Teams get a latent
+strength that drives every stat, so models trained on the synthetic history
+learn something and probabilities look like real ones.
+
+Write a dataset to a directory:
+
+    python benchmarks/synthetic.py --teams 256 --seasons 10 --output /tmp/synthetic
+
+With --app, the 64-team dataset also gets the files the API serves
+(composites, matchups with probabilities), so app.py can run on it.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from matchup_features import STAT_COLS, build_template_matchups, calculate_differentials, invert_defensive_stats
+from probabilities import (ADVANCEMENT_COLUMNS, build_round_matrices, calculate_advancement_probabilities,
+                           normalize_pairwise_probabilities, rating_win_probability)
+from scoring import SCORING_SCHEMES, calculate_bracket_values
+from womens_composite_tier_models import NCAAPredictor
+
+SEEDS_PER_REGION = 16
+
+# Finish labels of women_teams_historical.csv, by games won (the last six
+# rounds of any field map onto the 64-team rounds)
+FINISHES = ['First Round', 'Second Round', 'Sweet 16', 'Elite Eight', 'Final Four', 'Runner Up', 'Champion']
+HISTORY_ROUNDS = ['First Round', 'Second Round', 'Sweet 16', 'Elite Eight', 'Final Four', 'Championship']
+
+# Stat -> (mean, change per unit of strength, noise sd)
+STAT_MODEL = {
+    'adj_oe': (100.0, 9.0, 3.0),
+    'adj_de': (92.0, -8.0, 3.0),
+    'wab': (0.0, 4.0, 1.5),
+    'adj_tempo': (69.0, 0.0, 3.0),
+    'efg_pct': (48.0, 3.0, 1.5),
+    'efgd_pct': (43.0, -2.5, 1.5),
+    'tor': (18.0, -1.5, 1.5),
+    'tord': (20.0, 1.5, 1.5),
+    'orb_pct': (33.0, 2.0, 2.5),
+    'drb_pct': (70.0, 1.5, 2.0),
+    'ftr': (30.0, 1.5, 4.0),
+    'ftrd': (28.0, -1.5, 4.0),
+    '2p_pct': (48.0, 3.0, 2.0),
+    '2pd_pct': (42.0, -2.5, 2.0),
+    '3p_pct': (32.0, 2.0, 2.0),
+    '3pd_pct': (29.0, -1.5, 2.0),
+    '3pr': (35.0, 0.0, 5.0),
+    '3prd': (34.0, 0.0, 5.0),
+}
+ENRICHED_COLUMNS = ['team', 'year', 'conf', 'adj_oe', 'adj_de', 'barthag', 'wab', 'adj_tempo',
+                    'efg_pct', 'efgd_pct', 'tor', 'tord', 'orb_pct', 'drb_pct', 'ftr', 'ftrd',
+                    '2p_pct', '2pd_pct', '3p_pct', '3pd_pct', '3pr', '3prd', 'seed', 'region']
+CONFERENCES = ['ACC', 'B10', 'B12', 'BE', 'SEC', 'P12', 'WCC', 'A10', 'MVC', 'Ivy']
+
+
+def seeding_order(size):
+    """
+    Bracket order of seeds 1..size in which seed i meets seed size+1-i first
+    and the best seeds meet as late as possible (1, 16, 8, 9, ... for 16)
+    """
+    order = [1]
+    while len(order) < size:
+        m = 2 * len(order) + 1
+        order = [s for x in order for s in (x, m - x)]
+    return order
+
+
+def round_names(n_rounds):
+    """Round names of a field: 'Round k' first, then Sweet 16 .. Championship"""
+    if n_rounds < 4:
+        raise ValueError("Fields need at least 16 teams (4 rounds)")
+    return [f'Round {k}' for k in range(1, n_rounds - 3)] + ['Sweet 16', 'Elite Eight', 'Final Four', 'Championship']
+
+
+def field_shape(n_teams):
+    """
+    Regions and rounds of a field
+
+    Returns:
+        tuple: (n_regions, n_rounds)
+
+    Raises:
+        ValueError: Unless n_teams is 16 times a power of two
+    """
+    n_regions = n_teams // SEEDS_PER_REGION
+    if n_regions < 1 or n_regions * SEEDS_PER_REGION != n_teams or n_regions & (n_regions - 1):
+        raise ValueError(f"Field size must be 16 times a power of two, got {n_teams}")
+    return n_regions, int(np.log2(n_teams))
+
+
+def bracket_positions(n_teams):
+    """
+    Region index and seed of every bracket position (teams that are
+    adjacent in position order meet in the first round)
+
+    Returns:
+        tuple: (region_idx array, seed array), each of length n_teams
+    """
+    n_regions, _ = field_shape(n_teams)
+    region_order = np.array(seeding_order(n_regions)) - 1
+    seed_order = np.array(seeding_order(SEEDS_PER_REGION))
+    return np.repeat(region_order, SEEDS_PER_REGION), np.tile(seed_order, n_regions)
+
+
+def generate_teams(n_teams, year=2026, rng=None, prefix='Synthetic'):
+    """
+    Team stats for one season's field (women_teams_enriched.csv layout)
+
+    Seeds follow strength within each region, so the 1 seeds are the
+    strongest teams of their regions.
+
+    Args:
+        n_teams: Field size (16 times a power of two)
+        year: Season
+        rng: NumPy Generator
+        prefix: First word of every team name
+
+    Returns:
+        DataFrame: One row per team plus a 'strength' column
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    n_regions, _ = field_shape(n_teams)
+    strength = np.sort(rng.normal(0.0, 1.0, n_teams))[::-1]
+
+    # Snake the teams (strongest first) across regions; seeds follow that order
+    lap = np.arange(n_teams) % (2 * n_regions)
+    region_idx = np.where(lap < n_regions, lap, 2 * n_regions - 1 - lap)
+    seed = np.empty(n_teams, dtype=int)
+    for r in range(n_regions):
+        seed[region_idx == r] = np.arange(1, SEEDS_PER_REGION + 1)
+
+    teams = pd.DataFrame({
+        'team': [f'{prefix} {i + 1:04d} State' for i in range(n_teams)],
+        'year': year,
+        'conf': rng.choice(CONFERENCES, n_teams),
+    })
+    for col, (mean, slope, noise) in STAT_MODEL.items():
+        teams[col] = mean + slope * strength + rng.normal(0.0, noise, n_teams)
+    margin = teams['adj_oe'] - teams['adj_de']
+    teams['barthag'] = 1 / (1 + np.exp(-margin / 11.0))
+    teams['seed'] = seed
+    teams['region'] = [f'Region {r + 1}' for r in region_idx]
+    teams['strength'] = strength
+    return teams[ENRICHED_COLUMNS + ['strength']]
+
+
+def generate_template(n_teams):
+    """
+    Bracket template with every ordered pair of teams in the round they
+    would meet (bracket_template.csv layout)
+
+    Args:
+        n_teams: Field size (16 times a power of two)
+
+    Returns:
+        DataFrame: n_teams * (n_teams - 1) rows
+    """
+    n_regions, n_rounds = field_shape(n_teams)
+    names = round_names(n_rounds)
+    region_idx, seeds = bracket_positions(n_teams)
+
+    p, q = np.meshgrid(np.arange(n_teams), np.arange(n_teams), indexing='ij')
+    keep = p != q
+    p, q = p[keep], q[keep]
+    round_no = np.bitwise_xor(p, q).astype(np.int64)
+    round_no = np.floor(np.log2(round_no)).astype(int) + 1
+
+    # Games inside a region are numbered per region, later ones across the field
+    within = round_no <= 4
+    game_no = np.where(within, (p % SEEDS_PER_REGION) >> round_no, p >> round_no) + 1
+    region_label = np.where(within, region_idx[p] + 1, n_regions + 1)
+    game_ids = [f'r{k}_r{r}_g{g:02d}' for k, r, g in zip(round_no, region_label, game_no)]
+
+    return pd.DataFrame({
+        'game_id': game_ids,
+        'round': np.array(names)[round_no - 1],
+        'team_region': [f'Region {r + 1}' for r in region_idx[p]],
+        'team_seed': seeds[p],
+        'opp_region': [f'Region {r + 1}' for r in region_idx[q]],
+        'opp_seed': seeds[q],
+    })
+
+
+def _log5(a, b):
+    return a * (1 - b) / (a * (1 - b) + b * (1 - a))
+
+
+def generate_history(n_teams, n_seasons, first_year=2000, rng=None):
+    """
+    Seasons of simulated tournaments
+
+    Args:
+        n_teams: Field size of every season
+        n_seasons: Number of seasons
+        first_year: Year of the first season
+        rng: NumPy Generator
+
+    Returns:
+        tuple: (tournament teams in women_teams_historical.csv layout,
+            their stats in women_torvik_historical.csv layout,
+            games in women_matchups_training.csv layout)
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    _, n_rounds = field_shape(n_teams)
+    region_idx, seeds = bracket_positions(n_teams)
+
+    tournaments, torvik, games = [], [], []
+    for year in range(first_year, first_year + n_seasons):
+        teams = generate_teams(n_teams, year, rng)
+        year_ids = np.array([f'{year} {t}' for t in teams['team']])
+        teams['team_id'] = teams['torvik_id'] = year_ids
+        barthag = teams['barthag'].to_numpy()
+        inverted = invert_defensive_stats(teams)[STAT_COLS]
+
+        # Row of the team at each bracket position
+        slots = pd.MultiIndex.from_arrays([teams['region'], teams['seed']])
+        alive = slots.get_indexer(pd.MultiIndex.from_arrays(
+            [[f'Region {r + 1}' for r in region_idx], seeds]))
+        wins = np.zeros(n_teams, dtype=int)
+
+        for k in range(n_rounds):
+            a, b = alive[0::2], alive[1::2]
+            a_wins = rng.random(len(a)) < _log5(barthag[a], barthag[b])
+            winners = np.where(a_wins, a, b)
+            wins[winners] += 1
+
+            # Both orientations, higher seed number first as in the real file
+            high = np.concatenate([a, b])
+            low = np.concatenate([b, a])
+            game = pd.DataFrame({
+                'year': year,
+                'region': teams['region'].to_numpy()[high],
+                'round': HISTORY_ROUNDS[max(0, k - (n_rounds - len(HISTORY_ROUNDS)))],
+                'high_bracket_seed': teams['seed'].to_numpy()[high],
+                'high_team_id': year_ids[high],
+                'low_bracket_seed': teams['seed'].to_numpy()[low],
+                'low_team_id': year_ids[low],
+                'win': np.concatenate([a_wins, ~a_wins]).astype(int),
+            })
+            diffs = calculate_differentials(inverted.iloc[high], inverted.iloc[low])
+            games.append(pd.concat([game, diffs.reset_index(drop=True)], axis=1))
+            alive = winners
+
+        finish_idx = np.maximum(0, wins - (n_rounds - len(HISTORY_ROUNDS)))
+        tournaments.append(pd.DataFrame({
+            'team_id': teams['team_id'], 'year': year, 'team': teams['team'],
+            'region': teams['region'], 'seed': teams['seed'],
+            'finish': np.array(FINISHES)[finish_idx], 'weekend': 1 + (finish_idx >= 2),
+            'torvik_id': teams['torvik_id'],
+        }))
+        torvik.append(teams[['torvik_id', 'year', 'team', 'conf'] + STAT_COLS])
+
+    return (pd.concat(tournaments, ignore_index=True), pd.concat(torvik, ignore_index=True),
+            pd.concat(games, ignore_index=True))
+
+
+def source_spellings(names, rng=None, share=0.5):
+    """
+    Names as a stats source might spell them: 'State' abbreviated to 'St.'
+    for a share of the teams, so name resolution has work to do
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    abbreviate = rng.random(len(names)) < share
+    return [n[:-len('State')] + 'St.' if a and n.endswith('State') else n for n, a in zip(names, abbreviate)]
+
+
+def write_dataset(directory, n_teams=64, n_seasons=5, seed=0, year=2026):
+    """
+    Write a synthetic dataset in the data/women file layout
+
+    Args:
+        directory: Output directory (created if missing)
+        n_teams: Field size
+        n_seasons: Seasons of history before year
+        seed: Random seed
+        year: Current season
+
+    Returns:
+        dict: File name -> DataFrame written
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    teams = generate_teams(n_teams, year, rng)
+    tournament, torvik, training = generate_history(n_teams, n_seasons, first_year=year - n_seasons, rng=rng)
+    frames = {
+        'women_teams_enriched.csv': teams.drop(columns='strength'),
+        'women_teams_current.csv': pd.DataFrame({
+            'team_id': [f'{year} {t}' for t in teams['team']], 'year': year,
+            'team': teams['team'], 'region': teams['region'], 'seed': teams['seed'],
+        }),
+        'bracket_template.csv': generate_template(n_teams),
+        'women_teams_historical.csv': tournament,
+        'women_torvik_historical.csv': torvik,
+        'women_matchups_training.csv': training,
+    }
+    for name, frame in frames.items():
+        frame.to_csv(os.path.join(directory, name), index=False)
+    return frames
+
+
+def write_app_dataset(directory, n_seasons=5, seed=0, year=2026):
+    """
+    Write a synthetic 64-team dataset with the files app.py loads
+
+    On top of write_dataset: matchups with log5 probabilities, and current
+    and historical composites scored by NCAAPredictor trained on the
+    synthetic history, with advancement probabilities and bracket values.
+
+    Args:
+        directory: Output directory (created if missing)
+        n_seasons: Seasons of history before year (sets the size of
+            women_composites_historical.csv)
+        seed: Random seed
+        year: Current season
+
+    Returns:
+        dict: File name -> DataFrame written
+    """
+    frames = write_dataset(directory, 64, n_seasons, seed, year)
+    teams = frames['women_teams_enriched.csv']
+
+    matchups = build_template_matchups(frames['bracket_template.csv'], invert_defensive_stats(teams))
+    barthag = teams.set_index('team')['barthag']
+    matchups['win_prob_raw'] = rating_win_probability(barthag.reindex(matchups['team']).to_numpy(),
+                                                      barthag.reindex(matchups['opponent']).to_numpy())
+    matchups['win_prob'] = normalize_pairwise_probabilities(matchups)
+
+    # NCAAPredictor reports progress on stdout
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor = NCAAPredictor()
+        predictor.prepare_historical_data(frames['women_teams_historical.csv'],
+                                          frames['women_torvik_historical.csv'])
+        predictor.train_composite_model()
+        predictor.train_tier_model()
+        historical = predictor.batch_predict_by_season(predictor.historical_data, n_jobs=1)
+        current = predictor.batch_predict(teams)
+
+    layout_teams = current['team'].tolist()
+    round_matrices = build_round_matrices(matchups, layout_teams)
+    reach = calculate_advancement_probabilities(round_matrices)
+    composites = current[['team', 'region', 'seed', 'tier']].copy()
+    composites['bracket_value'] = calculate_bracket_values(
+        reach, current['seed'].to_numpy(), [SCORING_SCHEMES['standard']], round_matrices)[0].round(2)
+    composites[['overall', 'offense', 'defense']] = current[['overall', 'offense', 'defense']]
+    for k, col_name in enumerate(ADVANCEMENT_COLUMNS, start=1):
+        composites[col_name] = reach[k]
+    composites = composites.sort_values('overall', ascending=False).reset_index(drop=True)
+
+    columns = ['year', 'team', 'seed', 'tier', 'bracket_value', 'overall', 'offense', 'defense', 'finish']
+    historical = historical.assign(bracket_value=0.0)[columns]
+    app_frames = {
+        'women_matchups_with_probs.csv': matchups,
+        'women_composites_current.csv': composites,
+        'women_composites_historical.csv': pd.concat(
+            [historical, composites.assign(year=year, finish='TBD')[columns]], ignore_index=True),
+    }
+    for name, frame in app_frames.items():
+        frame.to_csv(os.path.join(directory, name), index=False)
+    return {**frames, **app_frames}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic tournament dataset')
+    parser.add_argument('--teams', type=int, default=64, help='Field size (16 times a power of two)')
+    parser.add_argument('--seasons', type=int, default=5, help='Seasons of history')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--app', action='store_true', help='Also write the files app.py loads (64 teams only)')
+    parser.add_argument('--output', required=True, help='Output directory')
+    args = parser.parse_args()
+
+    if args.app and args.teams != 64:
+        parser.error('--app needs --teams 64 (the API serves the 64-team bracket)')
+    if args.app:
+        frames = write_app_dataset(args.output, args.seasons, args.seed)
+    else:
+        frames = write_dataset(args.output, args.teams, args.seasons, args.seed)
+    for name, frame in frames.items():
+        print(f"✓ {name}: {frame.shape}")
+    print(f"✓ Saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
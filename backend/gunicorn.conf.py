@@ -0,0 +1,39 @@
+"""
+Gunicorn settings for the NCAA tournament API
+
+    gunicorn --config gunicorn.conf.py
+
+The app is built once in the master (preload_app) and workers are forked
+from it, so the parsed CSVs, probability matrices and indexes are shared
+copy-on-write instead of being loaded again by every worker.
+
+State that changes at runtime is per process. Contest entries and results
+are shared through the contests directory: each worker reloads the files
+another worker saved before it reads them, and pushes new results to its
+own live subscribers. Request metrics are not shared, so each /api/metrics
+scrape shows the worker that answered it.
+"""
+import gc
+import multiprocessing
+import os
+
+wsgi_app = 'app:create_app()'
+bind = os.getenv('BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+# Threaded workers: an open event stream (/probabilities/stream, job events)
+# holds one thread instead of a whole worker, and the worker keeps
+# heartbeating while it lasts, so the timeout doesn't kill it. For many
+# stream subscribers, use the ASGI mode (asgi.py)
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+timeout = int(os.getenv('TIMEOUT', 120))
+preload_app = True
+
+
+def when_ready(server):
+    # Move everything loaded so far into the permanent GC generation; the
+    # collector would otherwise write to those objects' headers in each
+    # worker and turn the shared pages into private copies
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Froze {gc.get_freeze_count()} preloaded objects before forking workers")
@@ -0,0 +1,278 @@
+"""
+Historical backtesting for the women's tournament pipeline
+Replays past tournaments (composites, tiers, matchup models and advancement
+probabilities) using only seasons before the one being replayed
+"""
+import contextlib
+import io
+import numpy as np
+import pandas as pd
+from joblib import Memory, Parallel, delayed
+
+from womens_composite_tier_models import NCAAPredictor
+from matchup_features import STAT_COLS, invert_defensive_stats, build_template_matchups
+from matchup_models import (EARLY_FEATURES, ELITE_FEATURES, EARLY_ROUNDS, ELITE_ROUNDS,
+                            BRACKET_EARLY_ROUNDS, BRACKET_ELITE_ROUNDS, fit_calibrated_model)
+from probabilities import (ROUND_ORDER, ADVANCEMENT_COLUMNS, BRACKET_POINTS,
+                           normalize_pairwise_probabilities, build_round_matrices,
+                           calculate_advancement_probabilities, build_bracket_slots)
+
+
+# Tournament finish -> number of games won
+FINISH_WINS = {
+    'First Round': 0,
+    'Second Round': 1,
+    'Sweet 16': 2,
+    'Elite Eight': 3,
+    'Final Four': 4,
+    'Runner Up': 5,
+    'Champion': 6
+}
+
+
+def build_season_bracket(season_teams, season_games, torvik, template):
+    """
+    Rebuild a past season's 64-team bracket in bracket_template.csv form
+
+    First Four losers are dropped (only teams that played a First Round game
+    keep their slot) and historical region names are mapped onto the template's
+    regions so that Final Four pairings match the actual tournament.
+
+    Args:
+        season_teams: women_teams_historical.csv rows for one season
+        season_games: women_games_historical.csv rows for the same season
+        torvik: Torvik stats indexed by torvik_id
+        template: Bracket template (bracket_template.csv layout)
+
+    Returns:
+        DataFrame: team, region, seed, finish and inverted STAT_COLS per team
+    """
+    first_round = season_games[season_games['round'] == 'First Round']
+    bracket_ids = set(first_round['high_team_id']) | set(first_round['low_team_id'])
+
+    # One team per (region, seed): the team that played the First Round game,
+    # or the stronger team by barthag where that game is missing from the records
+    teams = season_teams.assign(
+        played=season_teams['team_id'].isin(bracket_ids),
+        barthag=torvik['barthag'].reindex(season_teams['torvik_id']).to_numpy()
+    ).sort_values(['played', 'barthag'], ascending=False)
+    teams = teams.drop_duplicates(['region', 'seed']).sort_index()
+
+    # Final Four pairings: template region pairs <- actual region pairs
+    team_regions = teams.set_index('team_id')['region']
+    final_four = season_games[season_games['round'] == 'Final Four'].drop_duplicates('id')
+    actual_pairs = [
+        (team_regions[game['high_team_id']], team_regions[game['low_team_id']])
+        for _, game in final_four.iterrows()
+    ]
+    template_ff = template[template['round'] == 'Final Four']
+    template_pairs = (template_ff.groupby('game_id')[['team_region', 'opp_region']].first()
+                      .itertuples(index=False))
+
+    region_map = {}
+    for actual, slot in zip(actual_pairs, template_pairs):
+        region_map.update(dict(zip(actual, slot)))
+    if len(region_map) != 4:
+        raise ValueError(f"Could not map regions from Final Four games: {actual_pairs}")
+
+    stats = invert_defensive_stats(torvik.reindex(teams['torvik_id'])[STAT_COLS])
+    bracket = pd.DataFrame({
+        'team': teams['team'].to_numpy(),
+        'region': teams['region'].map(region_map).to_numpy(),
+        'seed': teams['seed'].to_numpy(),
+        'finish': teams['finish'].to_numpy(),
+    })
+    return pd.concat([bracket, stats.reset_index(drop=True)], axis=1)
+
+
+def pick_bracket(reach, slots):
+    """
+    Choose a consistent bracket by picking the most likely winner top-down
+
+    The champion is the team most likely to win it all; every other slot is
+    won by the team already picked to win a later game from that slot, or
+    otherwise by the slot team most likely to win that game.
+
+    Args:
+        reach: Advancement array (n_rounds + 1, n_teams) from
+            calculate_advancement_probabilities
+        slots: Slot table from build_bracket_slots
+
+    Returns:
+        Series: Picked team index per game_id
+    """
+    picked_wins = {}
+    picks = {}
+    for game_id, slot in slots.sort_values('round_idx', ascending=False).iterrows():
+        r = slot['round_idx']
+        carried = [t for t in slot['teams'] if picked_wins.get(t, 0) > r]
+        pick = carried[0] if carried else slot['teams'][np.argmax(reach[r + 1, slot['teams']])]
+        picks[game_id] = pick
+        picked_wins[pick] = max(picked_wins.get(pick, 0), r + 1)
+    return pd.Series(picks).reindex(slots.index)
+
+
+def score_season(bracket, reach, slots):
+    """
+    Score advancement probabilities and the picked bracket against results
+
+    Args:
+        bracket: Season bracket from build_season_bracket
+        reach: Advancement array (n_rounds + 1, n_teams)
+        slots: Slot table from build_bracket_slots
+
+    Returns:
+        tuple: (per-round DataFrame with log loss and Brier score, dict of
+            bracket scoring results)
+    """
+    wins = bracket['finish'].map(FINISH_WINS).to_numpy()
+
+    round_rows = []
+    for k, col in enumerate(ADVANCEMENT_COLUMNS, start=1):
+        p = np.clip(reach[k], 1e-15, 1 - 1e-15)
+        y = (wins >= k).astype(float)
+        round_rows.append({
+            'round': col,
+            'log_loss': float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))),
+            'brier': float(np.mean((reach[k] - y) ** 2)),
+        })
+
+    picks = pick_bracket(reach, slots)
+    points = np.array(BRACKET_POINTS)[slots['round_idx'].to_numpy()]
+    pick_idx = picks.to_numpy().astype(int)
+    next_round = slots['round_idx'].to_numpy() + 1
+    correct = wins[pick_idx] >= next_round
+
+    champion = slots.index[slots['round_idx'] == slots['round_idx'].max()][0]
+    summary = {
+        'bracket_points': int(points[correct].sum()),
+        'max_points': int(points.sum()),
+        'correct_picks': int(correct.sum()),
+        'expected_points': float((reach[next_round, pick_idx] * points).sum()),
+        'champion_pick': bracket['team'].iloc[picks[champion]],
+        'champion_actual': bracket.loc[wins == len(ADVANCEMENT_COLUMNS), 'team'].iloc[0],
+    }
+    return pd.DataFrame(round_rows), summary
+
+
+def run_season_backtest(season, historical_teams, torvik, training, games, template,
+                        elite_params=None, tier_centers=None):
+    """
+    Replay one season with every model trained on earlier seasons only
+
+    Args:
+        season: Season to replay
+        historical_teams: women_teams_historical.csv rows for seasons <= season
+        torvik: Torvik stats (women_torvik_historical.csv layout)
+        training: Matchup training rows for seasons < season
+        games: Game records for the season
+        template: Bracket template (bracket_template.csv layout)
+        elite_params: Optional elite model parameters
+        tier_centers: Optional raw-space tier centroids (e.g. the production
+            model's) whose cluster numbering the season's tier model keeps
+
+    Returns:
+        dict: 'teams' (per-team predictions and finish), 'rounds' (per-round
+            log loss / Brier score) and 'summary' (bracket scoring)
+    """
+    # Composites and tiers from earlier seasons only
+    predictor = NCAAPredictor()
+    with contextlib.redirect_stdout(io.StringIO()):
+        history = predictor.prepare_historical_data(historical_teams, torvik)
+        predictor.historical_data = history[history['year'] < season]
+        predictor.train_composite_model()
+        predictor.train_tier_model(reference_centers=tier_centers)
+        scored = predictor.batch_predict(history[history['year'] == season])
+
+    # Matchup models from earlier seasons only
+    early_train = training[training['round'].isin(EARLY_ROUNDS)]
+    elite_train = training[training['round'].isin(ELITE_ROUNDS)]
+    early_model = fit_calibrated_model('early', early_train[EARLY_FEATURES], early_train['win'])
+    elite_model = fit_calibrated_model('elite', elite_train[ELITE_FEATURES], elite_train['win'],
+                                       params=elite_params)
+
+    # Rebuild the bracket and predict every possible matchup
+    torvik_by_id = torvik.set_index('torvik_id')
+    bracket = build_season_bracket(historical_teams[historical_teams['year'] == season],
+                                   games, torvik_by_id, template)
+    matchups = build_template_matchups(template, bracket)
+    if matchups[['team', 'opponent']].isna().any().any():
+        raise ValueError(f"{season}: bracket template slots without a team")
+
+    matchups['win_prob_raw'] = 0.0
+    early_mask = matchups['round'].isin(BRACKET_EARLY_ROUNDS)
+    elite_mask = matchups['round'].isin(BRACKET_ELITE_ROUNDS)
+    matchups.loc[early_mask, 'win_prob_raw'] = early_model.predict_proba(
+        matchups.loc[early_mask, EARLY_FEATURES])[:, 1]
+    matchups.loc[elite_mask, 'win_prob_raw'] = elite_model.predict_proba(
+        matchups.loc[elite_mask, ELITE_FEATURES])[:, 1]
+    matchups['win_prob'] = normalize_pairwise_probabilities(matchups)
+
+    # Advancement probabilities
+    teams = bracket['team'].tolist()
+    reach = calculate_advancement_probabilities(build_round_matrices(matchups, teams, ROUND_ORDER))
+    slots = build_bracket_slots(matchups, teams, ROUND_ORDER)
+    rounds, summary = score_season(bracket, reach, slots)
+
+    team_results = bracket[['team', 'region', 'seed', 'finish']].copy()
+    team_results.insert(0, 'year', season)
+    scored_by_team = scored.set_index('team')
+    for col in ['tier', 'overall', 'offense', 'defense']:
+        team_results[col] = scored_by_team[col].reindex(team_results['team']).to_numpy()
+    for k, col in enumerate(ADVANCEMENT_COLUMNS, start=1):
+        team_results[col] = reach[k]
+    team_results['bracket_value'] = (reach[1:].T @ np.array(BRACKET_POINTS)).round(2)
+
+    rounds.insert(0, 'year', season)
+    return {
+        'teams': team_results,
+        'rounds': rounds,
+        'summary': {'year': season, **summary,
+                    'mean_log_loss': float(rounds['log_loss'].mean())},
+    }
+
+
+def backtest_seasons(seasons, historical_teams, torvik, training, games, template,
+                     elite_params=None, tier_centers=None, n_jobs=-1, cache_dir=None):
+    """
+    Replay several seasons concurrently on a joblib process pool
+
+    Each season only receives data it is allowed to see, so with cache_dir
+    set a season's artifacts are reused until that season's inputs change.
+
+    Args:
+        seasons: Seasons to replay
+        historical_teams: Full women_teams_historical.csv
+        torvik: Full women_torvik_historical.csv
+        training: Full women_matchups_training.csv
+        games: Full women_games_historical.csv
+        template: Bracket template
+        elite_params: Optional elite model parameters
+        tier_centers: Optional raw-space tier centroids to keep the cluster
+            numbering of
+        n_jobs: Number of worker processes (-1 uses all cores)
+        cache_dir: Optional directory for cached season artifacts
+
+    Returns:
+        tuple: (summary DataFrame, per-round DataFrame, per-team DataFrame)
+    """
+    run_season = Memory(cache_dir, verbose=0).cache(run_season_backtest)
+
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(run_season)(
+            season,
+            historical_teams[historical_teams['year'] <= season],
+            torvik[torvik['year'] <= season],
+            training[training['year'] < season],
+            games[games['year'] == season],
+            template,
+            elite_params,
+            tier_centers
+        )
+        for season in seasons
+    )
+
+    summary = pd.DataFrame([r['summary'] for r in results])
+    rounds = pd.concat([r['rounds'] for r in results], ignore_index=True)
+    teams = pd.concat([r['teams'] for r in results], ignore_index=True)
+    return summary, rounds, teams
@@ -0,0 +1,123 @@
+"""
+Most likely paths through the bracket for a single team
+A path is the sequence of opponents a team beats on its way through the
+rounds. Opponents in different rounds come from disjoint parts of the
+bracket, so a path's probability factors into one term per round and the
+K most likely paths are the K best combinations of per-round opponent lists.
+"""
+import heapq
+import threading
+import numpy as np
+import pandas as pd
+
+from probabilities import ROUND_ORDER, build_round_matrices, calculate_advancement_probabilities
+from utils import TeamNameIndex
+
+
+class PathExplorer:
+    """
+    Path queries against one snapshot of matchup probabilities
+
+    Advancement probabilities are computed once at construction; each team's
+    sorted per-round opponent lists are built on first query and cached.
+    """
+
+    def __init__(self, matchups, rounds=ROUND_ORDER, prob_col='win_prob'):
+        """
+        Args:
+            matchups: Matchups with win probabilities
+                (women_matchups_with_probs.csv layout)
+            rounds: Ordered list of round names
+            prob_col: Column with pairwise win probabilities
+        """
+        slots = (matchups[['team', 'team_region', 'team_seed']]
+                 .drop_duplicates('team')
+                 .sort_values(['team_region', 'team_seed'], kind='stable'))
+        self.teams = pd.Index(slots['team'])
+        self.regions = slots['team_region'].to_numpy()
+        self.seeds = slots['team_seed'].to_numpy()
+        self.rounds = list(rounds)
+        self._names = TeamNameIndex(self.teams)
+
+        self.round_matrices = build_round_matrices(matchups, self.teams, self.rounds, prob_col)
+        self.reach = calculate_advancement_probabilities(self.round_matrices)
+        self._options = {}
+        self._lock = threading.Lock()
+
+    def team_position(self, team):
+        """
+        Matrix position of a team (any spelling TeamNameIndex resolves)
+
+        Raises:
+            KeyError: If the team is not in the bracket; the message
+                suggests close matches
+        """
+        return self._names.position(team)
+
+    def round_options(self, position):
+        """
+        Possible opponents per round, most likely first
+
+        The weight of opponent j in round r is P(j reaches round r) *
+        P(team beats j), i.e. the round's factor in any path through j.
+
+        Args:
+            position: Team position
+
+        Returns:
+            list: Per round, a tuple (opponent positions, weights) sorted by
+                descending weight; impossible opponents are left out
+        """
+        options = self._options.get(position)
+        if options is None:
+            options = []
+            for r in range(len(self.rounds)):
+                weights = self.reach[r] * self.round_matrices[r, position]
+                opponents = np.flatnonzero(weights > 0)
+                order = np.argsort(-weights[opponents], kind='stable')
+                options.append((opponents[order], weights[opponents[order]]))
+            with self._lock:
+                self._options[position] = options
+        return options
+
+    def top_paths(self, team, k=10, n_rounds=None):
+        """
+        The K most probable opponent sequences for a team
+
+        Best-first search over index tuples into the sorted per-round lists:
+        each popped tuple's successors advance one coordinate at or after the
+        last advanced one, so every combination is generated at most once
+        and at most K * n_rounds candidates are held at a time.
+
+        Args:
+            team: Team name
+            k: Number of paths to return
+            n_rounds: Number of games in the path (defaults to all rounds)
+
+        Returns:
+            tuple: (P(team wins n_rounds games), list of (probability, list of
+                opponent positions) in descending probability)
+        """
+        position = self.team_position(team)
+        n_rounds = len(self.rounds) if n_rounds is None else n_rounds
+        options = self.round_options(position)[:n_rounds]
+        total = float(self.reach[n_rounds, position])
+
+        if any(len(opponents) == 0 for opponents, _ in options):
+            return total, []
+
+        def probability(index):
+            return float(np.prod([weights[i] for (_, weights), i in zip(options, index)]))
+
+        start = (0,) * n_rounds
+        heap = [(-probability(start), start, 0)]
+        paths = []
+        while heap and len(paths) < k:
+            neg_prob, index, last = heapq.heappop(heap)
+            paths.append((-neg_prob, [int(opponents[i]) for (opponents, _), i in zip(options, index)]))
+            for r in range(last, n_rounds):
+                if index[r] + 1 < len(options[r][0]):
+                    successor = index[:r] + (index[r] + 1,) + index[r + 1:]
+                    heapq.heappush(heap, (-probability(successor), successor, r))
+
+        return total, paths
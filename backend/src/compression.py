@@ -0,0 +1,150 @@
+"""
+Response compression with Accept-Encoding negotiation
+Responses of the cacheable dataset routes are compressed once per data
+snapshot and kept in memory (at the highest levels for the large datasets
+built at load time, at the fast levels for the rest); other responses are
+compressed on the fly at the fast levels when they are large enough.
+Brotli is used when the brotli package is installed, gzip otherwise.
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Responses smaller than this are sent uncompressed
+MIN_SIZE = 1024
+
+# Preference order when a client accepts several encodings equally
+ENCODINGS = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def negotiate(accept_encoding):
+    """
+    Pick the response encoding for an Accept-Encoding header
+
+    Args:
+        accept_encoding: Header value (may be None)
+
+    Returns:
+        str: 'br', 'gzip' or None for no compression
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, *params = item.split(';')
+        # q is matched case-insensitively among any parameters; a missing
+        # or malformed q counts as 1
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    pass
+                break
+        weights[name.strip().lower()] = q
+
+    wildcard = weights.get('*', 0.0)
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = weights.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(data, encoding, precompressed=False):
+    """
+    Compress bytes with the given encoding
+
+    Args:
+        data: Raw bytes
+        encoding: 'br' or 'gzip'
+        precompressed: Use the slowest, smallest settings (for cached
+            responses) instead of settings fast enough for every request
+
+    Returns:
+        bytes: Compressed data
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if precompressed else 5)
+    return gzip.compress(data, compresslevel=9 if precompressed else 6, mtime=0)
+
+
+class CompressedCache:
+    """
+    Identity, gzip and brotli variants of cacheable responses, built once and
+    evicted least recently used first when their total size passes max_bytes
+    """
+
+    def __init__(self, max_bytes=64 * 2**20):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Variants stored under key, None if missing"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, body, content_type, precompressed=False):
+        """
+        Compress and store a response body
+
+        Args:
+            key: Cache key
+            body: Identity response body
+            content_type: Content-Type of the response
+            precompressed: Compress at the slowest, smallest settings (for
+                responses built once at load time) instead of the fast ones
+
+        Returns:
+            dict: content_type, etag and one body per encoding (None for
+                identity)
+        """
+        entry = {
+            'content_type': content_type,
+            'etag': hashlib.sha1(body).hexdigest()[:20],
+            None: body,
+        }
+        if len(body) >= MIN_SIZE:
+            for encoding in ENCODINGS:
+                entry[encoding] = compress(body, encoding, precompressed)
+        size = sum(len(entry[encoding]) for encoding in [None] + ENCODINGS if encoding in entry)
+
+        with self._lock:
+            if key in self._entries:
+                del self._entries[key]
+                self.size -= self._sizes.pop(key)
+            # A response bigger than the whole cache is served but not kept
+            if size <= self.max_bytes:
+                self._entries[key] = entry
+                self._sizes[key] = size
+                self.size += size
+            while self.size > self.max_bytes:
+                evicted, _ = self._entries.popitem(last=False)
+                self.size -= self._sizes.pop(evicted)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.size = 0
@@ -0,0 +1,334 @@
+"""
+Bracket contests: compact entry storage, results and leaderboards
+Entries of a contest are kept as one int8 pick matrix (n_entries x 63) and
+saved as an .npz file; actual results are shared by every contest. Several
+processes (gunicorn workers) can share one storage directory: changes are
+written atomically under a file lock, and each process reloads the files
+another one changed before reading them.
+"""
+import contextlib
+import os
+import re
+import threading
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from live import condition_on_results
+from probabilities import calculate_advancement_probabilities
+from scoring import (SCORING_SCHEMES, NO_PICK, pick_points, score_brackets,
+                     expected_points_table, expected_scores)
+
+
+CONTEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+class ContestStore:
+    """
+    All contests of one tournament plus its actual results
+
+    Scores are cached per (contest, scheme) and recomputed from the pick
+    matrix whenever entries or results change. Expected scores are
+    conditioned on the recorded results, so they include the points
+    already won.
+    """
+
+    def __init__(self, layout, round_matrices, reach, storage_dir=None):
+        """
+        Args:
+            layout: BracketLayout of the current bracket
+            round_matrices: Win probability matrices in layout team order
+            reach: Advancement probabilities in layout team order
+            storage_dir: Optional directory for contest and result files
+        """
+        self.layout = layout
+        self.round_matrices = round_matrices
+        self.reach = reach
+        self.storage_dir = storage_dir
+        self.results = np.full(len(layout), NO_PICK, dtype=np.int8)
+        self.contests = {}
+        self._expected_tables = {}
+        self._scores = {}
+        self._lock = threading.RLock()
+        self._stamps = {}
+
+        if storage_dir is not None:
+            os.makedirs(storage_dir, exist_ok=True)
+            self.refresh()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def _path(self, name):
+        return os.path.join(self.storage_dir, name)
+
+    def _stat(self, filename):
+        # A rename gives a new inode, so same-size writes within one mtime
+        # tick are still noticed
+        st = os.stat(self._path(filename))
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _stored_files(self):
+        stamps = {}
+        for filename in os.listdir(self.storage_dir):
+            if filename == 'results.npy' or filename.endswith('.npz'):
+                try:
+                    stamps[filename] = self._stat(filename)
+                except FileNotFoundError:
+                    continue
+        return stamps
+
+    def refresh(self):
+        """
+        Reload the result and contest files changed on disk since this
+        process last read or wrote them
+
+        Returns:
+            bool: True if the results changed
+        """
+        if self.storage_dir is None:
+            return False
+        with self._lock:
+            stamps = self._stored_files()
+            if stamps == self._stamps:
+                return False
+
+            results_changed = False
+            for filename in set(stamps) | set(self._stamps):
+                if stamps.get(filename) == self._stamps.get(filename):
+                    continue
+                if filename == 'results.npy':
+                    results = np.load(self._path(filename))
+                    results_changed = not np.array_equal(results, self.results)
+                    self.results = results
+                elif filename in stamps:
+                    with np.load(self._path(filename), allow_pickle=False) as saved:
+                        self.contests[filename[:-4]] = {
+                            'names': saved['names'].astype(object),
+                            'picks': saved['picks'],
+                        }
+                else:
+                    self.contests.pop(filename[:-4], None)
+            self._stamps = stamps
+            self._scores = {}
+            if results_changed:
+                self._expected_tables = {}
+            return results_changed
+
+    @contextlib.contextmanager
+    def _modifying(self):
+        # Held while reading, changing and saving state, so concurrent
+        # writers in other processes don't overwrite each other's changes
+        with self._lock:
+            if self.storage_dir is None or fcntl is None:
+                yield
+                return
+            with open(self._path('.lock'), 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self.refresh()
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save(self, filename, write):
+        # Written to a temporary file and renamed, so readers never see a
+        # partial file
+        if self.storage_dir is None:
+            return
+        temp = self._path(f'.{filename}.{os.getpid()}.tmp')
+        with open(temp, 'wb') as f:
+            write(f)
+        os.replace(temp, self._path(filename))
+        self._stamps[filename] = self._stat(filename)
+
+    def _save_contest(self, contest_id):
+        contest = self.contests[contest_id]
+        self._save(f'{contest_id}.npz', lambda f: np.savez(f, names=contest['names'].astype(str),
+                                                           picks=contest['picks']))
+
+    # ------------------------------------------------------------------
+    # Entries and results
+    # ------------------------------------------------------------------
+    def add_entries(self, contest_id, names, picks):
+        """
+        Validate and store brackets; an entry name already in the contest
+        is replaced by its new bracket
+
+        Args:
+            contest_id: Contest identifier
+            names: Entry names
+            picks: Pick array (n_entries, n_games) from BracketLayout.encode
+
+        Returns:
+            tuple: (number stored, list of rejected entry names)
+
+        Raises:
+            ValueError: If the contest id or the input shapes are invalid
+        """
+        if not CONTEST_ID_PATTERN.match(contest_id):
+            raise ValueError(f"Invalid contest id '{contest_id}'")
+        names = np.asarray(names, dtype=object)
+        picks = np.asarray(picks, dtype=np.int8)
+        if picks.ndim != 2 or picks.shape != (len(names), len(self.layout)):
+            raise ValueError("picks must have one row of "
+                             f"{len(self.layout)} picks per entry name")
+
+        valid = self.layout.validate(picks)
+        rejected = names[~valid].tolist()
+        names, picks = names[valid], picks[valid]
+
+        # Last submission wins for repeated names
+        _, last = np.unique(names[::-1].astype(str), return_index=True)
+        keep = np.sort(len(names) - 1 - last)
+        names, picks = names[keep], picks[keep]
+
+        with self._modifying():
+            contest = self.contests.get(contest_id)
+            if contest is not None:
+                replaced = np.isin(contest['names'].astype(str), names.astype(str))
+                names = np.concatenate([contest['names'][~replaced], names])
+                picks = np.concatenate([contest['picks'][~replaced], picks])
+            self.contests[contest_id] = {'names': names, 'picks': picks}
+            self._save_contest(contest_id)
+            self._scores = {k: v for k, v in self._scores.items() if k[0] != contest_id}
+
+        return int(valid.sum()), rejected
+
+    def set_results(self, winners):
+        """
+        Record actual game winners and invalidate cached scores
+
+        Games are applied in round order, so a request can decide a game and
+        the next one together. A winner must have won their feeder game if
+        that game is decided. Changing or clearing a result also clears the
+        later results that depended on the previous winner.
+
+        Args:
+            winners: Dict of game_id -> winning team name (None clears a game)
+
+        Raises:
+            KeyError: For unknown game ids or teams
+            ValueError: For winners who cannot have played the game or who
+                lost a recorded earlier game
+        """
+        games = self.layout.game_ids.get_indexer(list(winners))
+        unknown = [g for g, i in zip(winners, games) if i < 0]
+        if unknown:
+            raise KeyError(f"Unknown games: {', '.join(unknown)}")
+
+        updates = []
+        for g, name in zip(games, winners.values()):
+            team = NO_PICK if name is None else self.layout.team_number(name)
+            if name is not None and team < 0:
+                raise KeyError(f"Unknown team '{name}'")
+            updates.append((g, team))
+        updates.sort(key=lambda update: self.layout.round_idx[update[0]])
+
+        with self._modifying():
+            results = self.results.copy()
+            for g, team in updates:
+                if team >= 0:
+                    self._check_winner(results, g, team)
+                if results[g] != team:
+                    previous, results[g] = results[g], team
+                    self._clear_dependents(results, g, previous)
+
+            self.results = results
+            self._save('results.npy', lambda f: np.save(f, self.results))
+            self._expected_tables = {}
+            self._scores = {}
+
+    def _check_winner(self, results, g, team):
+        layout = self.layout
+        name = layout.teams[team]
+        if not layout.eligible[g, team]:
+            raise ValueError(f"{name} cannot play in {layout.game_ids[g]}")
+        if layout.round_idx[g] > 0:
+            feeder = layout.feeders[g][layout.eligible[layout.feeders[g], team]][0]
+            if results[feeder] >= 0 and results[feeder] != team:
+                raise ValueError(f"{name} cannot win {layout.game_ids[g]}: "
+                                 f"{layout.teams[results[feeder]]} won {layout.game_ids[feeder]}")
+
+    def _clear_dependents(self, results, g, previous):
+        # Later games won by the previous winner of g got there through g
+        if previous < 0:
+            return
+        layout = self.layout
+        stale = {g}
+        later = np.flatnonzero(layout.round_idx > layout.round_idx[g])
+        for d in later[np.argsort(layout.round_idx[later], kind='stable')]:
+            if results[d] == previous and stale.intersection(layout.feeders[d].tolist()):
+                results[d] = NO_PICK
+                stale.add(d)
+
+    def set_probabilities(self, round_matrices, reach):
+        """Switch expected scores to a new probability snapshot"""
+        with self._lock:
+            self.round_matrices = round_matrices
+            self.reach = reach
+            self._expected_tables = {}
+            self._scores = {}
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+    def expected_table(self, scheme_name):
+        """Expected points table given the recorded results, cached until they change"""
+        with self._lock:
+            table = self._expected_tables.get(scheme_name)
+            if table is None:
+                round_matrices, reach = self.round_matrices, self.reach
+                if (self.results >= 0).any():
+                    round_matrices = condition_on_results(self.layout, round_matrices, self.results)
+                    reach = calculate_advancement_probabilities(round_matrices)
+                table = expected_points_table(self.layout, SCORING_SCHEMES[scheme_name],
+                                              round_matrices, reach)
+                self._expected_tables[scheme_name] = table
+            return table
+
+    def scores(self, contest_id, scheme_name='standard'):
+        """
+        Scores of every entry in a contest, cached until entries or results change
+
+        Returns:
+            DataFrame: name, score, correct, expected_score (expected final
+                score given the recorded results) and rank, sorted by rank
+
+        Raises:
+            KeyError: For unknown contests or schemes
+        """
+        if scheme_name not in SCORING_SCHEMES:
+            raise KeyError(f"Unknown scoring scheme '{scheme_name}'")
+        self.refresh()
+        if contest_id not in self.contests:
+            raise KeyError(f"Contest '{contest_id}' not found")
+
+        key = (contest_id, scheme_name)
+        with self._lock:
+            cached = self._scores.get(key)
+            if cached is not None:
+                return cached
+
+            contest = self.contests[contest_id]
+            scheme = SCORING_SCHEMES[scheme_name]
+            points = pick_points(self.layout, scheme, self.results,
+                                 self.layout.losers(self.results))
+            score, correct = score_brackets(contest['picks'], self.results, points)
+            expected = expected_scores(self.layout, contest['picks'], self.expected_table(scheme_name))
+
+            board = pd.DataFrame({
+                'name': contest['names'],
+                'score': score,
+                'correct': correct,
+                'expected_score': expected.round(2),
+            })
+            board['rank'] = board['score'].rank(method='min', ascending=False).astype(int)
+            board = board.sort_values(['rank', 'expected_score'], ascending=[True, False],
+                                      kind='stable').reset_index(drop=True)
+            self._scores[key] = board
+            return board
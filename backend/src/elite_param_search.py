@@ -0,0 +1,234 @@
+"""
+Hyperparameter search for the elite rounds XGBoost model
+- Random search on leave-one-season-out folds; within each fold the
+  latest remaining season decides early stopping, so the held-out season
+  that ranks the trials is never used to pick the number of rounds
+- Trials run concurrently; each worker builds the fold DMatrix objects once
+  and reuses them for every trial it runs
+- Completed trials are checkpointed so an interrupted search can resume
+"""
+import json
+import os
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from joblib import Parallel, delayed, hash as joblib_hash
+from sklearn.metrics import log_loss
+
+from matchup_models import ELITE_FEATURES, ELITE_ROUNDS, ELITE_PARAMS
+
+
+# Parameter -> (scale, low, high)
+SEARCH_SPACE = {
+    'learning_rate': ('log', 0.01, 0.3),
+    'max_depth': ('int', 2, 10),
+    'min_child_weight': ('uniform', 1.0, 10.0),
+    'subsample': ('uniform', 0.5, 1.0),
+    'colsample_bytree': ('uniform', 0.5, 1.0),
+    'gamma': ('uniform', 0.0, 5.0),
+    'reg_alpha': ('uniform', 0.0, 2.0),
+    'reg_lambda': ('uniform', 0.5, 5.0),
+}
+
+MAX_BOOST_ROUNDS = 1000
+EARLY_STOPPING_ROUNDS = 30
+
+# Checkpointed trials scored under another fold scheme are rerun
+FOLD_SCHEME = 'season-out-with-stopping-season'
+
+# Fold DMatrix objects built once per worker process: (data hash, folds)
+_worker_folds = (None, None)
+
+
+def sample_params(trial_id, seed=42):
+    """
+    Draw one parameter set from SEARCH_SPACE
+
+    Trial 0 is always the current ELITE_PARAMS baseline. Draws are seeded by
+    trial_id, so a resumed search regenerates exactly the same trials.
+
+    Args:
+        trial_id: Trial number
+        seed: Base random seed for the search
+
+    Returns:
+        dict: XGBoost parameters (without n_estimators)
+    """
+    if trial_id == 0:
+        return {k: v for k, v in ELITE_PARAMS.items() if k != 'n_estimators'}
+
+    rng = np.random.RandomState(seed + trial_id)
+    params = {}
+    for name, (scale, low, high) in SEARCH_SPACE.items():
+        if scale == 'log':
+            params[name] = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+        elif scale == 'int':
+            params[name] = int(rng.randint(low, high + 1))
+        else:
+            params[name] = float(rng.uniform(low, high))
+    return params
+
+
+def build_season_folds(df):
+    """
+    Build leave-one-season-out DMatrix folds for elite games
+
+    Each held-out season is scored by a model fit on the other seasons but
+    one: the latest of those is kept back to decide early stopping.
+
+    Args:
+        df: Training matchups (women_matchups_training.csv layout)
+
+    Returns:
+        list: (season, dtrain, dstop, dvalid) tuples
+
+    Raises:
+        ValueError: With fewer than three seasons of elite games
+    """
+    elite_df = df[df['round'].isin(ELITE_ROUNDS)]
+    seasons = sorted(elite_df['year'].unique())
+    if len(seasons) < 3:
+        raise ValueError(f"Need at least 3 seasons of elite games to search, got {len(seasons)}")
+
+    folds = []
+    for season in seasons:
+        stop_season = max(s for s in seasons if s != season)
+        train = elite_df[~elite_df['year'].isin([season, stop_season])]
+        stop = elite_df[elite_df['year'] == stop_season]
+        valid = elite_df[elite_df['year'] == season]
+        folds.append((
+            int(season),
+            xgb.DMatrix(train[ELITE_FEATURES], label=train['win']),
+            xgb.DMatrix(stop[ELITE_FEATURES], label=stop['win']),
+            xgb.DMatrix(valid[ELITE_FEATURES], label=valid['win'])
+        ))
+    return folds
+
+
+def _get_worker_folds(df, data_key):
+    """
+    Return this worker's prebuilt folds, building them on first use
+    """
+    global _worker_folds
+    if _worker_folds[0] != data_key:
+        _worker_folds = (data_key, build_season_folds(df))
+    return _worker_folds[1]
+
+
+def run_trial(trial_id, params, folds):
+    """
+    Evaluate one parameter set on every season fold
+
+    Boosting stops early on each fold's stopping season; the held-out
+    season's log loss at that number of rounds is the trial's score.
+
+    Args:
+        trial_id: Trial number
+        params: XGBoost parameters (without n_estimators)
+        folds: Prebuilt folds from build_season_folds
+
+    Returns:
+        dict: Trial record with mean held-out log loss and the averaged
+            best number of boosting rounds as n_estimators
+    """
+    booster_params = {**params, 'objective': 'binary:logistic', 'eval_metric': 'logloss',
+                      'nthread': 1, 'seed': 42}
+
+    losses, best_rounds = [], []
+    for _, dtrain, dstop, dvalid in folds:
+        booster = xgb.train(
+            booster_params, dtrain,
+            num_boost_round=MAX_BOOST_ROUNDS,
+            evals=[(dstop, 'stop')],
+            early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+            verbose_eval=False
+        )
+        rounds = booster.best_iteration + 1
+        predictions = booster.predict(dvalid, iteration_range=(0, rounds))
+        losses.append(log_loss(dvalid.get_label(), predictions, labels=[0, 1]))
+        best_rounds.append(rounds)
+
+    return {
+        'trial_id': trial_id,
+        'log_loss': float(np.mean(losses)),
+        'log_loss_std': float(np.std(losses)),
+        'params': {**params, 'n_estimators': int(round(np.mean(best_rounds)))},
+    }
+
+
+def _run_worker_trial(trial_id, params, df, data_key):
+    return run_trial(trial_id, params, _get_worker_folds(df, data_key))
+
+
+def load_checkpoint(checkpoint_path, seed):
+    """
+    Load completed trials from a JSON-lines checkpoint
+
+    Args:
+        checkpoint_path: Path to the checkpoint file
+        seed: Search seed; trials recorded under another seed or fold
+            scheme are ignored
+
+    Returns:
+        dict: trial_id -> trial record
+    """
+    trials = {}
+    if checkpoint_path is None or not os.path.exists(checkpoint_path):
+        return trials
+
+    with open(checkpoint_path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Partially written last line from an interrupted run
+                continue
+            if record.get('seed') == seed and record.get('folds') == FOLD_SCHEME:
+                trials[record['trial_id']] = record
+    return trials
+
+
+def search_elite_params(df, n_trials=50, n_jobs=-1, checkpoint_path=None, seed=42):
+    """
+    Run (or resume) a random search over elite model parameters
+
+    Args:
+        df: Training matchups (women_matchups_training.csv layout)
+        n_trials: Total number of trials including the baseline trial 0
+        n_jobs: Number of concurrent worker processes (-1 uses all cores)
+        checkpoint_path: Optional JSON-lines file recording completed trials
+        seed: Random seed for parameter sampling
+
+    Returns:
+        tuple: (best trial record, DataFrame of all trials sorted by log loss)
+    """
+    trials = load_checkpoint(checkpoint_path, seed)
+    pending = [t for t in range(n_trials) if t not in trials]
+
+    if pending:
+        # Only the elite rows are shipped to workers
+        elite_df = df[df['round'].isin(ELITE_ROUNDS)][['year', 'round', 'win'] + ELITE_FEATURES]
+        data_key = joblib_hash(elite_df)
+
+        completed = Parallel(n_jobs=n_jobs, return_as='generator')(
+            delayed(_run_worker_trial)(t, sample_params(t, seed), elite_df, data_key)
+            for t in pending
+        )
+        for result in completed:
+            record = {**result, 'seed': seed, 'folds': FOLD_SCHEME}
+            trials[record['trial_id']] = record
+            if checkpoint_path is not None:
+                with open(checkpoint_path, 'a') as f:
+                    f.write(json.dumps(record) + '\n')
+
+    results = pd.DataFrame([
+        {'trial_id': r['trial_id'], 'log_loss': r['log_loss'],
+         'log_loss_std': r['log_loss_std'], **r['params']}
+        for r in trials.values() if r['trial_id'] < n_trials
+    ]).sort_values(['log_loss', 'trial_id']).reset_index(drop=True)
+
+    best = trials[int(results.iloc[0]['trial_id'])]
+    return best, results
@@ -0,0 +1,290 @@
+"""
+Step timing and memory reports for the pipeline scripts
+A script creates one RunRecorder and calls step() where each STEP begins;
+wall time, CPU time (including worker processes) and memory are recorded per
+step and written as a JSON run report when the script ends. Two reports of
+the same script can be compared to flag steps that got slower or bigger:
+
+    python src/instrumentation.py compare baseline.json current.json
+
+Reports go to backend/cache/runs (RUN_REPORT_DIR to change it). Python-level
+allocation peaks are traced too with RUN_TRACEMALLOC=1, at some cost in
+speed.
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+REPORT_DIR = os.getenv('RUN_REPORT_DIR') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'runs'
+)
+
+_PAGE_MB = os.sysconf('SC_PAGE_SIZE') / 2**20 if hasattr(os, 'sysconf') else None
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB, None where unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_MB
+    except (OSError, TypeError):
+        return None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (since the last reset)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is KB on Linux, bytes on macOS, and never resets
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 2**20 if sys.platform == 'darwin' else maxrss / 1024
+
+
+def reset_peak_rss():
+    # Linux only: makes VmHWM start again from the current RSS
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+class RunRecorder:
+    """
+    Per-step wall time, CPU time and memory of one pipeline run
+
+    Steps are consecutive: step() ends the running step and starts the next,
+    and the last one ends when the report is written (by finish(), or at
+    exit if the script stops early).
+    """
+
+    def __init__(self, script, params=None, report_dir=REPORT_DIR, trace_memory=None):
+        """
+        Args:
+            script: Script name, used in the report file name
+            params: JSON-serializable run settings (e.g. vars(args))
+            report_dir: Directory for run reports
+            trace_memory: Trace Python allocations with tracemalloc (defaults
+                to the RUN_TRACEMALLOC environment variable)
+        """
+        self.script = os.path.splitext(os.path.basename(script))[0]
+        self.params = params or {}
+        self.report_dir = report_dir
+        self.trace_memory = os.getenv('RUN_TRACEMALLOC') == '1' if trace_memory is None else trace_memory
+        self.steps = []
+        self._current = None
+        self._finished = False
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.started = time.time()
+        self._start = self._counters()
+        atexit.register(self._write_at_exit)
+
+    @staticmethod
+    def _counters():
+        times = os.times()
+        return {
+            'wall': time.perf_counter(),
+            'cpu': times.user + times.system,
+            'child_cpu': times.children_user + times.children_system,
+        }
+
+    def step(self, name):
+        """End the running step (if any) and start timing the next one"""
+        self._end_step()
+        reset_peak_rss()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        self._current = {'name': name, 'counters': self._counters(), 'rss_mb': current_rss_mb()}
+
+    def _end_step(self):
+        if self._current is None:
+            return
+        start, end = self._current['counters'], self._counters()
+        rss = current_rss_mb()
+        record = {
+            'name': self._current['name'],
+            'wall_s': round(end['wall'] - start['wall'], 4),
+            'cpu_s': round(end['cpu'] - start['cpu'], 4),
+            'child_cpu_s': round(end['child_cpu'] - start['child_cpu'], 4),
+            'rss_mb': None if rss is None else round(rss, 1),
+            'rss_delta_mb': None if rss is None or self._current['rss_mb'] is None
+            else round(rss - self._current['rss_mb'], 1),
+            # Without a resettable peak this is the peak of the run so far
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+        }
+        if self.trace_memory:
+            record['peak_traced_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+        self.steps.append(record)
+        self._current = None
+
+    def report(self, status='completed'):
+        """Run report dict (ends the running step)"""
+        self._end_step()
+        end = self._counters()
+        return {
+            'script': self.script,
+            'status': status,
+            'started': datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+            'params': self.params,
+            'argv': sys.argv[1:],
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'total': {
+                'wall_s': round(end['wall'] - self._start['wall'], 4),
+                'cpu_s': round(end['cpu'] - self._start['cpu'], 4),
+                'child_cpu_s': round(end['child_cpu'] - self._start['child_cpu'], 4),
+                'peak_rss_mb': round(max([s['peak_rss_mb'] for s in self.steps] + [peak_rss_mb()]), 1),
+            },
+            'steps': self.steps,
+        }
+
+    def finish(self, status='completed', quiet=False):
+        """
+        Write the run report and print the step table
+
+        Returns:
+            str: Path of the report
+        """
+        if self._finished:
+            return None
+        self._finished = True
+        report = self.report(status)
+
+        os.makedirs(self.report_dir, exist_ok=True)
+        stamp = datetime.fromtimestamp(self.started).strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(self.report_dir, f'{self.script}_{stamp}.json')
+        for target in (path, os.path.join(self.report_dir, f'{self.script}_latest.json')):
+            with open(target, 'w') as f:
+                json.dump(report, f, indent=2)
+
+        if not quiet:
+            print(format_steps(report))
+            print(f"✓ Run report: {os.path.normpath(path)}")
+        return path
+
+    def _write_at_exit(self):
+        # sys.exit() or an exception ended the script before finish()
+        if not self._finished:
+            self.finish(status='incomplete', quiet=True)
+
+
+def format_steps(report):
+    """Step table of a report as text"""
+    lines = [f"\n{'Step':<40} {'Wall s':>9} {'CPU s':>9} {'Child s':>9} {'Peak MB':>9}"]
+    for s in report['steps'] + [dict(report['total'], name='TOTAL')]:
+        lines.append(f"{s['name'][:40]:<40} {s['wall_s']:>9.2f} {s['cpu_s']:>9.2f} "
+                     f"{s['child_cpu_s']:>9.2f} {s['peak_rss_mb']:>9.1f}")
+    return '\n'.join(lines)
+
+
+def compare_reports(baseline, current, threshold=0.10, min_seconds=0.05, min_mb=5.0):
+    """
+    Compare two reports of the same script step by step
+
+    A step is flagged when its wall time grew by more than threshold (and by
+    at least min_seconds, so tiny steps don't flag on noise) or its peak
+    memory grew by more than threshold and at least min_mb.
+
+    Args:
+        baseline: Earlier report dict
+        current: Later report dict
+        threshold: Relative growth that counts as a regression
+        min_seconds: Smallest absolute wall time growth flagged
+        min_mb: Smallest absolute peak memory growth flagged
+
+    Returns:
+        list: One dict per step (steps in either report, plus TOTAL) with
+            both values, relative changes and a 'regression' list naming
+            the metrics that regressed
+    """
+    def by_name(report):
+        steps = {s['name']: s for s in report['steps']}
+        steps['TOTAL'] = dict(report['total'], name='TOTAL')
+        return steps
+
+    def change(before, after):
+        return None if before in (None, 0) or after is None else (after - before) / before
+
+    old, new = by_name(baseline), by_name(current)
+    names = [s['name'] for s in current['steps']]
+    names += [n for n in old if n not in names and n != 'TOTAL'] + ['TOTAL']
+
+    rows = []
+    for name in names:
+        a, b = old.get(name), new.get(name)
+        row = {'name': name, 'regression': []}
+        for metric, floor in (('wall_s', min_seconds), ('cpu_s', min_seconds), ('peak_rss_mb', min_mb)):
+            before = a.get(metric) if a else None
+            after = b.get(metric) if b else None
+            row[metric] = (before, after)
+            row[f'{metric}_change'] = change(before, after)
+            if (metric != 'cpu_s' and before is not None and after is not None
+                    and after - before >= floor and (row[f'{metric}_change'] or 0) > threshold):
+                row['regression'].append(metric)
+        rows.append(row)
+    return rows
+
+
+def format_comparison(rows):
+    """Comparison rows as a text table"""
+    def cell(pair, change):
+        before, after = pair
+        if before is None or after is None:
+            return f"{'-' if before is None else f'{before:.2f}'} -> {'-' if after is None else f'{after:.2f}'}"
+        return f"{before:.2f} -> {after:.2f}" + (f" ({change:+.0%})" if change is not None else '')
+
+    lines = [f"{'Step':<36} {'Wall s':>26} {'Peak MB':>26}"]
+    for row in rows:
+        flag = '  ⚠ ' + ', '.join(row['regression']) if row['regression'] else ''
+        lines.append(f"{row['name'][:36]:<36} {cell(row['wall_s'], row['wall_s_change']):>26} "
+                     f"{cell(row['peak_rss_mb'], row['peak_rss_mb_change']):>26}{flag}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare pipeline run reports')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    compare = subparsers.add_parser('compare', help='Flag steps that regressed between two reports')
+    compare.add_argument('baseline', help='Earlier run report (JSON)')
+    compare.add_argument('current', help='Later run report (JSON)')
+    compare.add_argument('--threshold', type=float, default=0.10,
+                         help='Relative growth flagged as a regression (default 0.10)')
+    compare.add_argument('--min-seconds', type=float, default=0.05,
+                         help='Smallest wall time growth flagged')
+    compare.add_argument('--min-mb', type=float, default=5.0,
+                         help='Smallest peak memory growth flagged')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline['script'] != current['script']:
+        print(f"⚠ Comparing different scripts: {baseline['script']} vs {current['script']}")
+
+    rows = compare_reports(baseline, current, args.threshold, args.min_seconds, args.min_mb)
+    print(format_comparison(rows))
+    regressed = [row['name'] for row in rows if row['regression']]
+    if regressed:
+        print(f"\n⚠ Regressions in: {', '.join(regressed)}")
+        sys.exit(1)
+    print("\n✓ No regressions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,401 @@
+"""
+Background jobs for long-running work (simulations, backtests, retraining)
+Jobs run in a local process pool and keep their state in one directory per
+job, so any web worker can report on any job and no broker is needed. A
+job's id is the hash of its type, parameters and input data, so submitting
+the same work again returns the stored job instead of running it twice.
+The running and queued limits hold across web workers: queued jobs are
+counted in the job directory, and a job only starts once it holds one of
+the shared running slots (file locks).
+"""
+import contextlib
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from probabilities import simulate_tournament
+
+
+# Job states; done and failed are final
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+MAX_SIMULATIONS = 1000000
+
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{24}$')
+
+
+# ----------------------------------------------------------------------
+# Job types: fn(params, paths, progress) -> JSON-serializable result
+# ----------------------------------------------------------------------
+def run_simulation(params, paths, progress):
+    """Monte Carlo advancement probabilities from the current matchups"""
+    n_simulations = int(params.get('n_simulations', 10000))
+    if not 1 <= n_simulations <= MAX_SIMULATIONS:
+        raise ValueError(f"n_simulations must be between 1 and {MAX_SIMULATIONS}")
+
+    matchups = pd.read_csv(os.path.join(paths['data_dir'], 'women_matchups_with_probs.csv'))
+    results = simulate_tournament(matchups, matchups, n_simulations=n_simulations,
+                                  seed=params.get('seed'), progress=progress)
+    return {
+        'n_simulations': results['n_simulations'],
+        'advancement': results['advancement'].round(6).to_dict('records'),
+        'champions': results['champions'].to_dict(),
+    }
+
+
+def run_backtest(params, paths, progress):
+    """Replay past seasons with the full pipeline (see women_backtest.py)"""
+    from backtest import backtest_seasons
+    from womens_composite_tier_models import saved_tier_centroids
+
+    data_dir = paths['data_dir']
+    historical_teams = pd.read_csv(os.path.join(data_dir, 'women_teams_historical.csv'))
+    torvik = pd.read_csv(os.path.join(data_dir, 'women_torvik_historical.csv'), encoding='utf-8-sig')
+    training = pd.read_csv(os.path.join(data_dir, 'women_matchups_training.csv'))
+    games = pd.read_csv(os.path.join(data_dir, 'women_games_historical.csv'))
+    template = pd.read_csv(os.path.join(data_dir, 'bracket_template.csv'))
+
+    first_season = training['year'].min()
+    seasons = params.get('seasons') or sorted(
+        int(y) for y in historical_teams['year'].unique() if y > first_season
+    )
+
+    # Number each season's tiers like the production model's
+    tier_centers = None
+    if paths.get('models_dir'):
+        tier_centers = saved_tier_centroids(os.path.join(paths['models_dir'], 'womens_predictor.joblib'))
+
+    # One season at a time so progress can be reported between seasons
+    summaries, rounds = [], []
+    for k, season in enumerate(seasons, start=1):
+        summary, season_rounds, _ = backtest_seasons(
+            [season], historical_teams, torvik, training, games, template,
+            tier_centers=tier_centers, n_jobs=1, cache_dir=paths.get('cache_dir')
+        )
+        summaries.append(summary)
+        rounds.append(season_rounds)
+        progress(k / len(seasons), f"Replayed {season}")
+
+    return {
+        'summary': pd.concat(summaries, ignore_index=True).to_dict('records'),
+        'rounds': pd.concat(rounds, ignore_index=True).to_dict('records'),
+    }
+
+
+def run_retrain(params, paths, progress):
+    """Retrain the matchup models with women_train_matchup_models.py"""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'women_train_matchup_models.py')
+    command = [sys.executable, script]
+    if params.get('search'):
+        command += ['--search', '--trials', str(int(params.get('trials', 50)))]
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               text=True, bufsize=1)
+    log = []
+    for line in process.stdout:
+        line = line.rstrip()
+        log.append(line)
+        if line.startswith('STEP') or line.startswith('✓'):
+            progress(None, line)
+    if process.wait() != 0:
+        raise RuntimeError('\n'.join(log[-20:]))
+    return {'log': log[-50:]}
+
+
+JOB_TYPES = {
+    'simulate': run_simulation,
+    'backtest': run_backtest,
+    'retrain': run_retrain,
+}
+
+
+# ----------------------------------------------------------------------
+# Job directory files
+# ----------------------------------------------------------------------
+def _json_default(value):
+    # NumPy scalars from pandas results
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+def _write_json(path, data):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, default=_json_default)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _update_status(job_dir, **changes):
+    status_path = os.path.join(job_dir, 'status.json')
+    status = _read_json(status_path)
+    status.update(changes, updated=time.time())
+    _write_json(status_path, status)
+    return status
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _acquire_slot(storage_dir, max_running, interval=0.5):
+    """
+    Block until one of the max_running shared running slots is free
+
+    Returns:
+        file: Open slot lock file, released when closed or when the process
+            exits (None without fcntl, where the limit is per web worker)
+    """
+    if fcntl is None:
+        return None
+    slots_dir = os.path.join(storage_dir, '.slots')
+    os.makedirs(slots_dir, exist_ok=True)
+    while True:
+        for k in range(max_running):
+            slot = open(os.path.join(slots_dir, f'{k}.lock'), 'w')
+            try:
+                fcntl.flock(slot, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return slot
+            except BlockingIOError:
+                slot.close()
+        time.sleep(interval)
+
+
+def _execute_job(job_dir, job_type, params, paths, max_running):
+    """Pool entry point: run one job and record progress and outcome"""
+    slot = _acquire_slot(os.path.dirname(job_dir), max_running)
+    _update_status(job_dir, state=RUNNING, started=time.time(), pid=os.getpid())
+    last_write = [0.0]
+
+    def progress(fraction=None, message=None):
+        # Throttle status writes; clients poll at most a few times a second
+        now = time.time()
+        if now - last_write[0] >= 0.2 or fraction == 1:
+            last_write[0] = now
+            changes = {} if fraction is None else {'progress': round(float(fraction), 4)}
+            if message is not None:
+                changes['message'] = message
+            _update_status(job_dir, **changes)
+
+    try:
+        result = JOB_TYPES[job_type](params, paths, progress)
+        _write_json(os.path.join(job_dir, 'result.json'), result)
+        _update_status(job_dir, state=DONE, progress=1.0, finished=time.time())
+    except Exception as e:
+        _update_status(job_dir, state=FAILED, finished=time.time(),
+                       error=f"{type(e).__name__}: {e}",
+                       traceback=traceback.format_exc(limit=5))
+    finally:
+        if slot is not None:
+            slot.close()
+
+
+class JobManager:
+    """
+    Submit, track and stream background jobs
+
+    At most max_workers jobs run at once and at most max_queued wait, over
+    all web workers sharing the job directory; further submissions are
+    refused until the queue drains.
+    """
+
+    def __init__(self, storage_dir, paths, data_files=(), max_workers=2, max_queued=20):
+        """
+        Args:
+            storage_dir: Directory holding one subdirectory per job
+            paths: Dict of directories handed to jobs (data_dir, models_dir,
+                cache_dir)
+            data_files: Input files whose contents are part of every job id,
+                so results are recomputed when the data changes
+            max_workers: Jobs running at the same time
+            max_queued: Jobs allowed to wait for a running slot
+        """
+        self.storage_dir = storage_dir
+        self.paths = {k: str(v) for k, v in paths.items()}
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        os.makedirs(storage_dir, exist_ok=True)
+
+        digest = hashlib.sha256()
+        for path in data_files:
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        self.data_version = digest.hexdigest()[:16]
+
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _job_dir(self, job_id):
+        if not JOB_ID_PATTERN.match(job_id):
+            raise FileNotFoundError(job_id)
+        return os.path.join(self.storage_dir, job_id)
+
+    def job_id(self, job_type, params):
+        """Id of a job: hash of its type, parameters and input data version"""
+        key = json.dumps({'type': job_type, 'params': params, 'data': self.data_version},
+                         sort_keys=True, default=str)
+        return hashlib.sha256(key.encode()).hexdigest()[:24]
+
+    def submit(self, job_type, params=None):
+        """
+        Queue a job unless the same job already exists
+
+        Args:
+            job_type: Key of JOB_TYPES
+            params: JSON-serializable job parameters
+
+        Returns:
+            tuple: (job status dict, True if the job was newly queued)
+
+        Raises:
+            KeyError: For unknown job types
+            RuntimeError: If the queue is full
+        """
+        if job_type not in JOB_TYPES:
+            raise KeyError(f"Unknown job type '{job_type}'")
+        params = params or {}
+        job_id = self.job_id(job_type, params)
+        job_dir = self._job_dir(job_id)
+
+        existing = self.status(job_id)
+        if existing is not None and existing['state'] != FAILED and not self._is_stale(existing):
+            return existing, False
+
+        with self._submitting():
+            # Read again under the lock: another web worker may have requeued it
+            existing = self.status(job_id)
+            if existing is not None and existing['state'] != FAILED and not self._is_stale(existing):
+                return existing, False
+            if self.active_jobs() >= self.max_workers + self.max_queued:
+                raise RuntimeError("Job queue is full, try again later")
+            try:
+                # mkdir is atomic: one submitter claims a new job even across web workers
+                os.mkdir(job_dir)
+            except FileExistsError:
+                if existing is None:
+                    # Claimed by another web worker an instant ago
+                    return self.status(job_id) or {'id': job_id, 'state': QUEUED}, False
+            status = {
+                'id': job_id, 'type': job_type, 'params': params, 'state': QUEUED,
+                'progress': 0.0, 'message': None, 'error': None,
+                'created': time.time(), 'started': None, 'finished': None,
+                'owner': os.getpid(),
+            }
+            _write_json(os.path.join(job_dir, 'status.json'), dict(status, updated=time.time()))
+            result_path = os.path.join(job_dir, 'result.json')
+            if os.path.exists(result_path):
+                os.remove(result_path)
+
+            if self._pool is None:
+                # Spawned (not forked) workers: the web server has threads running
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            future = self._pool.submit(_execute_job, job_dir, job_type, params, self.paths,
+                                       self.max_workers)
+            future.add_done_callback(lambda f, job_id=job_id: self._finished(job_id, f))
+        return self.status(job_id), True
+
+    @contextlib.contextmanager
+    def _submitting(self):
+        # Thread lock plus a file lock, so web workers count and claim jobs
+        # one at a time
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.storage_dir, '.lock'), 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def active_jobs(self):
+        """Queued and running jobs of all web workers, from the job directory"""
+        count = 0
+        for name in os.listdir(self.storage_dir):
+            if JOB_ID_PATTERN.match(name):
+                status = self.status(name)
+                if status is not None and status['state'] in (QUEUED, RUNNING) and not self._is_stale(status):
+                    count += 1
+        return count
+
+    def _finished(self, job_id, future):
+        if not future.cancelled() and future.exception() is not None:
+            # The worker process died before it could record the outcome
+            _update_status(self._job_dir(job_id), state=FAILED, finished=time.time(),
+                           error=f"Worker failed: {future.exception()}")
+
+    def _is_stale(self, status):
+        """
+        A running job whose worker process no longer exists, or a queued job
+        whose web process (which owns the queue) no longer exists
+        """
+        if status['state'] == RUNNING and status.get('pid'):
+            return not _pid_alive(status['pid'])
+        if status['state'] == QUEUED:
+            return not status.get('owner') or not _pid_alive(status['owner'])
+        return False
+
+    def status(self, job_id):
+        """
+        Current status of a job, None if it does not exist
+        """
+        try:
+            return _read_json(os.path.join(self._job_dir(job_id), 'status.json'))
+        except (FileNotFoundError, json.JSONDecodeError, NotADirectoryError):
+            return None
+
+    def result(self, job_id):
+        """
+        Stored result of a finished job, None if there is none
+        """
+        try:
+            return _read_json(os.path.join(self._job_dir(job_id), 'result.json'))
+        except (FileNotFoundError, json.JSONDecodeError, NotADirectoryError):
+            return None
+
+    def events(self, job_id, interval=0.5, timeout=3600):
+        """
+        Server-Sent Events of a job's status until it finishes
+
+        Yields:
+            str: One 'status' event per change, ending with the final state
+        """
+        last = None
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            status = self.status(job_id)
+            if status is None:
+                return
+            if status.get('updated') != last:
+                last = status.get('updated')
+                status = {k: v for k, v in status.items() if k not in ('traceback', 'pid', 'owner')}
+                yield f"event: status\ndata: {json.dumps(status)}\n\n"
+            if status['state'] in (DONE, FAILED):
+                return
+            time.sleep(interval)
@@ -0,0 +1,221 @@
+"""
+Live advancement probabilities pushed as Server-Sent Events
+Every time results or the probability snapshot change, advancement
+probabilities are recomputed conditioned on the decided games and only the
+teams whose (rounded) probabilities moved are published. Each event is
+serialized once, as one JSON fragment per team, so any number of
+subscribers, with or without team filters, share that work.
+"""
+import json
+import threading
+from collections import deque
+
+import numpy as np
+
+from probabilities import ADVANCEMENT_COLUMNS, calculate_advancement_probabilities
+from scoring import NO_PICK
+from utils import TeamNameIndex
+
+
+def condition_on_results(layout, round_matrices, results):
+    """
+    Win probability matrices given the games already decided
+
+    A decided game's winner beats every possible opponent with probability
+    1, and so has won each earlier game on its way; later results override
+    inconsistent earlier ones.
+
+    Args:
+        layout: BracketLayout
+        round_matrices: Array (n_rounds, n_teams, n_teams) in layout team order
+        results: Result array (n_games,) with NO_PICK for undecided games
+
+    Returns:
+        ndarray: Conditioned copy of round_matrices
+    """
+    winners = np.array(results, dtype=int)
+    for g in np.argsort(-layout.round_idx, kind='stable'):
+        w = winners[g]
+        if w < 0 or layout.round_idx[g] == 0:
+            continue
+        for f in layout.feeders[g]:
+            if layout.eligible[f, w]:
+                winners[f] = w
+
+    conditioned = round_matrices.copy()
+    for g in np.flatnonzero(winners >= 0):
+        r, w, teams = layout.round_idx[g], winners[g], layout.game_teams[g]
+        opponents = teams[(round_matrices[r, w, teams] > 0) | (round_matrices[r, teams, w] > 0)]
+        conditioned[r, w, opponents] = 1.0
+        conditioned[r, opponents, w] = 0.0
+    return conditioned
+
+
+class ProbabilityFeed:
+    """
+    Current conditioned advancement probabilities plus a ring buffer of the
+    most recent change events for resuming clients
+    """
+
+    def __init__(self, layout, round_matrices, results=None, history=256, decimals=4):
+        """
+        Args:
+            layout: BracketLayout of the current bracket
+            round_matrices: Unconditioned win probability matrices in layout
+                team order
+            results: Optional result array to start from
+            history: Number of change events kept for resuming clients
+            decimals: Published precision; smaller changes are not published
+        """
+        self.layout = layout
+        self.names = TeamNameIndex(layout.teams)
+        self.decimals = decimals
+        self.round_matrices = round_matrices
+        self.results = np.full(len(layout), NO_PICK) if results is None else np.array(results)
+        self.probabilities = self._compute()
+        self.version = 0
+
+        self._events = deque(maxlen=history)
+        self._condition = threading.Condition()
+        self._listeners = []
+
+    def _compute(self):
+        matrices = condition_on_results(self.layout, self.round_matrices, self.results)
+        reach = calculate_advancement_probabilities(matrices)
+        return reach[1:].T.round(self.decimals)
+
+    def _fragments(self, positions):
+        # '"Team":[p1,...]' per team; events are assembled from these strings
+        return {int(t): f'{json.dumps(self.layout.teams[t])}:{json.dumps(self.probabilities[t].tolist())}'
+                for t in positions}
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+    def update(self, results=None, round_matrices=None, reason='results'):
+        """
+        Recompute probabilities and publish the teams that changed
+
+        Args:
+            results: New result array (unchanged if None)
+            round_matrices: New unconditioned matrices (unchanged if None)
+            reason: Label sent with the event
+
+        Returns:
+            int: Id of the published event, None if nothing changed
+        """
+        with self._condition:
+            if results is not None:
+                self.results = np.array(results)
+            if round_matrices is not None:
+                self.round_matrices = round_matrices
+            previous = self.probabilities
+            self.probabilities = self._compute()
+
+            changed = np.flatnonzero((self.probabilities != previous).any(axis=1))
+            if len(changed) == 0:
+                return None
+
+            self.version += 1
+            event_id = self.version
+            fragments = self._fragments(changed)
+            head = f'{{"id":{event_id},"reason":{json.dumps(reason)},"teams":{{'
+            self._events.append({
+                'id': event_id,
+                'head': head,
+                'fragments': fragments,
+                'message': self._message(event_id, 'delta', head + ','.join(fragments.values()) + '}}'),
+            })
+            self._condition.notify_all()
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            listener(event_id)
+        return event_id
+
+    def add_listener(self, callback):
+        """Call callback(event_id) after every published event"""
+        self._listeners.append(callback)
+
+    # ------------------------------------------------------------------
+    # Subscribing
+    # ------------------------------------------------------------------
+    def team_positions(self, teams):
+        """
+        Set of layout positions for a team filter
+
+        Raises:
+            KeyError: For names that do not resolve (with suggestions)
+        """
+        return set(self.names.positions(teams).tolist())
+
+    @staticmethod
+    def _message(event_id, event, data):
+        return f'id: {event_id}\nevent: {event}\ndata: {data}\n\n'
+
+    def snapshot(self, positions=None):
+        """
+        Full 'snapshot' event for the given team positions (all if None)
+        """
+        with self._condition:
+            positions = range(len(self.layout.teams)) if positions is None else positions
+            fragments = self._fragments(positions)
+            data = (f'{{"id":{self.version},"columns":{json.dumps(ADVANCEMENT_COLUMNS)},'
+                    f'"teams":{{{",".join(fragments.values())}}}}}')
+            return self._message(self.version, 'snapshot', data)
+
+    def events_since(self, last_id, positions=None):
+        """
+        Messages a client that has seen last_id still needs
+
+        Args:
+            last_id: Last event id the client received (None for a new client)
+            positions: Optional set of team positions the client follows
+
+        Returns:
+            tuple: (list of SSE messages, id of the last event included)
+        """
+        with self._condition:
+            version = self.version
+            oldest = self._events[0]['id'] if self._events else version + 1
+            if last_id is None or last_id > version or last_id < oldest - 1:
+                # New client, or too far behind to replay
+                return [self.snapshot(positions)], version
+
+            messages = []
+            for event in self._events:
+                if event['id'] <= last_id:
+                    continue
+                if positions is None:
+                    messages.append(event['message'])
+                    continue
+                followed = [fragment for t, fragment in event['fragments'].items() if t in positions]
+                if followed:
+                    messages.append(self._message(event['id'], 'delta',
+                                                  event['head'] + ','.join(followed) + '}}'))
+            return messages, version
+
+    def wait(self, last_id, timeout):
+        """Block until an event newer than last_id exists or timeout passes"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.version > last_id, timeout=timeout)
+
+    def subscribe(self, last_id=None, positions=None, heartbeat=15.0):
+        """
+        Endless SSE stream: snapshot or replay first, then live deltas
+
+        Args:
+            last_id: Last event id the client received (Last-Event-ID)
+            positions: Optional set of team positions to follow
+            heartbeat: Seconds between keep-alive comments
+
+        Yields:
+            str: SSE messages
+        """
+        yield 'retry: 3000\n\n'
+        while True:
+            messages, last_id = self.events_since(last_id, positions)
+            yield from messages
+            self.wait(last_id, heartbeat)
+            if self.version == last_id:
+                yield ': keep-alive\n\n'
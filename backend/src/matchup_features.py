@@ -0,0 +1,195 @@
+"""
+Matchup feature construction shared by the current and historical matchup builders
+Creates differentials between team and opponent stats
+"""
+import pandas as pd
+
+
+# Stats used to build matchup differentials
+STAT_COLS = ['wab', 'barthag', 'adj_oe', 'adj_de', 'efg_pct', 'efgd_pct',
+             'tor', 'tord', 'orb_pct', 'drb_pct', 'ftr', 'ftrd', '2p_pct', '2pd_pct',
+             '3p_pct', '3pd_pct', '3pr', '3prd', 'adj_tempo']
+
+# Defensive stat -> value it is subtracted from (lower is better -> higher is better)
+DEFENSIVE_INVERSIONS = {
+    'adj_de': 200,
+    'efgd_pct': 100,
+    'tord': 100,
+    'drb_pct': 100,
+    'ftrd': 100,
+    '2pd_pct': 100,
+    '3pd_pct': 100,
+    '3prd': 100,
+}
+
+# Matchup feature -> (team stat, opponent stat); offense is measured against
+# the opponent's matching (inverted) defense and vice versa
+DIFFERENTIALS = {
+    'wab': ('wab', 'wab'),
+    'barthag': ('barthag', 'barthag'),
+    'adj_oe': ('adj_oe', 'adj_de'),
+    'adj_de': ('adj_de', 'adj_oe'),
+    'efg_pct': ('efg_pct', 'efgd_pct'),
+    'efgd_pct': ('efgd_pct', 'efg_pct'),
+    'tor': ('tor', 'tord'),
+    'tord': ('tord', 'tor'),
+    'orb_pct': ('orb_pct', 'drb_pct'),
+    'drb_pct': ('drb_pct', 'orb_pct'),
+    'ftr': ('ftr', 'ftrd'),
+    'ftrd': ('ftrd', 'ftr'),
+    '2p_pct': ('2p_pct', '2pd_pct'),
+    '2pd_pct': ('2pd_pct', '2p_pct'),
+    '3p_pct': ('3p_pct', '3pd_pct'),
+    '3pd_pct': ('3pd_pct', '3p_pct'),
+    '3pr': ('3pr', '3prd'),
+    '3prd': ('3prd', '3pr'),
+    'adj_tempo': ('adj_tempo', 'adj_tempo'),
+}
+
+
+def invert_defensive_stats(team_stats):
+    """
+    Invert defensive stats so that higher is better for every stat
+
+    Args:
+        team_stats: DataFrame with raw team statistics
+
+    Returns:
+        DataFrame: Copy with defensive stats inverted
+    """
+    df = team_stats.copy()
+    for col, base in DEFENSIVE_INVERSIONS.items():
+        df[col] = base - df[col]
+    return df
+
+
+def calculate_differentials(team_stats, opp_stats):
+    """
+    Calculate matchup differentials between row-aligned team and opponent stats
+
+    Args:
+        team_stats: DataFrame of (inverted) stats for the team side
+        opp_stats: DataFrame of (inverted) stats for the opponent side, with
+            one row per row of team_stats
+
+    Returns:
+        DataFrame: One column per matchup feature, indexed like team_stats
+    """
+    team_values = team_stats.reset_index(drop=True)
+    opp_values = opp_stats.reset_index(drop=True)
+
+    diffs = pd.DataFrame({
+        feature: team_values[team_col] - opp_values[opp_col]
+        for feature, (team_col, opp_col) in DIFFERENTIALS.items()
+    })
+    diffs.index = team_stats.index
+    return diffs
+
+
+# Identifying columns of women_matchups_training.csv (features follow)
+TRAINING_ID_COLS = ['year', 'region', 'round', 'high_bracket_seed', 'high_team_id',
+                    'low_bracket_seed', 'low_team_id', 'win']
+
+
+def build_game_matchups(games, torvik_ids, torvik_stats):
+    """
+    Build training matchups (both orientations) for historical games
+
+    Games are normally listed once per side in women_games_historical.csv and
+    those rows are used as-is; for games with only one side present, the
+    mirrored orientation is generated so every game appears twice.
+
+    Args:
+        games: Game records (women_games_historical.csv layout)
+        torvik_ids: Series mapping team_id -> torvik_id
+        torvik_stats: Inverted Torvik stats indexed by torvik_id
+
+    Returns:
+        DataFrame: Matchups in women_matchups_training.csv layout
+    """
+    sides = games.groupby(['year', 'id'])['id'].transform('size')
+    single_sided = games.loc[sides == 1, TRAINING_ID_COLS]
+
+    mirrored = single_sided.rename(columns={
+        'high_bracket_seed': 'low_bracket_seed', 'low_bracket_seed': 'high_bracket_seed',
+        'high_team_id': 'low_team_id', 'low_team_id': 'high_team_id',
+    })[TRAINING_ID_COLS]
+    mirrored['win'] = 1 - mirrored['win']
+
+    matchups = pd.concat([games[TRAINING_ID_COLS], mirrored]).reset_index(drop=True)
+
+    # Indexed joins: team_id -> torvik_id -> stats
+    team_ids = pd.Index(matchups['high_team_id']).append(pd.Index(matchups['low_team_id']))
+    unknown = sorted(set(team_ids) - set(torvik_ids.index))
+    if unknown:
+        raise ValueError(f"No torvik_id for {len(unknown)} teams: {unknown[:10]}")
+
+    stat_ids = pd.Index(torvik_ids.loc[team_ids])
+    missing = sorted(set(stat_ids) - set(torvik_stats.index))
+    if missing:
+        raise ValueError(f"Torvik stats missing for {len(missing)} teams: {missing[:10]}")
+
+    stats = torvik_stats.loc[stat_ids, STAT_COLS]
+    team_side = stats.iloc[:len(matchups)]
+    opp_side = stats.iloc[len(matchups):]
+    diffs = calculate_differentials(team_side, opp_side).set_axis(matchups.index)
+
+    return pd.concat([matchups, diffs], axis=1)
+
+
+# Rounds of women_matchups_training.csv in tournament order
+TRAINING_ROUNDS = ['First Round', 'Second Round', 'Sweet 16', 'Elite Eight', 'Final Four', 'Championship']
+
+
+def sort_training_matchups(matchups):
+    """
+    Put training matchups in their canonical row order
+
+    Rows are ordered by season, round, region, then the teams and orientation
+    of the game, so the same games give the same rows in the same order (and
+    so the same seeded train/test split) however the file was built.
+
+    Args:
+        matchups: Matchups in women_matchups_training.csv layout
+
+    Returns:
+        DataFrame: matchups sorted, with a fresh index
+    """
+    def order(col):
+        return col.map({name: k for k, name in enumerate(TRAINING_ROUNDS)}) if col.name == 'round' else col
+
+    return matchups.sort_values(TRAINING_ID_COLS, key=order, kind='stable').reset_index(drop=True)
+
+
+# Identifying columns of women_matchups_current.csv (features follow)
+TEMPLATE_ID_COLS = ['game_id', 'round', 'team_region', 'team_seed', 'team',
+                    'opp_region', 'opp_seed', 'opponent']
+
+
+def build_template_matchups(template, team_stats):
+    """
+    Fill a bracket template with team names and matchup differentials
+
+    Args:
+        template: Bracket template (bracket_template.csv layout)
+        team_stats: Inverted team stats with team, region and seed columns
+
+    Returns:
+        DataFrame: Matchups in women_matchups_current.csv layout
+    """
+    seeded = team_stats.dropna(subset=['region', 'seed'])
+    teams_by_slot = seeded.set_index(['region', 'seed'])['team']
+    stats_by_team = team_stats.set_index('team')[STAT_COLS]
+
+    matchups = template[['game_id', 'round', 'team_region', 'team_seed',
+                         'opp_region', 'opp_seed']].copy()
+    team_keys = pd.MultiIndex.from_arrays([matchups['team_region'], matchups['team_seed']])
+    opp_keys = pd.MultiIndex.from_arrays([matchups['opp_region'], matchups['opp_seed']])
+    matchups['team'] = teams_by_slot.reindex(team_keys).to_numpy()
+    matchups['opponent'] = teams_by_slot.reindex(opp_keys).to_numpy()
+
+    team_side = stats_by_team.reindex(matchups['team'])
+    opp_side = stats_by_team.reindex(matchups['opponent'])
+    diffs = calculate_differentials(team_side, opp_side).set_axis(matchups.index)
+
+    return pd.concat([matchups[TEMPLATE_ID_COLS], diffs], axis=1)
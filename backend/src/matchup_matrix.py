@@ -0,0 +1,208 @@
+"""
+Dense head-to-head win probability matrices for the current bracket
+- One team x team matrix per round family (early / elite rounds)
+- Filled from women_matchups_with_probs.csv at load time
+- Pairs the bracket never produces are predicted on demand and memoized
+"""
+import os
+import threading
+import joblib
+import numpy as np
+import pandas as pd
+
+from matchup_features import STAT_COLS, invert_defensive_stats, calculate_differentials
+from matchup_models import (EARLY_FEATURES, ELITE_FEATURES,
+                            BRACKET_EARLY_ROUNDS, BRACKET_ELITE_ROUNDS)
+from probabilities import rating_win_probability
+from utils import TeamNameIndex
+
+
+# Round family -> bracket rounds it covers
+ROUND_FAMILIES = {
+    'early': BRACKET_EARLY_ROUNDS,
+    'elite': BRACKET_ELITE_ROUNDS,
+}
+
+# Round family -> (model file, features)
+FAMILY_MODELS = {
+    'early': ('womens_early_rounds.joblib', EARLY_FEATURES),
+    'elite': ('womens_elite_rounds.joblib', ELITE_FEATURES),
+}
+
+
+class MatchupMatrix:
+    """
+    Team x team win probability matrices, one per round family
+
+    Entry [i, j] of a family's matrix is the probability that team i beats
+    team j in that family's rounds. Teams are ordered by region then seed.
+    Missing pairs are NaN until requested; if team stats are available they
+    are then predicted with the family's model (or the log5 rating model
+    when no model is loaded) and stored in place.
+    """
+
+    def __init__(self, matchups, team_stats=None, models=None):
+        """
+        Args:
+            matchups: Matchups with win_prob (women_matchups_with_probs.csv layout)
+            team_stats: Optional inverted team stats with a team column, used
+                to predict pairs missing from matchups
+            models: Optional dict of round family -> fitted matchup model
+        """
+        slots = (matchups[['team', 'team_region', 'team_seed']]
+                 .drop_duplicates('team')
+                 .sort_values(['team_region', 'team_seed'], kind='stable'))
+        self.teams = pd.Index(slots['team'])
+        self.regions = slots['team_region'].to_numpy()
+        self.seeds = slots['team_seed'].to_numpy()
+        self._names = TeamNameIndex(self.teams)
+
+        n = len(self.teams)
+        i = self.teams.get_indexer(matchups['team'])
+        j = self.teams.get_indexer(matchups['opponent'])
+        probs = matchups['win_prob'].to_numpy(dtype=float)
+
+        self.matrices = {}
+        for family, rounds in ROUND_FAMILIES.items():
+            matrix = np.full((n, n), np.nan)
+            np.fill_diagonal(matrix, 0.5)
+            mask = matchups['round'].isin(rounds).to_numpy() & (j >= 0)
+            matrix[i[mask], j[mask]] = probs[mask]
+            self.matrices[family] = matrix
+
+        self.stats = None
+        # Teams with complete stats; pairs with any other team stay NaN, and
+        # requests for them don't go back to the model
+        self._predictable = np.zeros(n, dtype=bool)
+        if team_stats is not None:
+            self.stats = team_stats.set_index('team')[STAT_COLS].reindex(self.teams)
+            self._predictable = self.stats.notna().all(axis=1).to_numpy()
+        self.models = models or {}
+        self.n_inferred = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_files(cls, data_dir, models_dir=None):
+        """
+        Build the matrices from the pipeline's output files
+
+        Args:
+            data_dir: Directory with women_matchups_with_probs.csv and
+                women_teams_enriched.csv
+            models_dir: Optional directory with the trained matchup models
+
+        Returns:
+            MatchupMatrix: Loaded matrices
+        """
+        matchups = pd.read_csv(os.path.join(data_dir, 'women_matchups_with_probs.csv'))
+
+        stats_path = os.path.join(data_dir, 'women_teams_enriched.csv')
+        team_stats = None
+        if os.path.exists(stats_path):
+            team_stats = invert_defensive_stats(pd.read_csv(stats_path))
+
+        models = {}
+        if models_dir is not None:
+            for family, (filename, _) in FAMILY_MODELS.items():
+                model_path = os.path.join(models_dir, filename)
+                if os.path.exists(model_path):
+                    models[family] = joblib.load(model_path)
+
+        return cls(matchups, team_stats, models)
+
+    def select(self, teams=None, seed_range=None, regions=None):
+        """
+        Positions of teams matching all given filters, in matrix order
+
+        Args:
+            teams: Optional list of team names (any spelling TeamNameIndex resolves)
+            seed_range: Optional (min_seed, max_seed) tuple
+            regions: Optional list of regions
+
+        Returns:
+            ndarray: Matrix positions
+
+        Raises:
+            KeyError: If a requested team is not in the bracket
+        """
+        mask = np.ones(len(self.teams), dtype=bool)
+        if teams is not None:
+            positions = self._names.positions(teams)
+            team_mask = np.zeros(len(self.teams), dtype=bool)
+            team_mask[positions] = True
+            mask &= team_mask
+        if seed_range is not None:
+            mask &= (self.seeds >= seed_range[0]) & (self.seeds <= seed_range[1])
+        if regions is not None:
+            mask &= np.isin(self.regions, list(regions))
+        return np.flatnonzero(mask)
+
+    def submatrix(self, positions, family='elite'):
+        """
+        Win probabilities among the teams at the given positions
+
+        Args:
+            positions: Matrix positions (e.g. from select)
+            family: Round family ('early' or 'elite')
+
+        Returns:
+            ndarray: Square matrix; NaN where a pair cannot be predicted
+        """
+        matrix = self.matrices[family]
+        block = np.ix_(positions, positions)
+        predictable = self._predictable[positions]
+        if (np.isnan(matrix[block]) & predictable[:, None] & predictable[None, :]).any():
+            self._fill_missing(family, positions)
+        return matrix[block].copy()
+
+    def probability(self, team, opponent, family='elite'):
+        """
+        Probability that team beats opponent in the given round family
+
+        Returns:
+            float: Win probability (NaN if it cannot be predicted)
+        """
+        positions = np.concatenate([self.select(teams=[team]), self.select(teams=[opponent])])
+        return float(self.submatrix(positions, family)[0, 1])
+
+    def _fill_missing(self, family, positions):
+        """
+        Predict and memoize the missing pairs within positions
+
+        Both orientations are predicted and normalized to sum to 1, the same
+        way the pipeline treats template matchups.
+        """
+        if self.stats is None:
+            return
+        model = self.models.get(family)
+
+        with self._lock:
+            matrix = self.matrices[family]
+            sub = matrix[np.ix_(positions, positions)]
+            a, b = np.nonzero(np.triu(np.isnan(sub) | np.isnan(sub.T), k=1))
+            i, j = positions[a], positions[b]
+            if len(i) == 0:
+                return
+
+            valid = self._predictable[i] & self._predictable[j]
+            i, j = i[valid], j[valid]
+            if len(i) == 0:
+                return
+
+            team_side = self.stats.iloc[np.concatenate([i, j])]
+            opp_side = self.stats.iloc[np.concatenate([j, i])]
+            if model is not None:
+                X = calculate_differentials(team_side, opp_side)[FAMILY_MODELS[family][1]]
+                raw = model.predict_proba(X)[:, 1]
+            else:
+                # barthag is not inverted, so log5 works on these stats directly
+                raw = rating_win_probability(team_side['barthag'], opp_side['barthag'])
+
+            forward, reverse = raw[:len(i)], raw[len(i):]
+            total = forward + reverse
+            with np.errstate(invalid='ignore', divide='ignore'):
+                p = np.where(total > 0, forward / total, 0.5)
+
+            matrix[i, j] = p
+            matrix[j, i] = 1 - p
+            self.n_inferred += len(i)
@@ -0,0 +1,277 @@
+"""
+Matchup model definitions shared by training, validation and inference
+- Logistic Regression for early rounds
+- XGBoost for elite rounds
+"""
+import json
+import os
+import numpy as np
+import pandas as pd
+from joblib import Memory, Parallel, delayed
+from sklearn.linear_model import LogisticRegression
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.metrics import accuracy_score, roc_auc_score, brier_score_loss, log_loss
+from xgboost import XGBClassifier
+
+
+# Features for each model
+EARLY_FEATURES = ['barthag', 'adj_oe', 'adj_de', 'orb_pct', 'drb_pct', 'ftr', '2p_pct']
+ELITE_FEATURES = ['wab', 'barthag', 'adj_oe', 'adj_de', 'efg_pct', 'efgd_pct',
+                  'orb_pct', 'drb_pct', '2p_pct', '2pd_pct', '3p_pct', '3pd_pct', '3pr']
+
+# Round names in historical training data
+EARLY_ROUNDS = ['First Round', 'Second Round']
+ELITE_ROUNDS = ['Sweet 16', 'Elite Eight', 'Final Four', 'Championship']
+
+# Round names in bracket_template.csv / current matchups
+BRACKET_EARLY_ROUNDS = ['Round 1', 'Round 2']
+BRACKET_ELITE_ROUNDS = ['Sweet 16', 'Elite Eight', 'Final Four', 'Championship']
+
+# Elite rounds XGBoost parameters (from offline tuning notebook)
+ELITE_PARAMS = {
+    'learning_rate': 0.2997738363859162,
+    'max_depth': 9,
+    'min_child_weight': 8.623522034407337,
+    'subsample': 0.8324211691115178,
+    'colsample_bytree': 0.9988769480719698,
+    'gamma': 2.017715776385069,
+    'reg_alpha': 0.9692563913308194,
+    'reg_lambda': 2.5910989850621258,
+    'n_estimators': 335,
+}
+
+# Winning search configuration, saved next to womens_elite_rounds.joblib
+ELITE_PARAMS_FILE = 'womens_elite_rounds_params.json'
+
+
+def load_elite_params(models_dir):
+    """
+    Load tuned elite model parameters if a search result exists
+
+    Args:
+        models_dir: Directory containing trained models
+
+    Returns:
+        dict: XGBoost parameters (ELITE_PARAMS when no search has been run)
+    """
+    params_path = os.path.join(models_dir, ELITE_PARAMS_FILE)
+    if not os.path.exists(params_path):
+        return dict(ELITE_PARAMS)
+
+    with open(params_path) as f:
+        return json.load(f)['params']
+
+
+def build_early_model():
+    """
+    Create an unfitted early rounds model
+
+    Returns:
+        LogisticRegression: Base early rounds classifier
+    """
+    return LogisticRegression(random_state=42, max_iter=1000)
+
+
+def build_elite_model(params=None):
+    """
+    Create an unfitted elite rounds model
+
+    Args:
+        params: Optional XGBoost parameters (defaults to ELITE_PARAMS)
+
+    Returns:
+        XGBClassifier: Base elite rounds classifier
+    """
+    params = ELITE_PARAMS if params is None else params
+    return XGBClassifier(**params, random_state=42, eval_metric='logloss')
+
+
+# Model name -> (features, training rounds)
+MODEL_SPECS = {
+    'early': (EARLY_FEATURES, EARLY_ROUNDS),
+    'elite': (ELITE_FEATURES, ELITE_ROUNDS),
+}
+
+
+def evaluate_predictions(y_true, y_prob):
+    """
+    Calculate standard metrics for predicted win probabilities
+
+    Args:
+        y_true: Array of actual outcomes (0/1)
+        y_prob: Array of predicted win probabilities
+
+    Returns:
+        dict: accuracy, roc_auc, brier and log_loss (roc_auc is NaN when
+            only one outcome is present)
+    """
+    y_true = np.asarray(y_true)
+    y_prob = np.asarray(y_prob)
+
+    return {
+        'accuracy': accuracy_score(y_true, (y_prob >= 0.5).astype(int)),
+        'roc_auc': roc_auc_score(y_true, y_prob) if len(np.unique(y_true)) > 1 else np.nan,
+        'brier': brier_score_loss(y_true, y_prob),
+        'log_loss': log_loss(y_true, y_prob, labels=[0, 1]),
+    }
+
+
+def fit_calibrated_model(model_name, X, y, params=None, cv=3):
+    """
+    Fit a Platt-scaled matchup model using internal cross-validation
+
+    Calibration folds come from the training data itself, so no held-out
+    rows are needed for calibration.
+
+    Args:
+        model_name: 'early' or 'elite'
+        X: Feature DataFrame
+        y: Target array
+        params: Optional elite model parameters
+        cv: Number of calibration folds
+
+    Returns:
+        CalibratedClassifierCV: Fitted calibrated model
+    """
+    if model_name == 'elite':
+        base_model = build_elite_model(params)
+    else:
+        base_model = build_early_model()
+
+    model = CalibratedClassifierCV(base_model, method='sigmoid', cv=cv)
+    model.fit(X, y)
+    return model
+
+
+def _run_season_fold(model_name, season, X_train, y_train, X_test, y_test, params):
+    """
+    Train on all other seasons and predict the held-out season
+
+    Returns:
+        DataFrame: Held-out outcomes and predicted probabilities
+    """
+    model = fit_calibrated_model(model_name, X_train, y_train, params)
+
+    return pd.DataFrame({
+        'model': model_name,
+        'season': season,
+        'win': np.asarray(y_test),
+        'win_prob': model.predict_proba(X_test)[:, 1],
+    })
+
+
+def season_cross_validate(df, model_names=('early', 'elite'), elite_params=None,
+                          n_jobs=-1, cache_dir=None):
+    """
+    Leave-one-season-out cross-validation for the matchup models
+
+    Every (model, season) fold runs as an independent task on a joblib
+    process pool. When cache_dir is given, fold results are memoized on the
+    fold's training/test data and parameters, so unchanged folds are skipped
+    on later runs.
+
+    Args:
+        df: Training matchups (women_matchups_training.csv layout)
+        model_names: Models to validate ('early', 'elite')
+        elite_params: Optional elite model parameters (defaults to ELITE_PARAMS)
+        n_jobs: Number of worker processes (-1 uses all cores)
+        cache_dir: Optional directory for the fold result cache
+
+    Returns:
+        tuple: (report DataFrame with one row per model/season plus an 'all'
+            row per model, number of folds served from cache)
+    """
+    memory = Memory(cache_dir, verbose=0)
+    run_fold = memory.cache(_run_season_fold)
+
+    tasks = []
+    for model_name in model_names:
+        features, rounds = MODEL_SPECS[model_name]
+        params = (elite_params or ELITE_PARAMS) if model_name == 'elite' else None
+        model_df = df[df['round'].isin(rounds)]
+
+        for season in sorted(model_df['year'].unique()):
+            train = model_df[model_df['year'] != season]
+            test = model_df[model_df['year'] == season]
+            tasks.append((model_name, int(season), train[features], train['win'],
+                          test[features], test['win'], params))
+
+    n_cached = 0
+    if cache_dir is not None:
+        n_cached = sum(run_fold.check_call_in_cache(*task) for task in tasks)
+
+    fold_results = Parallel(n_jobs=n_jobs)(delayed(run_fold)(*task) for task in tasks)
+    predictions = pd.concat(fold_results, ignore_index=True)
+
+    rows = []
+    for model_name, model_preds in predictions.groupby('model', sort=False):
+        for season, season_preds in model_preds.groupby('season'):
+            rows.append({'model': model_name, 'season': str(season), 'games': len(season_preds),
+                         **evaluate_predictions(season_preds['win'], season_preds['win_prob'])})
+        rows.append({'model': model_name, 'season': 'all', 'games': len(model_preds),
+                     **evaluate_predictions(model_preds['win'], model_preds['win_prob'])})
+
+    return pd.DataFrame(rows), n_cached
+
+
+def _bootstrap_replica(replica, training, game_rows, X_early, X_elite, elite_params, seed):
+    """
+    Fit both matchup models on one bootstrap resample and predict the bracket
+
+    Returns:
+        tuple: (early round raw probabilities, elite round raw probabilities)
+    """
+    rng = np.random.RandomState(seed + replica)
+    picks = rng.randint(0, len(game_rows), size=len(game_rows))
+    sample = training.iloc[np.concatenate([game_rows[g] for g in picks])]
+
+    early = sample[sample['round'].isin(EARLY_ROUNDS)]
+    elite = sample[sample['round'].isin(ELITE_ROUNDS)]
+    early_model = fit_calibrated_model('early', early[EARLY_FEATURES], early['win'])
+    elite_model = fit_calibrated_model('elite', elite[ELITE_FEATURES], elite['win'], elite_params)
+
+    return early_model.predict_proba(X_early)[:, 1], elite_model.predict_proba(X_elite)[:, 1]
+
+
+def bootstrap_matchup_probabilities(training, matchups, n_replicas=50, elite_params=None,
+                                    n_jobs=-1, seed=42):
+    """
+    Raw win probabilities from an ensemble of bootstrap-trained matchup models
+
+    Each replica resamples historical games with replacement, fits both
+    models and predicts every bracket matchup inside its worker, so only
+    the probability vectors come back from the process pool.
+
+    Args:
+        training: Training matchups (women_matchups_training.csv layout)
+        matchups: Bracket matchups (women_matchups_current.csv layout)
+        n_replicas: Number of bootstrap replicas
+        elite_params: Optional elite model parameters
+        n_jobs: Number of worker processes (-1 uses all cores)
+        seed: Base random seed (replica b uses seed + b)
+
+    Returns:
+        ndarray: Shape (n_replicas, len(matchups)) of raw win probabilities
+    """
+    training = training.reset_index(drop=True)
+    low = training[['high_team_id', 'low_team_id']].min(axis=1)
+    high = training[['high_team_id', 'low_team_id']].max(axis=1)
+    games = training['year'].astype(str) + '|' + low + '|' + high
+    # Whole games (both orientations) are resampled together
+    game_rows = list(training.groupby(games.to_numpy(), sort=True).indices.values())
+
+    early_mask = matchups['round'].isin(BRACKET_EARLY_ROUNDS).to_numpy()
+    elite_mask = matchups['round'].isin(BRACKET_ELITE_ROUNDS).to_numpy()
+    X_early = matchups.loc[early_mask, EARLY_FEATURES]
+    X_elite = matchups.loc[elite_mask, ELITE_FEATURES]
+
+    replicas = Parallel(n_jobs=n_jobs)(
+        delayed(_bootstrap_replica)(b, training, game_rows, X_early, X_elite, elite_params, seed)
+        for b in range(n_replicas)
+    )
+
+    raw = np.zeros((n_replicas, len(matchups)))
+    for b, (early_probs, elite_probs) in enumerate(replicas):
+        raw[b, early_mask] = early_probs
+        raw[b, elite_mask] = elite_probs
+    return raw
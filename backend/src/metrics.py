@@ -0,0 +1,151 @@
+"""
+In-process metrics in Prometheus text format
+Counters, gauges and fixed-bucket histograms keyed by metric name and a
+label tuple. Recording a value is a dict lookup and a few additions under
+one lock, cheap enough for every request. Each process keeps its own
+values, so under several gunicorn workers every scrape sees one worker.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# name -> (type, help)
+METRICS = {
+    'api_requests_total': ('counter', 'Requests by route, method and status'),
+    'api_request_errors_total': ('counter', 'Requests that raised or returned a 5xx status'),
+    'api_request_duration_seconds': ('histogram', 'Request latency inside the app'),
+    'api_response_size_bytes': ('histogram', 'Response body size as sent (after compression)'),
+    'api_requests_in_flight': ('gauge', 'Requests currently being handled'),
+    'api_stage_duration_seconds': ('histogram', 'Time spent in a stage of request handling'),
+    'cache_requests_total': ('counter', 'Cache lookups by cache and result (hit or miss)'),
+    'api_response_cache_entries': ('gauge', 'Responses held in the response cache'),
+    'api_response_cache_bytes': ('gauge', 'Bytes held in the response cache (all encodings)'),
+    'startup_stage_duration_seconds': ('gauge', 'Duration of each data load and index build stage'),
+    'process_start_time_seconds': ('gauge', 'Start time of the process since the epoch'),
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a running sum"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+def _labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class MetricsRegistry:
+    """
+    All metrics of one process
+
+    Labels are passed as tuples of (name, value) pairs, e.g.
+    (('route', '/api/women/teams'), ('method', 'GET')).
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self.set('process_start_time_seconds', (), time.time())
+
+    def inc(self, name, labels=(), value=1):
+        key = (name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, name, labels, value):
+        with self._lock:
+            self._values[(name, labels)] = value
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        with self._lock:
+            self._observe((name, labels), value, buckets)
+
+    def observe_request(self, route, method, status, seconds, size=None):
+        """
+        Record one finished request
+
+        Args:
+            route: Route template (e.g. '/api/women/teams/<team_name>'), not
+                the raw path, to keep the number of series bounded
+            method: HTTP method
+            status: Response status code
+            seconds: Time spent handling the request
+            size: Response body size in bytes, None if unknown (streams)
+        """
+        labels = (('route', route), ('method', method))
+        counter_key = ('api_requests_total', labels + (('status', str(status)),))
+        with self._lock:
+            self._values[counter_key] = self._values.get(counter_key, 0) + 1
+            if status >= 500:
+                error_key = ('api_request_errors_total', labels)
+                self._values[error_key] = self._values.get(error_key, 0) + 1
+            self._observe(('api_request_duration_seconds', labels), seconds, LATENCY_BUCKETS)
+            if size is not None:
+                self._observe(('api_response_size_bytes', labels), size, SIZE_BUCKETS)
+
+    def _observe(self, key, value, buckets):
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def cache(self, cache_name, hit):
+        """Count one lookup of a named cache"""
+        self.inc('cache_requests_total', (('cache', cache_name), ('result', 'hit' if hit else 'miss')))
+
+    @contextmanager
+    def stage(self, name):
+        """Record how long a startup stage (data load, index build) takes"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.set('startup_stage_duration_seconds', (('stage', name),), time.perf_counter() - start)
+
+    def render(self):
+        """
+        All metrics in Prometheus text exposition format (version 0.0.4)
+        """
+        with self._lock:
+            values = dict(self._values)
+            histograms = {key: (h.buckets, list(h.counts), h.sum) for key, h in self._histograms.items()}
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            series = sorted((labels, v) for (n, labels), v in values.items() if n == name)
+            hist_series = sorted((labels, h) for (n, labels), h in histograms.items() if n == name)
+            if not series and not hist_series:
+                continue
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in series:
+                lines.append(f'{name}{_labels(labels)} {value}')
+            for labels, (buckets, counts, total) in hist_series:
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_labels(labels, ("le", bound))} {cumulative}')
+                lines.append(f'{name}_sum{_labels(labels)} {total}')
+                lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
@@ -6,48 +6,285 @@ import numpy as np
 from itertools import combinations
 
 
-def calculate_head_to_head_probability(team1_stats, team2_stats, method='elo'):
+# Bracket rounds in play order (round names from bracket_template.csv)
+ROUND_ORDER = ['Round 1', 'Round 2', 'Sweet 16', 'Elite Eight', 'Final Four', 'Championship']
+
+# Probability of winning each round's game = reaching the next round
+ADVANCEMENT_COLUMNS = ['round_2_prob', 'sweet_16_prob', 'elite_8_prob',
+                       'final_4_prob', 'championship_prob', 'champion_prob']
+
+# Points for a correct pick in each round (standard 1/2/4/8/16/32 scheme)
+BRACKET_POINTS = [1, 2, 4, 8, 16, 32]
+
+# Closed-form rating models: 'log5' on barthag, 'elo' on efficiency margin
+RATING_METHODS = ['log5', 'elo']
+
+# Efficiency margin gap (adj_oe - adj_de) giving 10:1 odds; fit by log loss
+# on 2021-2025 tournament games
+ELO_SCALE = 17.4
+
+
+def normalize_pairwise_probabilities(matchups, raw_col='win_prob_raw', raw=None):
+    """
+    Normalize raw win probabilities so each matchup and its reverse sum to 1
+    
+    Args:
+        matchups: DataFrame with game_id, team, opponent and raw probabilities
+        raw_col: Column with raw model probabilities
+        raw: Optional array of shape (..., len(matchups)) used instead of
+            raw_col, e.g. one row of raw probabilities per model replica
+        
+    Returns:
+        ndarray: Normalized win probabilities aligned with matchups rows
+            (raw probability when no reverse matchup exists, 0.5 when both
+            raw probabilities are 0)
+    """
+    keys = pd.MultiIndex.from_arrays([matchups['game_id'], matchups['team'], matchups['opponent']])
+    reverse_keys = pd.MultiIndex.from_arrays([matchups['game_id'], matchups['opponent'], matchups['team']])
+    
+    # Row position of each matchup's reverse (first occurrence), -1 if absent
+    positions = pd.Series(np.arange(len(keys)), index=keys)
+    positions = positions[~positions.index.duplicated(keep='first')]
+    reverse_pos = positions.reindex(reverse_keys).fillna(-1).to_numpy(dtype=int)
+    has_reverse = reverse_pos >= 0
+    
+    prob = matchups[raw_col].to_numpy(dtype=float) if raw is None else np.asarray(raw, dtype=float)
+    reverse = prob[..., np.where(has_reverse, reverse_pos, 0)]
+    total = prob + reverse
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        normalized = np.where(total > 0, prob / total, 0.5)
+    
+    return np.where(has_reverse, normalized, prob)
+
+
+def build_round_matrices(matchups, teams, rounds=ROUND_ORDER, prob_col='win_prob', probs=None):
+    """
+    Build dense per-round win probability matrices from a matchup table
+    
+    Args:
+        matchups: DataFrame with round, team, opponent and win probabilities
+        teams: Ordered list of team names (matrix row/column order)
+        rounds: Ordered list of round names
+        prob_col: Column with pairwise win probabilities
+        probs: Optional array of shape (..., len(matchups)) used instead of
+            prob_col; leading dimensions are kept as a batch
+        
+    Returns:
+        ndarray: Shape (..., n_rounds, n_teams, n_teams); entry [r, i, j] is
+            the probability team i beats team j in round r, 0 if they cannot meet
+    """
+    team_index = pd.Index(teams)
+    r = pd.Index(rounds).get_indexer(matchups['round'])
+    i = team_index.get_indexer(matchups['team'])
+    j = team_index.get_indexer(matchups['opponent'])
+    valid = (r >= 0) & (i >= 0) & (j >= 0)
+    
+    values = matchups[prob_col].to_numpy(dtype=float) if probs is None else np.asarray(probs, dtype=float)
+    batch_shape = values.shape[:-1]
+    
+    matrices = np.zeros(batch_shape + (len(rounds), len(team_index), len(team_index)))
+    matrices[..., r[valid], i[valid], j[valid]] = values[..., valid]
+    
+    return matrices
+
+
+def calculate_advancement_probabilities(round_matrices):
+    """
+    Calculate round-by-round advancement probabilities for every team
+    
+    Each round, a team advances with probability
+    P(reach round) * sum over opponents of P(opponent reaches round) * P(win).
+    Leading dimensions of round_matrices are treated as a batch, so many
+    probability scenarios can be evaluated in one call.
+    
+    Args:
+        round_matrices: Array of shape (..., n_rounds, n_teams, n_teams)
+        
+    Returns:
+        ndarray: Shape (..., n_rounds + 1, n_teams); row 0 is reaching the
+            first round (1.0) and row k is winning k games
+    """
+    batch_shape = round_matrices.shape[:-3]
+    n_rounds, n_teams = round_matrices.shape[-3], round_matrices.shape[-1]
+    
+    reach = np.ones(batch_shape + (n_teams,))
+    history = [reach]
+    for r in range(n_rounds):
+        win_share = np.einsum('...ij,...j->...i', round_matrices[..., r, :, :], reach)
+        reach = reach * win_share
+        history.append(reach)
+    
+    return np.stack(history, axis=-2)
+
+
+def calculate_advancement_sensitivities(round_matrices):
+    """
+    Derivatives of every advancement probability with respect to each matchup
+    
+    Each parameter is one possible matchup (round r, teams i < j): raising
+    P(i beats j) by d lowers P(j beats i) by d. Derivatives for all parameters
+    are carried forward through the same recursion as
+    calculate_advancement_probabilities in one vectorized pass. A pair can
+    meet in at most one game, so advancement probabilities are linear in each
+    parameter and a derivative equals the exact swing between i winning and
+    j winning that game.
+    
+    Args:
+        round_matrices: Array of shape (n_rounds, n_teams, n_teams)
+        
+    Returns:
+        tuple: ((round_idx, team_idx, opp_idx) arrays identifying each
+            parameter, derivatives of shape (n_params, n_rounds + 1, n_teams))
+    """
+    n_rounds, n_teams = round_matrices.shape[0], round_matrices.shape[-1]
+    meets = (round_matrices > 0) | (np.swapaxes(round_matrices, 1, 2) > 0)
+    r, i, j = np.nonzero(np.triu(meets, k=1))
+    params = np.arange(len(r))
+    
+    reach = np.ones(n_teams)
+    d_reach = np.zeros((len(r), n_teams))
+    history = [d_reach]
+    for k in range(n_rounds):
+        matrix = round_matrices[k]
+        win_share = matrix @ reach
+        d_win_share = d_reach @ matrix.T
+        
+        # Direct effect of the parameters that belong to this round
+        in_round = r == k
+        d_win_share[params[in_round], i[in_round]] += reach[j[in_round]]
+        d_win_share[params[in_round], j[in_round]] -= reach[i[in_round]]
+        
+        d_reach = d_reach * win_share + reach * d_win_share
+        reach = reach * win_share
+        history.append(d_reach)
+    
+    return (r, i, j), np.stack(history, axis=1)
+
+
+def build_bracket_slots(matchups, teams, rounds=ROUND_ORDER):
+    """
+    Describe each bracket game slot by the teams that can play in it
+    
+    Args:
+        matchups: DataFrame with game_id, round, team and opponent
+        teams: Ordered list of team names
+        rounds: Ordered list of round names
+        
+    Returns:
+        DataFrame: One row per game_id with 'round_idx' and 'teams' (array of
+            team indices), ordered by round then game_id
+    """
+    team_index = pd.Index(teams)
+    slots = matchups.groupby('game_id', sort=True).agg(
+        round=('round', 'first'),
+        team=('team', lambda s: sorted(set(s))),
+    )
+    slots['round_idx'] = pd.Index(rounds).get_indexer(slots['round'])
+    slots['teams'] = [team_index.get_indexer(names) for names in slots['team']]
+    
+    slots = slots[slots['round_idx'] >= 0].sort_values(['round_idx'], kind='stable')
+    return slots[['round', 'round_idx', 'teams']]
+
+
+
+def team_ratings(team_stats, method='log5'):
+    """
+    Rating used by the closed-form models
+    
+    Args:
+        team_stats: Raw (not inverted) team stats - dict, Series or DataFrame
+        method: 'log5' (barthag) or 'elo' (adj_oe - adj_de)
+        
+    Returns:
+        ndarray: Rating per team (0-d for a single team)
+    """
+    if method == 'log5':
+        return np.asarray(team_stats['barthag'], dtype=float)
+    if method == 'elo':
+        return np.asarray(team_stats['adj_oe'], dtype=float) - np.asarray(team_stats['adj_de'], dtype=float)
+    raise ValueError(f"Unknown rating method '{method}' (expected one of {RATING_METHODS})")
+
+
+def rating_win_probability(rating1, rating2, method='log5'):
+    """
+    Win probability of rating1 over rating2, broadcast over arrays
+    
+    Args:
+        rating1: Ratings of the first team(s)
+        rating2: Ratings of the second team(s)
+        method: 'log5' or 'elo'
+        
+    Returns:
+        ndarray: Probability that the first team wins
+    """
+    a = np.asarray(rating1, dtype=float)
+    b = np.asarray(rating2, dtype=float)
+    
+    if method == 'elo':
+        return 1 / (1 + 10 ** (-(a - b) / ELO_SCALE))
+    
+    # log5: P(A beats B) from each team's win probability against an average team
+    num = a * (1 - b)
+    den = num + b * (1 - a)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(den > 0, num / den, 0.5)
+
+
+def rating_probability_matrix(team_stats, method='log5'):
+    """
+    Closed-form win probabilities for every pair of teams
+    
+    Args:
+        team_stats: DataFrame of raw team stats, one row per team
+        method: 'log5' or 'elo'
+        
+    Returns:
+        ndarray: Shape (n_teams, n_teams); entry [i, j] is P(team i beats team j)
+    """
+    ratings = team_ratings(team_stats, method)
+    return rating_win_probability(ratings[:, None], ratings[None, :], method)
+
+
+def calculate_head_to_head_probability(team1_stats, team2_stats, method='log5'):
     """
     Calculate win probability for team1 vs team2
     
     Args:
-        team1_stats: Dictionary with team1 statistics
-        team2_stats: Dictionary with team2 statistics
-        method: Calculation method ('elo', 'composite', 'logistic')
+        team1_stats: Raw statistics for team1 (dict, Series or DataFrame rows)
+        team2_stats: Raw statistics for team2, aligned with team1_stats
+        method: Calculation method ('log5' or 'elo')
         
     Returns:
-        float: Probability that team1 wins (0 to 1)
+        float: Probability that team1 wins (0 to 1); an array when
+            DataFrames of several matchups are passed
     """
-    # TODO: Implement win probability calculation
-    # Options:
-    # 1. Use composite scores with logistic regression
-    # 2. Use Elo-style rating difference
-    # 3. Use your trained model if you have one
-    pass
+    prob = rating_win_probability(team_ratings(team1_stats, method),
+                                  team_ratings(team2_stats, method), method)
+    return float(prob) if prob.ndim == 0 else prob
 
 
-def calculate_heatmap_probabilities(teams_df, seed_range=(1, 3)):
+def calculate_heatmap_probabilities(teams_df, seed_range=(1, 3), matchup_matrix=None,
+                                    family='elite'):
     """
     Calculate win probabilities for all matchups between specified seeds
     
     Args:
         teams_df: DataFrame with all teams and their predictions
         seed_range: Tuple (min_seed, max_seed) to include
+        matchup_matrix: MatchupMatrix holding the pairwise probabilities
+        family: Round family to read ('early' or 'elite')
         
     Returns:
-        DataFrame: Heatmap matrix of win probabilities
+        DataFrame: Heatmap matrix of win probabilities (row team vs column team)
     """
-    # Filter to specified seeds
-    seeds_to_include = range(seed_range[0], seed_range[1] + 1)
-    filtered_teams = teams_df[teams_df['seed'].isin(seeds_to_include)].copy()
+    if matchup_matrix is None:
+        raise ValueError("matchup_matrix is required to build a heatmap")
     
-    # TODO: Create pairwise probability matrix
-    # Should return something like:
-    #           Team A  Team B  Team C  ...
-    # Team A     0.50    0.65    0.72
-    # Team B     0.35    0.50    0.58
-    # Team C     0.28    0.42    0.50
-    pass
+    positions = matchup_matrix.select(teams=teams_df['team'].tolist(), seed_range=seed_range)
+    names = matchup_matrix.teams[positions]
+    
+    return pd.DataFrame(matchup_matrix.submatrix(positions, family), index=names, columns=names)
 
 
 def calculate_tournament_probabilities(teams_df, bracket_structure, n_simulations=10000):
@@ -73,37 +310,85 @@ def calculate_tournament_probabilities(teams_df, bracket_structure, n_simulation
     pass
 
 
-def simulate_single_game(team1_stats, team2_stats):
+def simulate_single_game(team1_stats, team2_stats, rng=None):
     """
     Simulate a single game between two teams
     
     Args:
         team1_stats: Statistics for team 1
         team2_stats: Statistics for team 2
+        rng: Optional numpy random Generator
         
     Returns:
         int: Winner (1 or 2)
     """
-    # TODO: Implement game simulation
-    # Use calculate_head_to_head_probability and random draw
-    pass
+    rng = np.random.default_rng() if rng is None else rng
+    return 1 if rng.random() < calculate_head_to_head_probability(team1_stats, team2_stats) else 2
 
 
-def simulate_tournament(teams_df, bracket, n_simulations=1000):
+def simulate_tournament(teams_df, bracket, n_simulations=1000, seed=None, rounds=ROUND_ORDER,
+                        prob_col='win_prob', batch_size=10000, progress=None):
     """
     Run full tournament simulation
     
+    Tournaments are simulated in vectorized batches: each round, every game
+    finds its two surviving teams in each simulated bracket and draws the
+    winner from the round's win probability matrix.
+    
     Args:
-        teams_df: All teams with stats
-        bracket: Bracket structure
+        teams_df: All teams with stats (a team column is required)
+        bracket: Matchups with win probabilities
+            (women_matchups_with_probs.csv layout)
         n_simulations: Number of simulations to run
+        seed: Optional random seed
+        rounds: Ordered list of round names
+        prob_col: Column with pairwise win probabilities
+        batch_size: Simulations per vectorized batch
+        progress: Optional callback called with the fraction completed
+            after each batch
         
     Returns:
-        dict: Simulation results and probabilities
+        dict: n_simulations, advancement (DataFrame of team and the share of
+            simulations reaching each round) and champions (Series of title
+            counts per team)
     """
-    # TODO: Implement full tournament simulation
-    # Track how many times each team reaches each round
-    pass
+    teams = pd.Index(teams_df['team'].drop_duplicates())
+    round_matrices = build_round_matrices(bracket, teams, rounds, prob_col)
+    slots = build_bracket_slots(bracket, teams, rounds)
+    # Per round, the teams that can play in each of its games (equal sized)
+    groups = [np.stack(slots.loc[slots['round_idx'] == r, 'teams'].to_list())
+              for r in range(len(rounds))]
+    
+    rng = np.random.default_rng(seed)
+    counts = np.zeros((len(rounds), len(teams)), dtype=np.int64)
+    done = 0
+    while done < n_simulations:
+        n = min(batch_size, n_simulations - done)
+        alive = np.zeros((n, len(teams)), dtype=bool)
+        alive[:, np.concatenate(groups[0])] = True
+        sims = np.arange(n)[:, None]
+        
+        for r, group in enumerate(groups):
+            # Positions of the two surviving teams of every game: (n, games, 2)
+            survivors = np.argsort(~alive[:, group], axis=2, kind='stable')[:, :, :2]
+            a = group[np.arange(len(group)), survivors[:, :, 0]]
+            b = group[np.arange(len(group)), survivors[:, :, 1]]
+            a_wins = rng.random(a.shape) < round_matrices[r, a, b]
+            alive[sims, np.where(a_wins, b, a)] = False
+            counts[r] += alive.sum(axis=0)
+        
+        done += n
+        if progress is not None:
+            progress(done / n_simulations)
+    
+    advancement = pd.DataFrame(counts.T / n_simulations, columns=ADVANCEMENT_COLUMNS)
+    advancement.insert(0, 'team', teams)
+    champions = pd.Series(counts[-1], index=teams, name='titles')
+    return {
+        'n_simulations': n_simulations,
+        'advancement': advancement,
+        'champions': champions[champions > 0].sort_values(ascending=False),
+    }
 
 
 def calculate_bracket_value(team_stats, seed):
@@ -125,18 +410,68 @@ def calculate_bracket_value(team_stats, seed):
     pass
 
 
-def upset_probability(favorite_stats, underdog_stats, seed_diff):
+def upset_probability(favorite_stats, underdog_stats, seed_diff, method='log5'):
     """
     Calculate probability of upset based on seed difference
     
     Args:
         favorite_stats: Higher seed team stats
         underdog_stats: Lower seed team stats  
-        seed_diff: Difference in seeds
+        seed_diff: Difference in seeds (informational; the ratings already
+            separate the teams)
+        method: Rating model ('log5' or 'elo')
         
     Returns:
         float: Upset probability
     """
-    # TODO: Implement upset probability
-    # Higher seed differences should reduce upset probability
-    pass
+    return 1 - calculate_head_to_head_probability(favorite_stats, underdog_stats, method)
+
+
+def calculate_upset_table(matchups, teams, round_matrices, reach, rounds=ROUND_ORDER):
+    """
+    Upset rates by round and seed line
+    
+    Args:
+        matchups: DataFrame with round, team, opponent, team_seed and opp_seed
+        teams: Ordered list of team names (matrix order)
+        round_matrices: Array (n_rounds, n_teams, n_teams) of win probabilities
+        reach: Advancement array (n_rounds + 1, n_teams)
+        rounds: Ordered list of round names
+        
+    Returns:
+        DataFrame: One row per (round, favorite_seed, underdog_seed) with the
+            number of possible pairings, their mean upset probability, the
+            expected number of such games, the upset probability given the
+            game is played and the expected number of upsets
+    """
+    favorites = matchups[matchups['team_seed'] < matchups['opp_seed']]
+    team_index = pd.Index(teams)
+    r = pd.Index(rounds).get_indexer(favorites['round'])
+    i = team_index.get_indexer(favorites['team'])
+    j = team_index.get_indexer(favorites['opponent'])
+    
+    upset = 1 - round_matrices[r, i, j]
+    meet = reach[r, i] * reach[r, j]
+    
+    table = pd.DataFrame({
+        'round': favorites['round'].to_numpy(),
+        'round_idx': r,
+        'favorite_seed': favorites['team_seed'].to_numpy(),
+        'underdog_seed': favorites['opp_seed'].to_numpy(),
+        'games': 1,
+        'upset_prob': upset,
+        'meet_prob': meet,
+        'expected_upsets': meet * upset,
+    })
+    table = table.groupby(['round_idx', 'round', 'favorite_seed', 'underdog_seed'], as_index=False).agg(
+        games=('games', 'sum'),
+        mean_upset_prob=('upset_prob', 'mean'),
+        expected_games=('meet_prob', 'sum'),
+        expected_upsets=('expected_upsets', 'sum'),
+    )
+    with np.errstate(invalid='ignore', divide='ignore'):
+        table['upset_prob_if_played'] = table['expected_upsets'] / table['expected_games']
+    
+    return table.drop(columns='round_idx')[['round', 'favorite_seed', 'underdog_seed', 'games',
+                                           'mean_upset_prob', 'upset_prob_if_played',
+                                           'expected_games', 'expected_upsets']]
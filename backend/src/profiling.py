@@ -0,0 +1,314 @@
+"""
+On-demand profiling of single requests
+A request asks to be profiled (when profiling is enabled) and runs under
+either a sampling profiler, which records the request thread's stack every
+interval, or cProfile. The report (top stacks, hottest functions and a
+breakdown of time by library) is stored under an id, and sampled stacks
+are added to one collapsed-stack file per route for flame graphs
+(flamegraph.pl, speedscope). Requests that are not profiled are untouched.
+"""
+import cProfile
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+MODES = ('sample', 'cprofile')
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STDLIB_DIR = os.path.dirname(os.__file__)
+
+# Module prefixes (site-packages or stdlib) -> breakdown category
+CATEGORIES = [
+    ('pandas', 'pandas'),
+    ('numpy', 'numpy'),
+    ('sklearn', 'models'),
+    ('xgboost', 'models'),
+    ('lightgbm', 'models'),
+    ('flask', 'framework'),
+    ('werkzeug', 'framework'),
+    ('flask_cors', 'framework'),
+    ('json', 'serialization'),
+    ('gzip', 'compression'),
+    ('zlib', 'compression'),
+    ('brotli', 'compression'),
+]
+
+
+def _short_path(filename):
+    for marker in ('site-packages/', 'dist-packages/'):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    for root in (APP_DIR, STDLIB_DIR):
+        if filename.startswith(root + os.sep):
+            return os.path.relpath(filename, root)
+    return filename
+
+
+def categorize(filename):
+    """Breakdown category of a source file: app, a library group or other"""
+    if filename.startswith(APP_DIR + os.sep) and 'site-packages' not in filename:
+        return 'app'
+    path = _short_path(filename)
+    for prefix, category in CATEGORIES:
+        if path.startswith(prefix + '/') or path.startswith(prefix + '.'):
+            return category
+    return 'other'
+
+
+_labels = {}
+_label_categories = {}
+
+
+def frame_label(code):
+    """'function (file:line)' for a code object, safe for collapsed stacks"""
+    label = _labels.get(code)
+    if label is None:
+        label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(';', ':')
+        _labels[code] = label
+        _label_categories[label] = categorize(code.co_filename)
+    return label
+
+
+class SamplingProfiler:
+    """
+    Records one thread's call stack every interval from a background thread
+
+    While any sampler runs the interpreter's switch interval is lowered to
+    the sampling interval, so CPU-bound code still yields often enough to
+    be sampled.
+    """
+
+    _active = 0
+    _switch_interval = None
+    _lock = threading.Lock()
+
+    def __init__(self, thread_id=None, interval=0.001):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def start(self):
+        with SamplingProfiler._lock:
+            if SamplingProfiler._active == 0:
+                SamplingProfiler._switch_interval = sys.getswitchinterval()
+                sys.setswitchinterval(min(self.interval, SamplingProfiler._switch_interval))
+            SamplingProfiler._active += 1
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        with SamplingProfiler._lock:
+            SamplingProfiler._active -= 1
+            if SamplingProfiler._active == 0:
+                sys.setswitchinterval(SamplingProfiler._switch_interval)
+        return self.stacks
+
+
+def summarize_samples(stacks, duration, limit=20):
+    """
+    Report of a sampling run
+
+    Times are each function's share of the samples applied to the measured
+    duration; under load the sampler gets fewer turns than its interval asks
+    for, so counting samples times the interval would undercount.
+
+    Args:
+        stacks: Counter of stacks (tuples of frame labels, root first)
+        duration: Wall time of the profiled run in seconds
+        limit: Entries per table
+
+    Returns:
+        dict: samples, top_stacks, functions (self and inclusive time) and
+            breakdown (self time by category)
+    """
+    total = sum(stacks.values())
+    self_counts, inclusive, breakdown = Counter(), Counter(), Counter()
+    for stack, count in stacks.items():
+        self_counts[stack[-1]] += count
+        breakdown[_label_categories.get(stack[-1], 'other')] += count
+        for label in set(stack):
+            inclusive[label] += count
+
+    def ms(count):
+        return round(count / total * duration * 1000, 2)
+
+    return {
+        'samples': total,
+        'top_stacks': [{'stack': list(stack), 'samples': count, 'percent': round(100 * count / total, 1)}
+                       for stack, count in stacks.most_common(limit)],
+        'functions': [{'function': label, 'self_ms': ms(count), 'total_ms': ms(inclusive[label])}
+                      for label, count in self_counts.most_common(limit)],
+        'breakdown': {category: round(100 * count / total, 1)
+                      for category, count in breakdown.most_common()} if total else {},
+    }
+
+
+def summarize_cprofile(profile, limit=20):
+    """
+    Report of a cProfile run: hottest functions and time by category
+    """
+    stats = pstats.Stats(profile).stats
+    rows, breakdown = [], Counter()
+    for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.items():
+        label = f"{name} ({_short_path(filename)}:{line})"
+        breakdown[categorize(filename)] += tottime
+        rows.append((tottime, cumtime, calls, label))
+
+    total = sum(breakdown.values())
+    rows.sort(reverse=True)
+    return {
+        'functions': [{'function': label, 'self_ms': round(tottime * 1000, 2),
+                       'total_ms': round(cumtime * 1000, 2), 'calls': calls}
+                      for tottime, cumtime, calls, label in rows[:limit]],
+        'breakdown': {category: round(100 * t / total, 1)
+                      for category, t in breakdown.most_common()} if total else {},
+    }
+
+
+class RequestProfiler:
+    """Profiler for one request, in either of MODES"""
+
+    def __init__(self, mode='sample', interval=0.001):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode '{mode}' (use {', '.join(MODES)})")
+        self.mode = mode
+        self.interval = interval
+        self._profiler = SamplingProfiler(interval=interval) if mode == 'sample' else cProfile.Profile()
+
+    def start(self):
+        self.started = time.time()
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        if self.mode == 'sample':
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        """
+        Returns:
+            tuple: (report dict, Counter of sampled stacks or None)
+        """
+        if self.mode == 'sample':
+            stacks = self._profiler.stop()
+        else:
+            self._profiler.disable()
+            stacks = None
+        duration = time.perf_counter() - self._wall
+        cpu = time.thread_time() - self._cpu
+
+        report = summarize_samples(stacks, duration) if stacks is not None else summarize_cprofile(self._profiler)
+        report.update(
+            mode=self.mode,
+            started=self.started,
+            duration_ms=round(duration * 1000, 2),
+            cpu_ms=round(cpu * 1000, 2),
+        )
+        return report, stacks
+
+
+class ProfileStore:
+    """
+    Stored request profiles (newest max_profiles kept) and per-route
+    collapsed-stack files that accumulate every sampled request
+    """
+
+    def __init__(self, directory, max_profiles=200):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory, 'requests'), exist_ok=True)
+
+    def save(self, report, stacks=None):
+        """
+        Store a report and fold its stacks into its route's collapsed file
+
+        Args:
+            report: Report dict with at least 'route'
+            stacks: Counter of sampled stacks, if any
+
+        Returns:
+            str: Profile id
+        """
+        profile_id = uuid.uuid4().hex[:16]
+        report = dict(report, id=profile_id)
+        requests_dir = os.path.join(self.directory, 'requests')
+        with open(os.path.join(requests_dir, f'{profile_id}.json'), 'w') as f:
+            json.dump(report, f)
+
+        with self._lock:
+            if stacks:
+                self._merge_collapsed(self.collapsed_path(report['route']), stacks)
+            stored = sorted(os.scandir(requests_dir), key=lambda e: e.stat().st_mtime)
+            for entry in stored[:max(0, len(stored) - self.max_profiles)]:
+                os.remove(entry.path)
+        return profile_id
+
+    def collapsed_path(self, route):
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'root'
+        return os.path.join(self.directory, f'{slug}.collapsed')
+
+    @staticmethod
+    def _merge_collapsed(path, stacks):
+        merged = Counter(read_collapsed(path)) if os.path.exists(path) else Counter()
+        merged.update({';'.join(stack): count for stack, count in stacks.items()})
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            for stack, count in sorted(merged.items()):
+                f.write(f'{stack} {count}\n')
+        os.replace(tmp_path, path)
+
+    def get(self, profile_id):
+        """Stored report, None if unknown"""
+        if not re.fullmatch(r'[0-9a-f]{16}', profile_id):
+            return None
+        try:
+            with open(os.path.join(self.directory, 'requests', f'{profile_id}.json')) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def recent(self, limit=50):
+        """Summaries of the newest stored reports"""
+        entries = sorted(os.scandir(os.path.join(self.directory, 'requests')),
+                         key=lambda e: e.stat().st_mtime, reverse=True)
+        summaries = []
+        for entry in entries[:limit]:
+            report = self.get(entry.name[:-len('.json')])
+            if report is not None:
+                summaries.append({k: report.get(k) for k in
+                                  ('id', 'route', 'path', 'mode', 'status', 'duration_ms', 'started')})
+        return summaries
+
+
+def read_collapsed(path):
+    """
+    Stack counts of a collapsed-stack file ('frame;frame;frame count' lines)
+    """
+    stacks = {}
+    with open(path) as f:
+        for line in f:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack:
+                stacks[stack] = stacks.get(stack, 0) + int(count)
+    return stacks
@@ -0,0 +1,377 @@
+"""
+Bracket scoring for pools and contests
+- Brackets are stored as int8 arrays of picked winners, one column per
+  bracket_template.csv game_id
+- All entries are scored at once against actual results and against the
+  matchup probabilities (expected score)
+- Team bracket values under any number of scoring schemes at once
+"""
+import numpy as np
+import pandas as pd
+
+from probabilities import ROUND_ORDER, BRACKET_POINTS, build_bracket_slots
+from utils import TeamNameIndex
+
+
+# Scheme name -> points rules. A correct pick in round r scores
+# round_points[r] times the winner's seed factor, plus upset_bonus (one
+# value or one per round) per seed line when a higher seed number wins.
+# seed_multiplier is True (factor = seed) or a list of 16 per-seed factors
+SCORING_SCHEMES = {
+    'standard': {'round_points': BRACKET_POINTS},
+    'upset_bonus': {'round_points': BRACKET_POINTS, 'upset_bonus': 1},
+    'seed_weighted': {'round_points': BRACKET_POINTS, 'seed_multiplier': True},
+    'fibonacci': {'round_points': [2, 3, 5, 8, 13, 21]},
+    'linear': {'round_points': [1, 2, 3, 4, 5, 6]},
+    'round_plus_seed': {'round_points': BRACKET_POINTS, 'upset_bonus': [1, 1, 2, 2, 3, 3]},
+}
+
+# Highest seed number in a region
+MAX_SEED = 16
+
+# Pick / result value for a game with no winner
+NO_PICK = -1
+
+
+class BracketLayout:
+    """
+    Game slots of the current bracket aligned to bracket_template.csv
+
+    Teams are numbered by region then seed; a bracket is an int8 array with
+    one picked team number per game, in game_ids order.
+    """
+
+    def __init__(self, matchups, rounds=ROUND_ORDER):
+        """
+        Args:
+            matchups: Current matchups (women_matchups_current.csv layout or
+                with probabilities)
+            rounds: Ordered list of round names
+        """
+        slots = (matchups[['team', 'team_region', 'team_seed']]
+                 .drop_duplicates('team')
+                 .sort_values(['team_region', 'team_seed'], kind='stable'))
+        self.teams = pd.Index(slots['team'])
+        self.seeds = slots['team_seed'].to_numpy()
+        self.rounds = list(rounds)
+        self._names = TeamNameIndex(self.teams)
+
+        game_slots = build_bracket_slots(matchups, self.teams, self.rounds)
+        self.game_ids = pd.Index(game_slots.index)
+        self.round_idx = game_slots['round_idx'].to_numpy()
+        self.game_teams = list(game_slots['teams'])
+
+        # Teams eligible for each game, and the two games feeding it
+        # (-1 for first round games, which are fed by the teams themselves)
+        self.eligible = np.zeros((len(self.game_ids), len(self.teams)), dtype=bool)
+        for g, teams in enumerate(self.game_teams):
+            self.eligible[g, teams] = True
+
+        self.feeders = np.full((len(self.game_ids), 2), -1)
+        for g in np.flatnonzero(self.round_idx > 0):
+            previous = np.flatnonzero(self.round_idx == self.round_idx[g] - 1)
+            inside = ~(self.eligible[previous] & ~self.eligible[g]).any(axis=1)
+            self.feeders[g] = previous[inside]
+
+    def __len__(self):
+        return len(self.game_ids)
+
+    def encode(self, picks):
+        """
+        Convert picked team names to an int8 pick array
+
+        Args:
+            picks: A DataFrame with one column per game_id, a list of dicts
+                (game_id -> team) or a 2D sequence of team names in game_ids order
+
+        Returns:
+            ndarray: Shape (n_entries, n_games); NO_PICK for missing or
+                unknown teams
+        """
+        if isinstance(picks, pd.DataFrame):
+            names = picks.reindex(columns=self.game_ids)
+        elif len(picks) and isinstance(picks[0], dict):
+            names = pd.DataFrame(list(picks)).reindex(columns=self.game_ids)
+        else:
+            names = pd.DataFrame(list(picks))
+            if names.shape[1] != len(self.game_ids):
+                raise ValueError(f"Expected {len(self.game_ids)} picks per bracket, got {names.shape[1]}")
+
+        # Look up each distinct name once
+        codes, uniques = pd.factorize(names.to_numpy(dtype=object).ravel())
+        teams = np.append(self._names.positions(uniques, strict=False), NO_PICK)
+        return teams[codes].reshape(names.shape).astype(np.int8)
+
+    def team_number(self, name):
+        """
+        Team number for a team name (any spelling TeamNameIndex resolves),
+        NO_PICK if unknown
+        """
+        return self._names.get_position(name)
+
+    def decode(self, picks):
+        """
+        Convert one pick array back to a dict of game_id -> team name
+        """
+        return {g: (self.teams[t] if t >= 0 else None) for g, t in zip(self.game_ids, picks)}
+
+    def validate(self, picks):
+        """
+        Check that every pick is possible and consistent with earlier picks
+
+        Args:
+            picks: Pick array (n_entries, n_games)
+
+        Returns:
+            ndarray: Boolean mask of valid brackets
+        """
+        picks = np.asarray(picks)
+        rows = np.arange(len(picks))[:, None]
+        valid = (picks >= 0).all(axis=1)
+
+        safe = np.where(picks >= 0, picks, 0)
+        valid &= self.eligible[np.arange(len(self.game_ids)), safe].all(axis=1)
+
+        later = np.flatnonzero(self.round_idx > 0)
+        fed = ((picks[:, later] == picks[rows, self.feeders[later, 0]])
+               | (picks[:, later] == picks[rows, self.feeders[later, 1]]))
+        return valid & fed.all(axis=1)
+
+    def losers(self, results):
+        """
+        Loser of every decided game
+
+        Args:
+            results: Result array (n_games,) with NO_PICK for undecided games
+
+        Returns:
+            ndarray: Loser per game (NO_PICK where the game or the
+                opponent is not yet known)
+        """
+        results = np.asarray(results)
+        losers = np.full(len(self.game_ids), NO_PICK)
+        for g in np.flatnonzero(results >= 0):
+            if self.round_idx[g] == 0:
+                candidates = self.game_teams[g]
+            else:
+                candidates = results[self.feeders[g]]
+            others = [t for t in candidates if t != results[g] and t >= 0]
+            if len(others) == 1:
+                losers[g] = others[0]
+        return losers
+
+
+def scheme_matrix(schemes, n_rounds=len(ROUND_ORDER)):
+    """
+    Stack scoring schemes into per-round weight matrices
+
+    Args:
+        schemes: List of scoring schemes (see SCORING_SCHEMES)
+        n_rounds: Number of rounds
+
+    Returns:
+        tuple: (round points (n_schemes, n_rounds), seed factors
+            (n_schemes, MAX_SEED + 1) indexed by seed, upset bonus per seed
+            line (n_schemes, n_rounds))
+    """
+    round_points = np.array([scheme['round_points'] for scheme in schemes], dtype=float)
+    if round_points.shape[1:] != (n_rounds,):
+        raise ValueError(f"Every scheme needs {n_rounds} round_points")
+
+    seed_factors = np.ones((len(schemes), MAX_SEED + 1))
+    upset_bonus = np.zeros((len(schemes), n_rounds))
+    for k, scheme in enumerate(schemes):
+        multiplier = scheme.get('seed_multiplier')
+        if multiplier is True:
+            seed_factors[k] = np.arange(MAX_SEED + 1)
+        elif multiplier:
+            seed_factors[k, 1:] = multiplier
+        upset_bonus[k] = scheme.get('upset_bonus', 0)
+
+    return round_points, seed_factors, upset_bonus
+
+
+def pick_points(layout, scheme, winners, losers=None, round_idx=None):
+    """
+    Points for correctly picking each given winner
+
+    Args:
+        layout: BracketLayout
+        scheme: Scoring scheme (see SCORING_SCHEMES)
+        winners: Team numbers, shape (..., n_games)
+        losers: Optional team numbers of the beaten team, same shape; the
+            upset bonus is only applied where the loser is known
+        round_idx: Round of each winner (defaults to the layout's games)
+
+    Returns:
+        ndarray: Points per game, same shape as winners
+    """
+    winners = np.asarray(winners)
+    round_idx = layout.round_idx if round_idx is None else round_idx
+    round_points, seed_factors, upset_bonus = (a[0] for a in scheme_matrix([scheme], len(layout.rounds)))
+
+    winner_seeds = layout.seeds[np.where(winners >= 0, winners, 0)]
+    points = round_points[round_idx] * seed_factors[winner_seeds]
+
+    if upset_bonus.any() and losers is not None:
+        losers = np.asarray(losers)
+        loser_seeds = layout.seeds[np.where(losers >= 0, losers, 0)]
+        upset = np.where(losers >= 0, np.maximum(winner_seeds - loser_seeds, 0), 0)
+        points = points + upset_bonus[round_idx] * upset
+
+    return np.where(winners >= 0, points, 0.0)
+
+
+def score_brackets(picks, results, points):
+    """
+    Score every bracket against the actual results
+
+    Args:
+        picks: Pick array (n_entries, n_games)
+        results: Result array (n_games,) with NO_PICK for undecided games
+        points: Points per game for its actual winner (from pick_points)
+
+    Returns:
+        tuple: (scores, number of correct picks) per entry
+    """
+    correct = (picks == np.asarray(results)[None, :]) & (np.asarray(results) >= 0)[None, :]
+    return correct @ points, correct.sum(axis=1)
+
+
+def expected_points_table(layout, scheme, round_matrices, reach):
+    """
+    Expected points from picking each team to win its game in each round
+
+    Args:
+        layout: BracketLayout
+        scheme: Scoring scheme
+        round_matrices: Array (n_rounds, n_teams, n_teams) in layout team order
+        reach: Advancement array (n_rounds + 1, n_teams) in layout team order
+
+    Returns:
+        ndarray: Shape (n_rounds, n_teams)
+    """
+    n_rounds, n_teams = round_matrices.shape[0], round_matrices.shape[-1]
+    winners, losers = np.meshgrid(np.arange(n_teams), np.arange(n_teams), indexing='ij')
+    table = np.zeros((n_rounds, n_teams))
+
+    for r in range(n_rounds):
+        # P(team meets and beats each possible opponent in round r)
+        meet_and_win = reach[r][:, None] * reach[r][None, :] * round_matrices[r]
+        points = pick_points(layout, scheme, winners, losers, round_idx=r)
+        table[r] = (meet_and_win * points).sum(axis=1)
+    return table
+
+
+def expected_scores(layout, picks, table):
+    """
+    Expected score of every bracket under the matchup probabilities
+
+    Args:
+        layout: BracketLayout
+        picks: Pick array (n_entries, n_games)
+        table: Expected points table from expected_points_table
+
+    Returns:
+        ndarray: Expected score per entry
+    """
+    safe = np.where(picks >= 0, picks, 0)
+    values = table[layout.round_idx[None, :], safe]
+    return np.where(picks >= 0, values, 0).sum(axis=1)
+
+
+def upset_margin_table(round_matrices, reach, seeds):
+    """
+    Expected seed lines gained by upsets, per round and team
+
+    Entry [r, t] is the sum over opponents j of P(t meets and beats j in
+    round r) * max(seed_t - seed_j, 0).
+
+    Args:
+        round_matrices: Array (n_rounds, n_teams, n_teams)
+        reach: Advancement array (n_rounds + 1, n_teams)
+        seeds: Seed per team
+
+    Returns:
+        ndarray: Shape (n_rounds, n_teams)
+    """
+    seeds = np.asarray(seeds)
+    margin = np.maximum(seeds[:, None] - seeds[None, :], 0)
+    meet_and_win = reach[:-1, :, None] * reach[:-1, None, :] * round_matrices
+    return (meet_and_win * margin).sum(axis=2)
+
+
+def calculate_bracket_values(reach, seeds, schemes, round_matrices=None):
+    """
+    Every team's expected points under every scoring scheme
+
+    Round points of all schemes are applied to the round-probability table
+    in one matrix product; seed factors scale the result per team, and
+    upset bonuses add a second product against upset_margin_table.
+
+    Args:
+        reach: Advancement array (n_rounds + 1, n_teams)
+        seeds: Seed per team
+        schemes: List of scoring schemes
+        round_matrices: Win probability matrices, needed only for schemes
+            with an upset bonus
+
+    Returns:
+        ndarray: Shape (n_schemes, n_teams)
+    """
+    seeds = np.asarray(seeds)
+    round_points, seed_factors, upset_bonus = scheme_matrix(schemes, reach.shape[0] - 1)
+
+    values = (round_points @ reach[1:]) * seed_factors[:, seeds]
+    if upset_bonus.any():
+        if round_matrices is None:
+            raise ValueError("round_matrices are required for upset bonus schemes")
+        values += upset_bonus @ upset_margin_table(round_matrices, reach, seeds)
+    return values
+
+
+class BracketValues:
+    """
+    Team bracket values for named schemes, computed on demand and cached
+    per scheme for one probability snapshot
+    """
+
+    def __init__(self, teams, seeds, round_matrices, reach):
+        """
+        Args:
+            teams: Team names (matrix order)
+            seeds: Seed per team
+            round_matrices: Win probability matrices in the same team order
+            reach: Advancement probabilities in the same team order
+        """
+        self.teams = pd.Index(teams)
+        self.seeds = np.asarray(seeds)
+        self.round_matrices = round_matrices
+        self.reach = reach
+        self._cache = {}
+
+    def values(self, scheme_names):
+        """
+        Bracket values for the given schemes
+
+        Args:
+            scheme_names: Names from SCORING_SCHEMES
+
+        Returns:
+            DataFrame: One column per scheme, indexed by team
+
+        Raises:
+            KeyError: For unknown scheme names
+        """
+        unknown = [name for name in scheme_names if name not in SCORING_SCHEMES]
+        if unknown:
+            raise KeyError(f"Unknown scoring schemes: {', '.join(unknown)}")
+
+        missing = [name for name in dict.fromkeys(scheme_names) if name not in self._cache]
+        if missing:
+            computed = calculate_bracket_values(self.reach, self.seeds,
+                                                [SCORING_SCHEMES[name] for name in missing],
+                                                self.round_matrices)
+            self._cache.update(zip(missing, computed))
+
+        return pd.DataFrame({name: self._cache[name] for name in scheme_names}, index=self.teams)
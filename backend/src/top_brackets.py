@@ -0,0 +1,146 @@
+"""
+K most likely complete brackets
+A bracket's probability is the product of the winning probabilities of its
+63 picks. Each game's sub-brackets are produced lazily in descending
+probability by merging its two feeder games' lists, so only the part of the
+2^63 bracket space needed for the top K is ever generated.
+"""
+import heapq
+import threading
+import pandas as pd
+
+from probabilities import ROUND_ORDER, build_round_matrices, build_bracket_slots
+
+
+class _TeamLeaf:
+    """A team entering the bracket: one sub-bracket with probability 1"""
+
+    def __init__(self, team):
+        self.outcome = (1.0, team, None, None)
+
+    def get(self, n):
+        return self.outcome if n == 0 else None
+
+
+class _GameNode:
+    """
+    Sub-brackets below one game, generated best-first on demand
+
+    Item n is (probability, winner, left rank, right rank). Candidate pairs
+    (i, j) of feeder sub-brackets are bounded by left[i] * right[j]; the
+    exact outcomes of a pair (either finalist winning) are only scored once
+    the pair is the best remaining bound, and an outcome is emitted when no
+    unexpanded pair could beat it.
+    """
+
+    def __init__(self, game_id, round_idx, left, right, win_matrix):
+        self.game_id = game_id
+        self.round_idx = round_idx
+        self.left = left
+        self.right = right
+        self.win_matrix = win_matrix
+        self.items = []
+        self._pairs = [(-1.0, 0, 0)]
+        self._seen = {(0, 0)}
+        self._ready = []
+
+    def _push_pair(self, i, j):
+        if (i, j) in self._seen:
+            return
+        left, right = self.left.get(i), self.right.get(j)
+        if left is None or right is None:
+            return
+        self._seen.add((i, j))
+        heapq.heappush(self._pairs, (-(left[0] * right[0]), i, j))
+
+    def get(self, n):
+        while len(self.items) <= n:
+            while self._pairs and (not self._ready or self._pairs[0][0] < self._ready[0][0]):
+                _, i, j = heapq.heappop(self._pairs)
+                left, right = self.left.get(i), self.right.get(j)
+                a, b = left[1], right[1]
+                p = self.win_matrix[a, b]
+                base = left[0] * right[0]
+                for prob, winner in ((base * p, a), (base * (1 - p), b)):
+                    if prob > 0:
+                        heapq.heappush(self._ready, (-prob, winner, i, j))
+                self._push_pair(i + 1, j)
+                self._push_pair(i, j + 1)
+
+            if not self._ready:
+                return None
+            neg_prob, winner, i, j = heapq.heappop(self._ready)
+            self.items.append((-neg_prob, winner, i, j))
+        return self.items[n]
+
+
+class TopBrackets:
+    """
+    Lazily enumerate complete brackets in descending probability
+
+    Generated sub-brackets are kept, so asking for more brackets later
+    continues where the previous request stopped.
+    """
+
+    def __init__(self, matchups, rounds=ROUND_ORDER, prob_col='win_prob'):
+        """
+        Args:
+            matchups: Matchups with win probabilities
+                (women_matchups_with_probs.csv layout)
+            rounds: Ordered list of round names
+            prob_col: Column with pairwise win probabilities
+        """
+        self.teams = pd.Index(matchups['team'].drop_duplicates())
+        round_matrices = build_round_matrices(matchups, self.teams, rounds, prob_col)
+        slots = build_bracket_slots(matchups, self.teams, rounds)
+
+        # Feeder of each team in the previous round: team -> node
+        feeders = {t: _TeamLeaf(t) for t in range(len(self.teams))}
+        self.games = []
+        for r in range(len(rounds)):
+            round_slots = slots[slots['round_idx'] == r]
+            next_feeders = {}
+            for game_id, slot in round_slots.iterrows():
+                children = list(dict.fromkeys(feeders[t] for t in slot['teams']).keys())
+                if len(children) != 2:
+                    raise ValueError(f"Game {game_id} is not fed by exactly two earlier games")
+                node = _GameNode(game_id, r, children[0], children[1], round_matrices[r])
+                self.games.append(node)
+                next_feeders.update({t: node for t in slot['teams']})
+            feeders = next_feeders
+
+        roots = set(feeders.values())
+        if len(roots) != 1:
+            raise ValueError("Bracket does not end in a single championship game")
+        self.root = roots.pop()
+        self._lock = threading.Lock()
+
+    def _picks(self, node, rank, picks):
+        if isinstance(node, _TeamLeaf):
+            return
+        _, winner, i, j = node.get(rank)
+        picks[node.game_id] = self.teams[winner]
+        self._picks(node.left, i, picks)
+        self._picks(node.right, j, picks)
+
+    def top(self, k=10):
+        """
+        The K most likely complete brackets
+
+        Args:
+            k: Number of brackets
+
+        Returns:
+            list: (probability, dict of game_id -> picked winner) in
+                descending probability
+        """
+        brackets = []
+        with self._lock:
+            for rank in range(k):
+                outcome = self.root.get(rank)
+                if outcome is None:
+                    break
+                picks = {}
+                self._picks(self.root, rank, picks)
+                brackets.append((outcome[0], picks))
+        return brackets
@@ -1,11 +1,45 @@
 """
 Utility functions for data processing and validation
 """
+import re
+import unicodedata
+from collections import Counter
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Any
 
 
+# Alternate spellings -> normalized Bart Torvik name (both sides normalized
+# with normalize_team_name's rules, before the alias lookup)
+TEAM_ALIASES = {
+    'uconn': 'connecticut',
+    'ole miss': 'mississippi',
+    'north carolina state': 'nc state',
+    'southern california': 'usc',
+    'louisiana state': 'lsu',
+    'brigham young': 'byu',
+    'texas christian': 'tcu',
+    'southern methodist': 'smu',
+    'central florida': 'ucf',
+    'virginia commonwealth': 'vcu',
+    'nevada las vegas': 'unlv',
+    'miami': 'miami fl',
+    'miami florida': 'miami fl',
+    'miami ohio': 'miami oh',
+    'southern mississippi': 'southern miss',
+    'pitt': 'pittsburgh',
+    'umass': 'massachusetts',
+    'uic': 'illinois chicago',
+    'florida international': 'fiu',
+    'alabama birmingham': 'uab',
+    'texas el paso': 'utep',
+    'texas san antonio': 'utsa',
+    'omaha': 'nebraska omaha',
+    'mount state marys': 'mount saint marys',
+    'texas a and m corpus christi': 'texas a and m corpus chris',
+}
+
+
 def load_data(filepath, **kwargs):
     """
     Load data from various file formats
@@ -49,16 +83,164 @@ def validate_team_data(data, required_columns):
 def normalize_team_name(name):
     """
     Normalize team names for consistency
-    
+
+    Lowercases, strips accents and punctuation, reads a leading "St." as
+    Saint and any other "St." as State, then applies TEAM_ALIASES, so
+    "St. John's", "Saint John's" and "ST JOHNS" share one key.
+
     Args:
         name: Raw team name
-        
+
     Returns:
-        str: Normalized team name
+        str: Normalized team name (lookup key)
     """
-    # TODO: Implement normalization
-    # Handle common variations, abbreviations, etc.
-    return name.strip().title()
+    key = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode().lower()
+    key = re.sub(r"[.'`]", '', key.replace('&', ' and '))
+    words = re.sub(r'[^a-z0-9]+', ' ', key).split()
+    words = [('saint' if i == 0 else 'state') if w == 'st' else w for i, w in enumerate(words)]
+    key = ' '.join(words)
+    return TEAM_ALIASES.get(key, key)
+
+
+def _name_grams(key, n=3):
+    padded = f' {key} '
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class TeamNameIndex:
+    """
+    Canonical team identities for joining sources that spell names differently
+
+    Every canonical name is stored under its normalized key (dict lookup, so
+    resolving a name is O(1) on average), and raw spellings are memoized.
+    A character trigram index over the keys proposes close matches when a
+    name cannot be resolved.
+    """
+
+    def __init__(self, names):
+        """
+        Args:
+            names: Canonical team names; their order defines positions
+
+        Raises:
+            ValueError: If two different names share a normalized key
+        """
+        self.names = pd.Index(pd.unique(pd.Series(list(names), dtype=object).dropna()))
+        self._positions = {}
+        self._grams = {}
+        for position, name in enumerate(self.names):
+            key = normalize_team_name(name)
+            if key in self._positions:
+                other = self.names[self._positions[key]]
+                raise ValueError(f"Team names '{other}' and '{name}' are indistinguishable")
+            self._positions[key] = position
+
+        # Suggestions also match the alias spellings of indexed teams
+        self._spellings = list(self._positions.items())
+        self._spellings += [(alias, self._positions[key]) for alias, key in TEAM_ALIASES.items()
+                            if key in self._positions]
+        for spelling, (key, _) in enumerate(self._spellings):
+            for gram in _name_grams(key):
+                self._grams.setdefault(gram, []).append(spelling)
+        self._seen = {}
+
+    # Raw spellings remembered per index; API input is unbounded
+    SEEN_LIMIT = 100000
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return self.get_position(name) >= 0
+
+    def get_position(self, name):
+        """
+        Position of a team name, -1 if it does not resolve
+        """
+        position = self._seen.get(name)
+        if position is None:
+            position = self._positions.get(normalize_team_name(name), -1) if isinstance(name, str) else -1
+            if len(self._seen) < self.SEEN_LIMIT:
+                self._seen[name] = position
+        return position
+
+    def suggest(self, name, n=3, min_score=0.3):
+        """
+        Closest canonical names by trigram overlap
+
+        Args:
+            name: Raw team name
+            n: Maximum number of suggestions
+            min_score: Minimum Dice similarity of the trigram sets
+
+        Returns:
+            list: Canonical names, best match first
+        """
+        grams = _name_grams(normalize_team_name(name))
+        shared = Counter(spelling for gram in grams for spelling in self._grams.get(gram, ()))
+        best = {}
+        for spelling, count in shared.items():
+            key, position = self._spellings[spelling]
+            score = 2 * count / (len(grams) + len(_name_grams(key)))
+            if score >= min_score and score > best.get(position, 0):
+                best[position] = score
+        ranked = sorted(best, key=lambda position: (-best[position], position))
+        return [self.names[position] for position in ranked[:n]]
+
+    def _unresolved_error(self, names):
+        details = []
+        for name in names:
+            suggestions = self.suggest(name)
+            hint = f" (did you mean {', '.join(suggestions)}?)" if suggestions else ''
+            details.append(f"'{name}'{hint}")
+        return KeyError(f"Unknown teams: {'; '.join(details)}")
+
+    def position(self, name):
+        """
+        Position of a team name
+
+        Raises:
+            KeyError: If the name does not resolve; the message suggests
+                close matches
+        """
+        position = self.get_position(name)
+        if position < 0:
+            raise self._unresolved_error([name])
+        return position
+
+    def positions(self, names, strict=True):
+        """
+        Positions of many team names
+
+        Args:
+            names: Raw team names
+            strict: If True, raise for names that do not resolve; otherwise
+                return -1 for them
+
+        Returns:
+            ndarray: Positions
+
+        Raises:
+            KeyError: In strict mode, listing every unresolved name with
+                suggested matches
+        """
+        # Materialized first: names may be a one-shot iterator, and strict
+        # mode reads it again to report the unresolved names
+        names = list(names)
+        positions = np.fromiter((self.get_position(name) for name in names), dtype=int, count=len(names))
+        if strict and (positions < 0).any():
+            unknown = list(dict.fromkeys(names[i] for i in np.flatnonzero(positions < 0)))
+            raise self._unresolved_error(unknown)
+        return positions
+
+    def resolve(self, name):
+        """
+        Canonical spelling of a team name
+
+        Raises:
+            KeyError: If the name does not resolve
+        """
+        return self.names[self.position(name)]
 
 
 def get_region_from_seed(seed, num_regions=4):
@@ -0,0 +1,97 @@
+"""
+Backtest the women's tournament pipeline on past seasons
+For each season, rebuilds the bracket and runs the probability engine with
+composites, tiers and matchup models trained only on earlier seasons, then
+scores the result against actual finishes
+"""
+import pandas as pd
+import os
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from backtest import backtest_seasons
+from womens_composite_tier_models import saved_tier_centroids
+
+parser = argparse.ArgumentParser(description="Backtest the women's tournament pipeline")
+parser.add_argument('--seasons', type=int, nargs='*', help='Seasons to replay (default: all with prior data)')
+parser.add_argument('--n-jobs', type=int, default=-1, help='Worker processes (-1 uses all cores)')
+parser.add_argument('--no-cache', action='store_true', help='Recompute every season')
+args = parser.parse_args()
+
+print("="*80)
+print("BACKTESTING WOMEN'S TOURNAMENT PREDICTIONS")
+print("="*80 + "\n")
+
+# Setup paths
+script_dir = os.path.dirname(os.path.abspath(__file__))
+data_dir = os.path.join(script_dir, '..', 'data', 'women')
+models_dir = os.path.join(script_dir, '..', 'models')
+cache_dir = None if args.no_cache else os.path.join(script_dir, '..', 'cache', 'backtest')
+Path(models_dir).mkdir(parents=True, exist_ok=True)
+
+# ============================================================================
+# STEP 1: LOAD DATA
+# ============================================================================
+print("STEP 1: Loading historical data")
+print("-" * 80 + "\n")
+
+historical_teams = pd.read_csv(os.path.join(data_dir, 'women_teams_historical.csv'))
+torvik = pd.read_csv(os.path.join(data_dir, 'women_torvik_historical.csv'), encoding='utf-8-sig')
+training = pd.read_csv(os.path.join(data_dir, 'women_matchups_training.csv'))
+games = pd.read_csv(os.path.join(data_dir, 'women_games_historical.csv'))
+template = pd.read_csv(os.path.join(data_dir, 'bracket_template.csv'))
+
+print(f"✓ Loaded {len(historical_teams)} tournament teams")
+print(f"✓ Loaded {len(training)} training matchups")
+print(f"✓ Loaded {len(games)} game records\n")
+
+# Every replayed season needs at least one earlier season to train on
+first_season = training['year'].min()
+seasons = args.seasons or sorted(y for y in historical_teams['year'].unique() if y > first_season)
+print(f"Seasons to replay: {seasons}\n")
+
+# ============================================================================
+# STEP 2: REPLAY SEASONS
+# ============================================================================
+print("STEP 2: Replaying seasons in parallel")
+print("-" * 80 + "\n")
+
+# Number each season's tiers like the production model's
+tier_centers = saved_tier_centroids(os.path.join(models_dir, 'womens_predictor.joblib'))
+
+summary, rounds, teams = backtest_seasons(
+    seasons, historical_teams, torvik, training, games, template,
+    tier_centers=tier_centers, n_jobs=args.n_jobs, cache_dir=cache_dir
+)
+
+print("✓ Replayed all seasons\n")
+
+# ============================================================================
+# STEP 3: REPORT
+# ============================================================================
+print("STEP 3: Results")
+print("-" * 80 + "\n")
+
+print("Bracket results (1/2/4/8/16/32 scoring):")
+print(summary.to_string(index=False, float_format='%.3f'))
+
+print("\nLog loss by round (P(team wins its game in that round)):")
+print(rounds.pivot(index='round', columns='year', values='log_loss')
+      .reindex(rounds['round'].unique()).to_string(float_format='%.4f'))
+
+summary_path = os.path.join(models_dir, 'womens_backtest_summary.csv')
+rounds_path = os.path.join(models_dir, 'womens_backtest_rounds.csv')
+teams_path = os.path.join(models_dir, 'womens_backtest_teams.csv')
+summary.to_csv(summary_path, index=False)
+rounds.to_csv(rounds_path, index=False)
+teams.to_csv(teams_path, index=False)
+
+print("\n" + "="*80)
+print("COMPLETE!")
+print("="*80)
+print("\nOutput files:")
+print(f"  1. {summary_path}")
+print(f"  2. {rounds_path}")
+print(f"  3. {teams_path}")
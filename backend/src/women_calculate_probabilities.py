@@ -5,11 +5,36 @@ Uses trained matchup models with proper pairwise probability normalization
 import pandas as pd
 import numpy as np
 import os
+import sys
+import argparse
 import joblib
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from matchup_models import (EARLY_FEATURES, ELITE_FEATURES,
+                            BRACKET_EARLY_ROUNDS, BRACKET_ELITE_ROUNDS,
+                            load_elite_params, bootstrap_matchup_probabilities)
+from probabilities import (ROUND_ORDER, ADVANCEMENT_COLUMNS, BRACKET_POINTS,
+                           calculate_head_to_head_probability,
+                           normalize_pairwise_probabilities, build_round_matrices,
+                           calculate_advancement_probabilities)
+from scoring import SCORING_SCHEMES, calculate_bracket_values
+from utils import TeamNameIndex
+from instrumentation import RunRecorder
+
+parser = argparse.ArgumentParser(description="Calculate women's tournament probabilities")
+parser.add_argument('--ensemble', type=int, default=0, metavar='B',
+                    help='Also train B bootstrap model replicas for credible intervals')
+parser.add_argument('--interval', type=float, default=0.9, help='Credible interval width')
+parser.add_argument('--n-jobs', type=int, default=-1, help='Worker processes for the ensemble')
+parser.add_argument('--seed', type=int, default=42, help='Random seed for the ensemble')
+parser.add_argument('--schemes', default=','.join(SCORING_SCHEMES),
+                    help='Comma-separated scoring schemes for women_bracket_values.csv')
+args = parser.parse_args()
+
 print("="*80)
 print("CALCULATING WOMEN'S TOURNAMENT PROBABILITIES")
 print("="*80 + "\n")
+run = RunRecorder(__file__, params=vars(args))
 
 # Setup paths
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -19,18 +44,27 @@ models_dir = os.path.join(script_dir, '..', 'models')
 # ============================================================================
 # STEP 1: LOAD MODELS
 # ============================================================================
+run.step("Load models")
 print("STEP 1: Loading trained matchup models")
 print("-" * 80 + "\n")
 
-early_model = joblib.load(os.path.join(models_dir, 'womens_early_rounds.joblib'))
-elite_model = joblib.load(os.path.join(models_dir, 'womens_elite_rounds.joblib'))
+early_path = os.path.join(models_dir, 'womens_early_rounds.joblib')
+elite_path = os.path.join(models_dir, 'womens_elite_rounds.joblib')
+use_models = os.path.exists(early_path) and os.path.exists(elite_path)
 
-print("✓ Loaded early rounds model (Logistic Regression + Platt)")
-print("✓ Loaded elite rounds model (XGBoost + Platt)\n")
+if use_models:
+    early_model = joblib.load(early_path)
+    elite_model = joblib.load(elite_path)
+    print("✓ Loaded early rounds model (Logistic Regression + Platt)")
+    print("✓ Loaded elite rounds model (XGBoost + Platt)\n")
+else:
+    print("⚠ Matchup models not found - falling back to the log5 rating model")
+    print("  Run women_train_matchup_models.py for model-based probabilities\n")
 
 # ============================================================================
 # STEP 2: LOAD MATCHUP DATA
 # ============================================================================
+run.step("Load matchups")
 print("STEP 2: Loading matchup data")
 print("-" * 80 + "\n")
 
@@ -47,86 +81,52 @@ print(f"✓ Found {matchups['game_id'].nunique()} unique games\n")
 # ============================================================================
 # STEP 3: PREDICT WIN PROBABILITIES FOR ALL MATCHUPS
 # ============================================================================
+run.step("Predict win probabilities")
 print("STEP 3: Predicting win probabilities for all matchups")
 print("-" * 80 + "\n")
 
 # Features for each model
-early_features = ['barthag', 'adj_oe', 'adj_de', 'orb_pct', 'drb_pct', 'ftr', '2p_pct']
-elite_features = ['wab', 'barthag', 'adj_oe', 'adj_de', 'efg_pct', 'efgd_pct',
-                  'orb_pct', 'drb_pct', '2p_pct', '2pd_pct', '3p_pct', '3pd_pct', '3pr']
+early_features = EARLY_FEATURES
+elite_features = ELITE_FEATURES
 
 # Round names
-early_rounds = ['Round 1', 'Round 2']
-elite_rounds = ['Sweet 16', 'Elite Eight', 'Final Four', 'Championship']
+early_rounds = BRACKET_EARLY_ROUNDS
+elite_rounds = BRACKET_ELITE_ROUNDS
 
 # Add win probability column
 matchups['win_prob_raw'] = 0.0
 
-# Predict for early rounds
-early_mask = matchups['round'].isin(early_rounds)
-if early_mask.sum() > 0:
-    X_early = matchups.loc[early_mask, early_features]
-    matchups.loc[early_mask, 'win_prob_raw'] = early_model.predict_proba(X_early)[:, 1]
-    print(f"✓ Predicted {early_mask.sum()} early round matchups")
-
-# Predict for elite rounds
-elite_mask = matchups['round'].isin(elite_rounds)
-if elite_mask.sum() > 0:
-    X_elite = matchups.loc[elite_mask, elite_features]
-    matchups.loc[elite_mask, 'win_prob_raw'] = elite_model.predict_proba(X_elite)[:, 1]
-    print(f"✓ Predicted {elite_mask.sum()} elite round matchups\n")
+if use_models:
+    # Predict for early rounds
+    early_mask = matchups['round'].isin(early_rounds)
+    if early_mask.sum() > 0:
+        X_early = matchups.loc[early_mask, early_features]
+        matchups.loc[early_mask, 'win_prob_raw'] = early_model.predict_proba(X_early)[:, 1]
+        print(f"✓ Predicted {early_mask.sum()} early round matchups")
+    
+    # Predict for elite rounds
+    elite_mask = matchups['round'].isin(elite_rounds)
+    if elite_mask.sum() > 0:
+        X_elite = matchups.loc[elite_mask, elite_features]
+        matchups.loc[elite_mask, 'win_prob_raw'] = elite_model.predict_proba(X_elite)[:, 1]
+        print(f"✓ Predicted {elite_mask.sum()} elite round matchups\n")
+else:
+    # Closed-form log5 on barthag from the raw (non-inverted) team stats
+    team_stats = pd.read_csv(os.path.join(data_dir, 'women_teams_enriched.csv')).set_index('team')
+    matchups['win_prob_raw'] = calculate_head_to_head_probability(
+        team_stats.reindex(matchups['team']), team_stats.reindex(matchups['opponent'])
+    )
+    print(f"✓ Rated {len(matchups)} matchups with log5\n")
 
 # ============================================================================
 # STEP 4: NORMALIZE PROBABILITIES PAIRWISE
 # ============================================================================
+run.step("Normalize pairwise")
 print("STEP 4: Normalizing probabilities for opposing perspectives")
 print("-" * 80 + "\n")
 
-matchups['win_prob'] = 0.0
-matchups['normalized'] = False
-
-# For each matchup, find its reverse and normalize the pair
-for idx in matchups.index:
-    # Skip if already normalized
-    if matchups.at[idx, 'normalized']:
-        continue
-    
-    row = matchups.loc[idx]
-    team = row['team']
-    opponent = row['opponent']
-    game_id = row['game_id']
-    
-    # Find reverse matchup (opponent vs team, same game_id)
-    reverse = matchups[
-        (matchups['game_id'] == game_id) &
-        (matchups['team'] == opponent) &
-        (matchups['opponent'] == team)
-    ]
-    
-    if len(reverse) == 0:
-        # No reverse found, just use raw probability
-        matchups.at[idx, 'win_prob'] = matchups.at[idx, 'win_prob_raw']
-        matchups.at[idx, 'normalized'] = True
-        continue
-    
-    reverse_idx = reverse.index[0]
-    
-    # Normalize the pair
-    prob1 = matchups.at[idx, 'win_prob_raw']
-    prob2 = matchups.at[reverse_idx, 'win_prob_raw']
-    total = prob1 + prob2
-    
-    if total > 0:
-        matchups.at[idx, 'win_prob'] = prob1 / total
-        matchups.at[reverse_idx, 'win_prob'] = prob2 / total
-    else:
-        matchups.at[idx, 'win_prob'] = 0.5
-        matchups.at[reverse_idx, 'win_prob'] = 0.5
-    
-    matchups.at[idx, 'normalized'] = True
-    matchups.at[reverse_idx, 'normalized'] = True
-
-matchups = matchups.drop(columns=['normalized'])
+# Each matchup and its reverse (opponent vs team, same game_id) sum to 1
+matchups['win_prob'] = normalize_pairwise_probabilities(matchups, raw_col='win_prob_raw')
 
 print("✓ Normalized all pairwise probabilities")
 
@@ -150,6 +150,7 @@ print(f"✓ Saved to: {matchups_output}\n")
 # ============================================================================
 # STEP 5: CALCULATE ADVANCEMENT PROBABILITIES
 # ============================================================================
+run.step("Advancement probabilities")
 print("STEP 5: Calculating advancement probabilities")
 print("-" * 80 + "\n")
 
@@ -159,149 +160,74 @@ composites = pd.read_csv(os.path.join(data_dir, 'women_composites_current.csv'))
 # Get unique teams
 teams = composites['team'].unique()
 
-# Initialize probability dictionary
-probs = {team: {} for team in teams}
-
-# Everyone starts in Round 1 with 100% probability
-for team in teams:
-    probs[team]['Round 1'] = 1.0
-
-# Round progression
-round_progression = [
-    ('Round 1', 'Round 2', 'Round 1'),
-    ('Round 2', 'Sweet 16', 'Round 2'),
-    ('Sweet 16', 'Elite Eight', 'Sweet 16'),
-    ('Elite Eight', 'Final Four', 'Elite Eight'),
-    ('Final Four', 'Championship', 'Final Four')
-]
+# Dense per-round win probability matrices (0 where two teams cannot meet)
+round_matrices = build_round_matrices(matchups, teams, rounds=ROUND_ORDER, prob_col='win_prob')
 
+# Everyone starts in Round 1 with 100% probability; each round a team
+# advances with P(reach) * sum over opponents of P(opponent reaches) * P(win)
 print("Calculating round-by-round probabilities...")
+reach = calculate_advancement_probabilities(round_matrices)
 
-# Process each round
-for current_round, next_round, matchup_round in round_progression:
+for r, (current_round, next_round) in enumerate(zip(ROUND_ORDER[:-1], ROUND_ORDER[1:])):
     print(f"  Processing {current_round} -> {next_round}")
-    
-    # For each team, calculate probability of advancing
-    for team in teams:
-        p_team_current = probs[team][current_round]
-        
-        if p_team_current == 0:
-            probs[team][next_round] = 0.0
-            continue
-        
-        # Get matchups for current round
-        team_matchups = matchups[
-            (matchups['team'] == team) & 
-            (matchups['round'] == matchup_round)
-        ]
-        
-        if len(team_matchups) == 0:
-            probs[team][next_round] = 0.0
-            continue
-        
-        # Calculate probability of advancing
-        advance_prob = 0.0
-        
-        for _, matchup in team_matchups.iterrows():
-            opponent = matchup['opponent']
-            p_opponent_current = probs[opponent][current_round]
-            p_team_wins = matchup['win_prob']
-            
-            advance_prob += p_opponent_current * p_team_wins
-        
-        probs[team][next_round] = p_team_current * advance_prob
-    
     # Verify probability conservation
-    total_prob = sum(probs[team][next_round] for team in teams)
-    print(f"    Total probability in {next_round}: {total_prob:.4f}")
+    print(f"    Total probability in {next_round}: {reach[r + 1].sum():.4f}")
 
 print("\n✓ Calculated advancement probabilities\n")
 
 # ============================================================================
 # STEP 6: CALCULATE CHAMPION PROBABILITIES
 # ============================================================================
+run.step("Champion probabilities")
 print("STEP 6: Calculating champion probabilities")
 print("-" * 80 + "\n")
 
-champion_probs = {}
-
-for team in teams:
-    p_in_final = probs[team]['Championship']
-    
-    if p_in_final == 0:
-        champion_probs[team] = 0.0
-        continue
-    
-    # Get all possible championship matchups
-    final_matchups = matchups[
-        (matchups['team'] == team) & 
-        (matchups['round'] == 'Championship')
-    ]
-    
-    # Calculate probability of winning championship
-    win_prob = 0.0
-    
-    for _, matchup in final_matchups.iterrows():
-        opponent = matchup['opponent']
-        p_opponent_final = probs[opponent]['Championship']
-        p_team_wins = matchup['win_prob']
-        
-        win_prob += p_opponent_final * p_team_wins
-    
-    champion_probs[team] = p_in_final * win_prob
+# Winning the Championship game is the final step of the same recursion
+champion_probs = reach[len(ROUND_ORDER)]
 
 print("✓ Calculated champion probabilities")
-total_champion_prob = sum(champion_probs.values())
+total_champion_prob = champion_probs.sum()
 print(f"✓ Total champion probability: {total_champion_prob:.4f} (should be 1.0)\n")
 
 # ============================================================================
 # STEP 7: UPDATE COMPOSITE DATA
 # ============================================================================
+run.step("Update composites")
 print("STEP 7: Updating composite data")
 print("-" * 80 + "\n")
 
-# Map round names to column names
-round_to_col = {
-    'Round 2': 'round_2_prob',
-    'Sweet 16': 'sweet_16_prob',
-    'Elite Eight': 'elite_8_prob',
-    'Final Four': 'final_4_prob',
-    'Championship': 'championship_prob',
-}
-
-# Initialize columns
-for col in round_to_col.values():
-    composites[col] = 0.0
-composites['champion_prob'] = 0.0
-
-# Fill probabilities
-for idx, row in composites.iterrows():
-    team = row['team']
-    
-    for round_name, col_name in round_to_col.items():
-        composites.at[idx, col_name] = probs[team][round_name]
-    
-    composites.at[idx, 'champion_prob'] = champion_probs[team]
+# Map teams to matrix rows; reach[k] is the probability of winning k games
+team_rows = TeamNameIndex(teams).positions(composites['team'])
+for k, col_name in enumerate(ADVANCEMENT_COLUMNS, start=1):
+    composites[col_name] = reach[k, team_rows]
 
 print("✓ Updated composite data\n")
 
 # ============================================================================
 # STEP 8: CALCULATE BRACKET VALUE
 # ============================================================================
+run.step("Bracket value")
 print("STEP 8: Calculating bracket value")
 print("-" * 80 + "\n")
 
-# Bracket value = expected points
-composites['bracket_value'] = (
-    composites['round_2_prob'] * 1 +
-    composites['sweet_16_prob'] * 2 +
-    composites['elite_8_prob'] * 4 +
-    composites['final_4_prob'] * 8 +
-    composites['championship_prob'] * 16 +
-    composites['champion_prob'] * 32
-).round(2)
+# Bracket value = expected points; every scheme is one row of the round
+# weight matrix, so all of them come out of a single product with reach
+scheme_names = list(dict.fromkeys(['standard'] + [name for name in args.schemes.split(',') if name]))
+unknown = [name for name in scheme_names if name not in SCORING_SCHEMES]
+if unknown:
+    parser.error(f"unknown scoring schemes: {', '.join(unknown)}")
+
+team_seeds = composites.drop_duplicates('team').set_index('team')['seed'].reindex(teams).to_numpy()
+values = calculate_bracket_values(reach, team_seeds,
+                                  [SCORING_SCHEMES[name] for name in scheme_names],
+                                  round_matrices)
+
+bracket_values = composites[['team', 'region', 'seed']].copy()
+for name, scheme_values in zip(scheme_names, values):
+    bracket_values[name] = scheme_values[team_rows].round(2)
+composites['bracket_value'] = bracket_values['standard']
 
-print("✓ Calculated bracket values\n")
+print(f"✓ Calculated bracket values under {len(scheme_names)} scoring schemes\n")
 
 print("Top 10 Teams by Bracket Value:")
 top_10 = composites.nlargest(10, 'bracket_value')[
@@ -314,6 +240,7 @@ print(f"\n✓ Total champion probability: {composites['champion_prob'].sum():.4f
 # ============================================================================
 # STEP 9: SAVE RESULTS
 # ============================================================================
+run.step("Save results")
 print("\n" + "="*80)
 print("STEP 9: Saving results")
 print("-" * 80 + "\n")
@@ -335,6 +262,57 @@ historical_output = os.path.join(data_dir, 'women_composites_historical.csv')
 historical.to_csv(historical_output, index=False)
 print(f"✓ Saved: {historical_output}")
 
+values_output = os.path.join(data_dir, 'women_bracket_values.csv')
+bracket_values.to_csv(values_output, index=False)
+print(f"✓ Saved: {values_output}")
+
+# ============================================================================
+# STEP 10: BOOTSTRAP CREDIBLE INTERVALS (OPTIONAL)
+# ============================================================================
+intervals_output = None
+if args.ensemble > 0:
+    run.step("Bootstrap ensemble")
+    print("\n" + "="*80)
+    print(f"STEP 10: Bootstrap ensemble ({args.ensemble} replicas)")
+    print("-" * 80 + "\n")
+    
+    training = pd.read_csv(os.path.join(data_dir, 'women_matchups_training.csv'))
+    
+    # Every replica fits and predicts in its own worker: (B, n_matchups)
+    raw_samples = bootstrap_matchup_probabilities(
+        training, matchups, n_replicas=args.ensemble,
+        elite_params=load_elite_params(models_dir), n_jobs=args.n_jobs, seed=args.seed
+    )
+    print(f"✓ Trained and predicted {args.ensemble} model replicas")
+    
+    # Same normalization and recursion as STEPS 4-6, batched over replicas
+    prob_samples = normalize_pairwise_probabilities(matchups, raw=raw_samples)
+    round_samples = build_round_matrices(matchups, teams, rounds=ROUND_ORDER, probs=prob_samples)
+    reach_samples = calculate_advancement_probabilities(round_samples)
+    value_samples = np.einsum('bkt,k->bt', reach_samples[:, 1:, :], np.array(BRACKET_POINTS))
+    print(f"✓ Propagated {args.ensemble} probability sets through the bracket")
+    
+    tail = (1 - args.interval) / 2
+    intervals = composites[['team', 'region', 'seed']].copy()
+    for k, col_name in enumerate(ADVANCEMENT_COLUMNS + ['bracket_value'], start=1):
+        samples = value_samples if col_name == 'bracket_value' else reach_samples[:, k, :]
+        samples = samples[:, team_rows]
+        intervals[col_name] = composites[col_name]
+        intervals[f'{col_name}_mean'] = samples.mean(axis=0)
+        intervals[f'{col_name}_lower'] = np.quantile(samples, tail, axis=0)
+        intervals[f'{col_name}_upper'] = np.quantile(samples, 1 - tail, axis=0)
+    
+    print(f"\nTop 10 champion probabilities ({args.interval:.0%} credible interval):")
+    top_10 = intervals.nlargest(10, 'champion_prob')
+    for _, row in top_10.iterrows():
+        print(f"  {row['team']:<20} {row['champion_prob']:.3f} "
+              f"[{row['champion_prob_lower']:.3f}, {row['champion_prob_upper']:.3f}]")
+    
+    intervals_output = os.path.join(data_dir, 'women_probability_intervals.csv')
+    intervals.to_csv(intervals_output, index=False)
+    print(f"\n✓ Saved: {intervals_output}")
+run.finish()
+
 # ============================================================================
 # COMPLETE
 # ============================================================================
@@ -345,4 +323,7 @@ print("\nOutput files:")
 print(f"  1. {matchups_output}")
 print(f"  2. {current_output}")
 print(f"  3. {historical_output}")
+print(f"  4. {values_output}")
+if intervals_output:
+    print(f"  5. {intervals_output}")
 print("\nReady for API integration!")
\ No newline at end of file
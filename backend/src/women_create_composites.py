@@ -5,16 +5,24 @@ Trains models on historical data (2021-2025), then applies to all teams (2021-20
 import pandas as pd
 import os
 import joblib
+import argparse
 from pathlib import Path
 import sys
 
 # Add parent directory to path to import models
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from womens_composite_tier_models import NCAAPredictor
+from womens_composite_tier_models import NCAAPredictor, saved_tier_centroids
+from instrumentation import RunRecorder
+
+parser = argparse.ArgumentParser(description="Generate women's composite scores and tiers")
+parser.add_argument('--incremental', action='store_true',
+                    help='Update the saved tier model with new seasons only instead of refitting it')
+args = parser.parse_args()
 
 print("="*80)
 print("WOMEN'S BASKETBALL COMPOSITE SCORES & TIERS")
 print("="*80 + "\n")
+run = RunRecorder(__file__, params=vars(args))
 
 # Setup paths
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -25,9 +33,18 @@ Path(models_dir).mkdir(parents=True, exist_ok=True)
 # ============================================================================
 # STEP 1: TRAIN MODELS ON HISTORICAL DATA (2021-2025)
 # ============================================================================
+run.step("Train tier models")
 print("STEP 1: Training models on historical data (2021-2025)")
 print("-" * 80)
 
+model_path = os.path.join(models_dir, 'womens_predictor.joblib')
+saved_predictor = None
+if args.incremental and os.path.exists(model_path):
+    saved_predictor = joblib.load(model_path)
+    if getattr(saved_predictor, 'tier_counts', None) is None:
+        print("⚠ Saved model has no incremental tier state, refitting tier model")
+        saved_predictor = None
+
 predictor = NCAAPredictor(historical_data_path=data_dir)
 
 print("Loading historical data...")
@@ -39,22 +56,39 @@ predictor.load_historical_data(
 print("\nTraining composite scoring model...")
 predictor.train_composite_model()
 
-print("\nTraining tier clustering model...")
-predictor.train_tier_model()
+if saved_predictor is not None:
+    # Reuse the stored tier clusters and only fold in unseen seasons
+    predictor.kmeans_model = saved_predictor.kmeans_model
+    predictor.scalers['tier'] = saved_predictor.scalers['tier']
+    predictor.tier_counts = saved_predictor.tier_counts
+    predictor.tier_seasons = saved_predictor.tier_seasons
+    
+    new_seasons = sorted(set(predictor.historical_data['year']) - set(predictor.tier_seasons))
+    if new_seasons:
+        print(f"\nUpdating tier clustering model with seasons: {new_seasons}")
+        new_data = predictor.historical_data[predictor.historical_data['year'].isin(new_seasons)]
+        predictor.update_tier_model(new_data)
+    else:
+        print("\n✓ Tier clustering model already includes all seasons")
+else:
+    # Keep the saved model's cluster numbering so tier labels stay stable
+    print("\nTraining tier clustering model...")
+    predictor.train_tier_model(reference_centers=saved_tier_centroids(model_path))
 
 # Save trained model
-model_path = os.path.join(models_dir, 'womens_predictor.joblib')
 joblib.dump(predictor, model_path)
 print(f"\n✓ Saved trained model to: {model_path}")
 
 # ============================================================================
 # STEP 2: GENERATE HISTORICAL COMPOSITES (2021-2025)
 # ============================================================================
+run.step("Historical composites")
 print("\n" + "="*80)
 print("STEP 2: Generating composite scores for historical data (2021-2025)")
 print("-" * 80)
 
-historical_with_scores = predictor.batch_predict(predictor.historical_data)
+# Score each season independently so percentile rankings are within-season
+historical_with_scores = predictor.batch_predict_by_season(predictor.historical_data)
 
 historical_output = pd.DataFrame({
     'year': historical_with_scores['year'].astype(int),
@@ -73,6 +107,7 @@ print(f"✓ Generated scores for {len(historical_output)} historical teams")
 # ============================================================================
 # STEP 3: GENERATE CURRENT COMPOSITES (2026)
 # ============================================================================
+run.step("Current composites")
 print("\n" + "="*80)
 print("STEP 3: Generating composite scores for 2026 tournament teams")
 print("-" * 80)
@@ -125,6 +160,7 @@ for tier in ['S', 'A', 'B', 'C', 'D']:
 # ============================================================================
 # STEP 4: COMBINE HISTORICAL + CURRENT FOR SCATTERPLOT
 # ============================================================================
+run.step("Combined historical dataset")
 print("\n" + "="*80)
 print("STEP 4: Creating combined historical dataset (2021-2026)")
 print("-" * 80)
@@ -152,6 +188,7 @@ print(f"✓ Saved to: {historical_path}")
 print(f"  Total teams: {len(combined)}")
 print(f"  2021-2025: {len(combined[combined['year'] < 2026])} teams")
 print(f"  2026: {len(combined[combined['year'] == 2026])} teams")
+run.finish()
 
 # ============================================================================
 # COMPLETE
@@ -5,17 +5,24 @@ Saves to data/women/ subfolder
 import pandas as pd
 import numpy as np
 import os
+import sys
 import csv
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from instrumentation import RunRecorder
+from utils import TeamNameIndex
+
 print("="*80)
 print("COMBINING BART TORVIK WOMEN'S DATA FILES")
 print("="*80 + "\n")
+run = RunRecorder(__file__)
 
 # Get the directory where this script is located
 script_dir = os.path.dirname(os.path.abspath(__file__))
 data_dir = os.path.join(script_dir, '..', 'data', 'women')
 
 # Load files
+run.step("Load source files")
 print("Loading files...")
 
 # Read fffinal manually because it's malformed
@@ -57,7 +64,23 @@ print(f"✓ fffinal: {fffinal.shape}")
 print(f"✓ team_results: {team_results.shape}")
 print(f"✓ tournament_teams: {tournament_teams.shape}\n")
 
+# Rename each source's spelling of a tournament team to the tournament name;
+# a tournament team missing from either source stops the build
+run.step("Resolve team names")
+print("Resolving tournament team names...")
+for source_name, source in [('2026_team_results.csv', team_results), ('2026_fffinal.csv', fffinal)]:
+    source_names = TeamNameIndex(source['team'])
+    try:
+        spellings = source_names.names[source_names.positions(tournament_teams['team'])]
+    except KeyError as e:
+        sys.exit(f"\n⚠ ERROR: tournament teams not found in {source_name}. {e.args[0]}")
+    renames = {old: new for old, new in zip(spellings, tournament_teams['team']) if old != new}
+    source['team'] = source['team'].replace(renames)
+    print(f"✓ {source_name}: {len(spellings)} teams resolved ({len(renames)} renamed)")
+print()
+
 # Filter to only tournament teams first
+run.step("Combine and map columns")
 tournament_team_list = tournament_teams['team'].tolist()
 team_results_filtered = team_results[team_results['team'].isin(tournament_team_list)]
 
@@ -70,17 +93,6 @@ combined = pd.merge(
 
 print(f"✓ Combined Torvik data: {combined.shape}\n")
 
-# Check for missing teams
-tournament_team_names = set(tournament_teams['team'])
-merged_team_names = set(combined['team'])
-missing_teams = tournament_team_names - merged_team_names
-
-if missing_teams:
-    print(f"\n⚠ WARNING: {len(missing_teams)} teams from tournament list not found in Torvik data:")
-    for team in missing_teams:
-        print(f"  - {team}")
-    print()
-
 # Map to model column names
 print("Mapping to model column names...")
 
@@ -126,6 +138,7 @@ output = pd.merge(
 print(f"✓ Added seeds and regions\n")
 
 # Save
+run.step("Save")
 output_file = os.path.join(data_dir, 'women_teams_enriched.csv')
 output.to_csv(output_file, index=False)
 
@@ -134,6 +147,7 @@ print(f"✓ Total teams: {len(output)}")
 print(f"✓ Teams with seeds: {output['seed'].notna().sum()}")
 print(f"✓ Teams without seeds: {output['seed'].isna().sum()}")
 print(f"✓ Total columns: {len(output.columns)}")
+run.finish()
 
 print("\n" + "="*80)
 print("COMPLETE!")
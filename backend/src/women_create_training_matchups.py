@@ -0,0 +1,87 @@
+"""
+Build historical matchup training data for women's basketball
+Joins tournament games to Torvik stats (team_id -> torvik_id) and creates differentials
+Only seasons not already in women_matchups_training.csv are processed
+
+Rows are written in canonical order (season, round, region, teams), so an
+incremental build and a --rebuild give the same file. The checked-in file
+predates that order: its rows match a rebuild, but the first build rewrites
+it in canonical order (the training script sorts the same way before its
+seeded split, so the models do not depend on the file's row order).
+"""
+import pandas as pd
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from matchup_features import STAT_COLS, invert_defensive_stats, build_game_matchups, sort_training_matchups
+
+parser = argparse.ArgumentParser(description="Build women_matchups_training.csv from historical games")
+parser.add_argument('--rebuild', action='store_true', help='Rebuild every season from scratch')
+args = parser.parse_args()
+
+print("="*80)
+print("CREATING WOMEN'S HISTORICAL MATCHUP TRAINING DATA")
+print("="*80 + "\n")
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+data_dir = os.path.join(script_dir, '..', 'data', 'women')
+output_path = os.path.join(data_dir, 'women_matchups_training.csv')
+
+print("Loading files...")
+games = pd.read_csv(os.path.join(data_dir, 'women_games_historical.csv'))
+teams = pd.read_csv(os.path.join(data_dir, 'women_teams_historical.csv'))
+torvik = pd.read_csv(os.path.join(data_dir, 'women_torvik_historical.csv'), encoding='utf-8-sig')
+
+print(f"✓ Games: {games.shape}")
+print(f"✓ Tournament teams: {teams.shape}")
+print(f"✓ Torvik stats: {torvik.shape}\n")
+
+# Find seasons that still need to be built
+existing = None
+if os.path.exists(output_path) and not args.rebuild:
+    existing = pd.read_csv(output_path)
+    built_seasons = set(existing['year'].unique())
+else:
+    built_seasons = set()
+
+new_seasons = sorted(set(games['year'].unique()) - built_seasons)
+if not new_seasons:
+    print("✓ All seasons already built, nothing to do")
+    sys.exit(0)
+
+print(f"Seasons to build: {new_seasons}\n")
+
+print("Inverting defensive stats...")
+torvik = invert_defensive_stats(torvik[torvik['year'].isin(new_seasons)])
+torvik = torvik.set_index('torvik_id')[STAT_COLS]
+torvik_ids = teams.set_index('team_id')['torvik_id']
+print("✓ Defensive stats inverted\n")
+
+print("Building matchups...")
+season_matchups = []
+for season in new_seasons:
+    season_games = games[games['year'] == season]
+    matchups = build_game_matchups(season_games, torvik_ids, torvik)
+    season_matchups.append(matchups)
+    print(f"  {season}: {len(season_games)} game rows -> {len(matchups)} matchups")
+
+new_matchups = pd.concat(season_matchups, ignore_index=True)
+print(f"\n✓ Built {len(new_matchups)} matchups\n")
+
+if existing is not None:
+    output = pd.concat([existing, new_matchups[existing.columns]], ignore_index=True)
+else:
+    output = new_matchups
+output = sort_training_matchups(output)
+
+# Differentials are written at the precision of the source stats, so a
+# rebuild writes the same text whether or not rows were read back first
+output.to_csv(output_path, index=False, float_format='%.10g')
+print(f"✓ Saved to: {output_path}")
+print(f"✓ Total matchups: {len(output)} ({output['year'].min()}-{output['year'].max()})\n")
+
+print("="*80)
+print("COMPLETE!")
+print("="*80)
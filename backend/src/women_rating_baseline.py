@@ -0,0 +1,154 @@
+"""
+Closed-form rating baseline for the women's tournament
+- All-pairs log5 / Elo win probabilities in one broadcast
+- Cross-check against the matchup model probabilities
+- Upset table by round and seed line
+"""
+import pandas as pd
+import numpy as np
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from probabilities import (ROUND_ORDER, ADVANCEMENT_COLUMNS, RATING_METHODS,
+                           rating_probability_matrix, build_round_matrices,
+                           calculate_advancement_probabilities, calculate_upset_table)
+from utils import TeamNameIndex
+
+parser = argparse.ArgumentParser(description="Rating-model baseline for the women's tournament")
+parser.add_argument('--method', choices=RATING_METHODS, default='log5', help='Rating model')
+parser.add_argument('--threshold', type=float, default=0.2,
+                    help='Flag matchups where model and rating probabilities differ by more than this')
+args = parser.parse_args()
+
+print("="*80)
+print(f"WOMEN'S TOURNAMENT RATING BASELINE ({args.method.upper()})")
+print("="*80 + "\n")
+
+# Setup paths
+script_dir = os.path.dirname(os.path.abspath(__file__))
+data_dir = os.path.join(script_dir, '..', 'data', 'women')
+
+# ============================================================================
+# STEP 1: LOAD DATA
+# ============================================================================
+print("STEP 1: Loading team stats and matchups")
+print("-" * 80 + "\n")
+
+# Raw (non-inverted) stats
+team_stats = pd.read_csv(os.path.join(data_dir, 'women_teams_enriched.csv'))
+
+model_path = os.path.join(data_dir, 'women_matchups_with_probs.csv')
+has_model_probs = os.path.exists(model_path)
+if has_model_probs:
+    matchups = pd.read_csv(model_path)
+else:
+    matchups = pd.read_csv(os.path.join(data_dir, 'women_matchups_current.csv'))
+
+print(f"✓ Loaded {len(team_stats)} teams")
+print(f"✓ Loaded {len(matchups)} matchups"
+      + ("" if has_model_probs else " (no model probabilities to cross-check)") + "\n")
+
+# ============================================================================
+# STEP 2: RATE EVERY PAIR OF TEAMS
+# ============================================================================
+print("STEP 2: Calculating all-pairs rating probabilities")
+print("-" * 80 + "\n")
+
+teams = team_stats['team'].to_numpy()
+pair_probs = rating_probability_matrix(team_stats, args.method)
+
+team_names = TeamNameIndex(teams)
+i = team_names.positions(matchups['team'], strict=False)
+j = team_names.positions(matchups['opponent'], strict=False)
+matchups['rating_prob'] = np.where((i >= 0) & (j >= 0), pair_probs[i, j], np.nan)
+
+print(f"✓ {len(teams)}x{len(teams)} probability matrix")
+print(f"✓ Rated {matchups['rating_prob'].notna().sum()} bracket matchups\n")
+
+# ============================================================================
+# STEP 3: ADVANCEMENT PROBABILITIES
+# ============================================================================
+print("STEP 3: Advancement probabilities under the rating model")
+print("-" * 80 + "\n")
+
+round_matrices = build_round_matrices(matchups, teams, rounds=ROUND_ORDER, prob_col='rating_prob')
+reach = calculate_advancement_probabilities(round_matrices)
+
+advancement = team_stats[['team', 'region', 'seed']].copy()
+for k, col_name in enumerate(ADVANCEMENT_COLUMNS, start=1):
+    advancement[col_name] = reach[k]
+
+print("Top 10 champion probabilities:")
+print(advancement.nlargest(10, 'champion_prob')[['team', 'seed', 'final_4_prob', 'champion_prob']]
+      .round(4).to_string(index=False))
+print(f"\n✓ Total champion probability: {advancement['champion_prob'].sum():.4f}\n")
+
+# ============================================================================
+# STEP 4: CROSS-CHECK AGAINST MATCHUP MODELS
+# ============================================================================
+disagreements = None
+if has_model_probs:
+    print("STEP 4: Cross-checking matchup model probabilities")
+    print("-" * 80 + "\n")
+
+    # One row per game: the model's favorite's orientation
+    favored = (matchups['win_prob'] > 0.5) | ((matchups['win_prob'] == 0.5)
+                                              & (matchups['team'] < matchups['opponent']))
+    favorites = matchups[favored].drop_duplicates(['game_id', 'team', 'opponent'])
+    favorites = favorites.assign(gap=favorites['win_prob'] - favorites['rating_prob'])
+    disagreements = (favorites[favorites['gap'].abs() > args.threshold]
+                     .sort_values('gap', key=np.abs, ascending=False)
+                     [['game_id', 'round', 'team', 'team_seed', 'opponent', 'opp_seed',
+                       'win_prob', 'rating_prob', 'gap']])
+
+    print(f"✓ Mean absolute gap: {favorites['gap'].abs().mean():.4f}")
+    print(f"✓ {len(disagreements)} of {len(favorites)} matchups differ by more than "
+          f"{args.threshold:.2f}\n")
+    if len(disagreements) > 0:
+        print("Largest disagreements:")
+        print(disagreements.head(15).round(4).to_string(index=False))
+        print()
+
+# ============================================================================
+# STEP 5: UPSET TABLE
+# ============================================================================
+print("STEP 5: Upset table by round and seed line")
+print("-" * 80 + "\n")
+
+upsets = calculate_upset_table(matchups, teams, round_matrices, reach, rounds=ROUND_ORDER)
+
+print("Round 1 upset probabilities:")
+print(upsets[upsets['round'] == ROUND_ORDER[0]][['favorite_seed', 'underdog_seed', 'mean_upset_prob']]
+      .round(4).to_string(index=False))
+print("\nExpected upsets per round:")
+print(upsets.groupby('round', sort=False)['expected_upsets'].sum().round(2).to_string())
+
+# ============================================================================
+# STEP 6: SAVE RESULTS
+# ============================================================================
+print("\n" + "="*80)
+print("STEP 6: Saving results")
+print("-" * 80 + "\n")
+
+outputs = []
+advancement_output = os.path.join(data_dir, f'women_rating_{args.method}_probabilities.csv')
+advancement.to_csv(advancement_output, index=False)
+outputs.append(advancement_output)
+
+upsets_output = os.path.join(data_dir, f'women_rating_{args.method}_upsets.csv')
+upsets.to_csv(upsets_output, index=False)
+outputs.append(upsets_output)
+
+if disagreements is not None:
+    disagreements_output = os.path.join(data_dir, f'women_rating_{args.method}_disagreements.csv')
+    disagreements.to_csv(disagreements_output, index=False)
+    outputs.append(disagreements_output)
+
+for output in outputs:
+    print(f"✓ Saved: {output}")
+
+print("\n" + "="*80)
+print("COMPLETE!")
+print("="*80)
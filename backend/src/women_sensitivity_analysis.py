@@ -0,0 +1,129 @@
+"""
+Sensitivity and leverage analysis for women's tournament probabilities
+Measures how much each possible game's win probability moves every team's
+champion probability and bracket value, without re-running the pipeline
+"""
+import pandas as pd
+import numpy as np
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from probabilities import (ROUND_ORDER, BRACKET_POINTS, build_round_matrices,
+                           calculate_advancement_probabilities,
+                           calculate_advancement_sensitivities)
+
+parser = argparse.ArgumentParser(description="Game leverage for the women's tournament")
+parser.add_argument('--top', type=int, default=25, help='Number of games to show')
+parser.add_argument('--team', help='Rank games by their effect on this team only')
+parser.add_argument('--metric', choices=['champion_prob', 'bracket_value'], default='champion_prob',
+                    help='Quantity to rank games by')
+args = parser.parse_args()
+
+print("="*80)
+print("WOMEN'S TOURNAMENT SENSITIVITY ANALYSIS")
+print("="*80 + "\n")
+
+# Setup paths
+script_dir = os.path.dirname(os.path.abspath(__file__))
+data_dir = os.path.join(script_dir, '..', 'data', 'women')
+
+# ============================================================================
+# STEP 1: LOAD DATA
+# ============================================================================
+print("STEP 1: Loading matchup probabilities")
+print("-" * 80 + "\n")
+
+matchups = pd.read_csv(os.path.join(data_dir, 'women_matchups_with_probs.csv'))
+composites = pd.read_csv(os.path.join(data_dir, 'women_composites_current.csv'))
+teams = composites['team'].unique()
+
+print(f"✓ Loaded {len(matchups)} matchups for {len(teams)} teams\n")
+
+if args.team and args.team.lower() not in {t.lower() for t in teams}:
+    print(f"ERROR: team '{args.team}' not found")
+    exit(1)
+
+# ============================================================================
+# STEP 2: DIFFERENTIATE THROUGH THE BRACKET
+# ============================================================================
+print("STEP 2: Differentiating advancement probabilities")
+print("-" * 80 + "\n")
+
+round_matrices = build_round_matrices(matchups, teams, rounds=ROUND_ORDER, prob_col='win_prob')
+reach = calculate_advancement_probabilities(round_matrices)
+(round_idx, team_idx, opp_idx), derivatives = calculate_advancement_sensitivities(round_matrices)
+
+# d(champion_prob) and d(bracket_value) per (matchup, team)
+d_champion = derivatives[:, len(ROUND_ORDER), :]
+d_bracket_value = np.einsum('pkt,k->pt', derivatives[:, 1:, :], np.array(BRACKET_POINTS))
+
+print(f"✓ {len(round_idx)} matchups x {len(teams)} teams x {len(ROUND_ORDER)} rounds")
+print(f"✓ Max |d champion_prob| = {np.abs(d_champion).max():.4f}\n")
+
+# ============================================================================
+# STEP 3: BUILD LEVERAGE TABLE
+# ============================================================================
+print("STEP 3: Building leverage table")
+print("-" * 80 + "\n")
+
+# One row per matchup, oriented from the lower matrix index
+team_names = np.asarray(teams)
+game_ids = matchups.set_index(['round', 'team', 'opponent'])['game_id']
+game_ids = game_ids[~game_ids.index.duplicated()]
+keys = pd.MultiIndex.from_arrays([np.array(ROUND_ORDER)[round_idx],
+                                  team_names[team_idx], team_names[opp_idx]])
+
+leverage = pd.DataFrame({
+    'game_id': game_ids.reindex(keys).to_numpy(),
+    'round': np.array(ROUND_ORDER)[round_idx],
+    'team': team_names[team_idx],
+    'opponent': team_names[opp_idx],
+    'win_prob': round_matrices[round_idx, team_idx, opp_idx],
+    # Probability the game is actually played
+    'game_prob': reach[round_idx, team_idx] * reach[round_idx, opp_idx],
+})
+
+# Derivatives sum to zero across teams, so half the absolute sum is the
+# champion probability (or expected points) moved between teams
+leverage['champion_swing'] = np.abs(d_champion).sum(axis=1) / 2
+leverage['bracket_value_swing'] = np.abs(d_bracket_value).sum(axis=1) / 2
+
+d_metric = d_champion if args.metric == 'champion_prob' else d_bracket_value
+most_affected = np.abs(d_metric).argmax(axis=1)
+leverage['most_affected_team'] = team_names[most_affected]
+leverage['most_affected_delta'] = d_metric[np.arange(len(leverage)), most_affected]
+
+if args.team:
+    focus = pd.Index([t.lower() for t in team_names]).get_loc(args.team.lower())
+    leverage['team_delta'] = d_metric[:, focus]
+    rank_col = 'team_delta'
+    ranked = leverage.reindex(leverage['team_delta'].abs().sort_values(ascending=False).index)
+else:
+    rank_col = 'champion_swing' if args.metric == 'champion_prob' else 'bracket_value_swing'
+    ranked = leverage.sort_values(rank_col, ascending=False)
+
+ranked = ranked.reset_index(drop=True)
+print(f"✓ Ranked {len(ranked)} matchups by {rank_col}"
+      + (f" ({team_names[focus]} {args.metric})" if args.team else "") + "\n")
+
+show_cols = ['game_id', 'round', 'team', 'opponent', 'win_prob', 'game_prob', rank_col,
+             'most_affected_team', 'most_affected_delta']
+print(f"Top {args.top} games:")
+print(ranked.head(args.top)[list(dict.fromkeys(show_cols))].round(4).to_string(index=False))
+
+# ============================================================================
+# STEP 4: SAVE RESULTS
+# ============================================================================
+print("\n" + "="*80)
+print("STEP 4: Saving results")
+print("-" * 80 + "\n")
+
+output_path = os.path.join(data_dir, 'women_game_leverage.csv')
+ranked.to_csv(output_path, index=False)
+print(f"✓ Saved: {output_path}")
+
+print("\n" + "="*80)
+print("COMPLETE!")
+print("="*80)
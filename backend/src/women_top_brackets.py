@@ -0,0 +1,103 @@
+"""
+Enumerate the most likely complete women's tournament brackets
+Uses best-first k-best search over the bracket tree instead of simulation
+"""
+import pandas as pd
+import os
+import sys
+import argparse
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from probabilities import ROUND_ORDER
+from top_brackets import TopBrackets
+
+parser = argparse.ArgumentParser(description="Most likely complete brackets")
+parser.add_argument('--k', type=int, default=1000, help='Number of brackets to enumerate')
+parser.add_argument('--show', type=int, default=10, help='Number of brackets to print')
+args = parser.parse_args()
+
+print("="*80)
+print("TOP WOMEN'S TOURNAMENT BRACKETS")
+print("="*80 + "\n")
+
+# Setup paths
+script_dir = os.path.dirname(os.path.abspath(__file__))
+data_dir = os.path.join(script_dir, '..', 'data', 'women')
+
+# ============================================================================
+# STEP 1: LOAD MATCHUP PROBABILITIES
+# ============================================================================
+print("STEP 1: Loading matchup probabilities")
+print("-" * 80 + "\n")
+
+matchups = pd.read_csv(os.path.join(data_dir, 'women_matchups_with_probs.csv'))
+print(f"✓ Loaded {len(matchups)} matchups\n")
+
+# ============================================================================
+# STEP 2: K-BEST SEARCH
+# ============================================================================
+print(f"STEP 2: Finding the {args.k} most likely brackets")
+print("-" * 80 + "\n")
+
+start = time.time()
+search = TopBrackets(matchups, rounds=ROUND_ORDER)
+brackets = search.top(args.k)
+elapsed = time.time() - start
+
+print(f"✓ Found {len(brackets)} brackets in {elapsed:.2f}s")
+print(f"✓ Most likely bracket: {brackets[0][0]:.3e}")
+print(f"✓ Combined probability of the top {len(brackets)}: "
+      f"{sum(p for p, _ in brackets):.3e}\n")
+
+# ============================================================================
+# STEP 3: SUMMARIZE
+# ============================================================================
+print("STEP 3: Summarizing brackets")
+print("-" * 80 + "\n")
+
+# Game columns in play order
+game_ids = [node.game_id for node in search.games]
+# Elite Eight winners make the Final Four; Final Four winners meet for the title
+elite_eight_games = [node.game_id for node in search.games if node.round_idx == len(ROUND_ORDER) - 3]
+final_four_games = [node.game_id for node in search.games if node.round_idx == len(ROUND_ORDER) - 2]
+championship_game = search.root.game_id
+
+rows = []
+for rank, (prob, picks) in enumerate(brackets, start=1):
+    champion = picks[championship_game]
+    finalists = [picks[g] for g in final_four_games]
+    rows.append({
+        'rank': rank,
+        'probability': prob,
+        'champion': champion,
+        'runner_up': next(t for t in finalists if t != champion),
+        'final_four': '; '.join(picks[g] for g in elite_eight_games),
+        **{g: picks[g] for g in game_ids},
+    })
+
+results = pd.DataFrame(rows)
+results['cumulative_probability'] = results['probability'].cumsum()
+
+print(f"Top {min(args.show, len(results))} brackets:")
+print(results.head(args.show)[['rank', 'probability', 'champion', 'runner_up']].to_string(index=False))
+
+print("\nChampion among the enumerated brackets:")
+print(results.groupby('champion')['probability'].agg(['count', 'sum'])
+      .sort_values('sum', ascending=False).to_string())
+
+# ============================================================================
+# STEP 4: SAVE RESULTS
+# ============================================================================
+print("\n" + "="*80)
+print("STEP 4: Saving results")
+print("-" * 80 + "\n")
+
+output_path = os.path.join(data_dir, 'women_top_brackets.csv')
+front = ['rank', 'probability', 'cumulative_probability', 'champion', 'runner_up', 'final_four']
+results[front + game_ids].to_csv(output_path, index=False)
+print(f"✓ Saved: {output_path}")
+
+print("\n" + "="*80)
+print("COMPLETE!")
+print("="*80)
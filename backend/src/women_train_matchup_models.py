@@ -7,16 +7,34 @@ import pandas as pd
 import numpy as np
 import os
 import joblib
+import json
+import sys
+import argparse
 from pathlib import Path
 from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
 from sklearn.calibration import CalibratedClassifierCV
-from xgboost import XGBClassifier
 from sklearn.metrics import accuracy_score, roc_auc_score, brier_score_loss
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from matchup_models import (EARLY_FEATURES, ELITE_FEATURES, EARLY_ROUNDS, ELITE_ROUNDS,
+                            ELITE_PARAMS_FILE, build_early_model, build_elite_model,
+                            load_elite_params)
+from instrumentation import RunRecorder
+from matchup_features import sort_training_matchups
+
+parser = argparse.ArgumentParser(description="Train women's matchup prediction models")
+parser.add_argument('--search', action='store_true',
+                    help='Tune elite model hyperparameters before training')
+parser.add_argument('--trials', type=int, default=50, help='Number of search trials')
+parser.add_argument('--n-jobs', type=int, default=-1, help='Concurrent search trials (-1 uses all cores)')
+parser.add_argument('--restart-search', action='store_true',
+                    help='Discard checkpointed trials instead of resuming')
+args = parser.parse_args()
+
 print("="*80)
 print("TRAINING WOMEN'S MATCHUP PREDICTION MODELS")
 print("="*80 + "\n")
+run = RunRecorder(__file__, params=vars(args))
 
 # Setup paths
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -25,16 +43,16 @@ models_dir = os.path.join(script_dir, '..', 'models')
 Path(models_dir).mkdir(parents=True, exist_ok=True)
 
 # Load training data
+run.step("Load training data")
 print("Loading training data...")
-df = pd.read_csv(os.path.join(data_dir, 'women_matchups_training.csv'))
+# Canonical row order, so the seeded splits below do not depend on how the
+# file was built
+df = sort_training_matchups(pd.read_csv(os.path.join(data_dir, 'women_matchups_training.csv')))
 print(f"✓ Loaded {len(df)} games from {df['year'].min()}-{df['year'].max()}\n")
 
 # Split into early and elite rounds
-early_rounds = ['First Round', 'Second Round']
-elite_rounds = ['Sweet 16', 'Elite Eight', 'Final Four', 'Championship']
-
-early_df = df[df['round'].isin(early_rounds)].copy()
-elite_df = df[df['round'].isin(elite_rounds)].copy()
+early_df = df[df['round'].isin(EARLY_ROUNDS)].copy()
+elite_df = df[df['round'].isin(ELITE_ROUNDS)].copy()
 
 print(f"Early rounds: {len(early_df)} games")
 print(f"Elite rounds: {len(elite_df)} games\n")
@@ -42,11 +60,12 @@ print(f"Elite rounds: {len(elite_df)} games\n")
 # ============================================================================
 # EARLY ROUNDS MODEL - LOGISTIC REGRESSION + PLATT SCALING
 # ============================================================================
+run.step("Train early rounds model")
 print("="*80)
 print("TRAINING EARLY ROUNDS MODEL (Logistic Regression + Platt Scaling)")
 print("="*80 + "\n")
 
-early_features = ['barthag', 'adj_oe', 'adj_de', 'orb_pct', 'drb_pct', 'ftr', '2p_pct']
+early_features = EARLY_FEATURES
 
 X_early = early_df[early_features]
 y_early = early_df['win']
@@ -61,7 +80,7 @@ print(f"Test set: {len(X_test_early)} games\n")
 
 # Train base model
 print("Training base Logistic Regression model...")
-base_early_model = LogisticRegression(random_state=42, max_iter=1000)
+base_early_model = build_early_model()
 base_early_model.fit(X_train_early, y_train_early)
 
 # Apply Platt scaling
@@ -83,15 +102,48 @@ early_model_path = os.path.join(models_dir, 'womens_early_rounds.joblib')
 joblib.dump(early_model, early_model_path)
 print(f"\n✓ Saved calibrated model to: {early_model_path}\n")
 
+# ============================================================================
+# ELITE ROUNDS HYPERPARAMETER SEARCH (optional)
+# ============================================================================
+if args.search:
+    from elite_param_search import search_elite_params
+    run.step("Search elite hyperparameters")
+    
+    print("="*80)
+    print(f"SEARCHING ELITE ROUNDS HYPERPARAMETERS ({args.trials} trials)")
+    print("="*80 + "\n")
+    
+    checkpoint_path = os.path.join(models_dir, 'womens_elite_search_trials.jsonl')
+    if args.restart_search and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    
+    best_trial, search_results = search_elite_params(
+        df, n_trials=args.trials, n_jobs=args.n_jobs, checkpoint_path=checkpoint_path
+    )
+    
+    print("Top 5 trials (mean held-out season log loss):")
+    print(search_results.head().to_string(index=False, float_format='%.4f'))
+    
+    params_path = os.path.join(models_dir, ELITE_PARAMS_FILE)
+    with open(params_path, 'w') as f:
+        json.dump({
+            'params': best_trial['params'],
+            'cv_log_loss': best_trial['log_loss'],
+            'trial_id': best_trial['trial_id'],
+            'n_trials': len(search_results),
+        }, f, indent=2)
+    print(f"\n✓ Best trial {best_trial['trial_id']}: log loss {best_trial['log_loss']:.4f}")
+    print(f"✓ Saved best parameters to: {params_path}\n")
+
 # ============================================================================
 # ELITE ROUNDS MODEL - XGBOOST + PLATT SCALING
 # ============================================================================
+run.step("Train elite rounds model")
 print("="*80)
 print("TRAINING ELITE ROUNDS MODEL (XGBoost + Platt Scaling)")
 print("="*80 + "\n")
 
-elite_features = ['wab', 'barthag', 'adj_oe', 'adj_de', 'efg_pct', 'efgd_pct',
-                  'orb_pct', 'drb_pct', '2p_pct', '2pd_pct', '3p_pct', '3pd_pct', '3pr']
+elite_features = ELITE_FEATURES
 
 X_elite = elite_df[elite_features]
 y_elite = elite_df['win']
@@ -104,21 +156,9 @@ X_train_elite, X_test_elite, y_train_elite, y_test_elite = train_test_split(
 print(f"Training set: {len(X_train_elite)} games")
 print(f"Test set: {len(X_test_elite)} games\n")
 
-# Train base model with your exact parameters
+# Train base model with the tuned parameters (search result if available)
 print("Training base XGBoost model...")
-base_elite_model = XGBClassifier(
-    learning_rate=0.2997738363859162,
-    max_depth=9,
-    min_child_weight=8.623522034407337,
-    subsample=0.8324211691115178,
-    colsample_bytree=0.9988769480719698,
-    gamma=2.017715776385069,
-    reg_alpha=0.9692563913308194,
-    reg_lambda=2.5910989850621258,
-    n_estimators=335,
-    random_state=42,
-    eval_metric='logloss'
-)
+base_elite_model = build_elite_model(load_elite_params(models_dir))
 
 base_elite_model.fit(X_train_elite, y_train_elite)
 
@@ -140,6 +180,7 @@ print(f"  Brier Score: {brier_score_loss(y_test_elite, y_prob_elite):.4f}")
 elite_model_path = os.path.join(models_dir, 'womens_elite_rounds.joblib')
 joblib.dump(elite_model, elite_model_path)
 print(f"\n✓ Saved calibrated model to: {elite_model_path}\n")
+run.finish()
 
 # ============================================================================
 # SUMMARY
@@ -0,0 +1,67 @@
+"""
+Season-held-out cross-validation for women's matchup prediction models
+- Leave-one-season-out folds for early and elite round models
+- Folds run in parallel and are cached on their data and parameters
+"""
+import pandas as pd
+import os
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from matchup_models import season_cross_validate, load_elite_params
+
+parser = argparse.ArgumentParser(description="Leave-one-season-out validation of the matchup models")
+parser.add_argument('--n-jobs', type=int, default=-1, help='Worker processes (-1 uses all cores)')
+parser.add_argument('--no-cache', action='store_true', help='Recompute every fold')
+args = parser.parse_args()
+
+print("="*80)
+print("VALIDATING WOMEN'S MATCHUP PREDICTION MODELS")
+print("="*80 + "\n")
+
+# Setup paths
+script_dir = os.path.dirname(os.path.abspath(__file__))
+data_dir = os.path.join(script_dir, '..', 'data', 'women')
+models_dir = os.path.join(script_dir, '..', 'models')
+cache_dir = None if args.no_cache else os.path.join(script_dir, '..', 'cache', 'cv')
+Path(models_dir).mkdir(parents=True, exist_ok=True)
+
+# Load training data
+print("Loading training data...")
+df = pd.read_csv(os.path.join(data_dir, 'women_matchups_training.csv'))
+print(f"✓ Loaded {len(df)} games from {df['year'].min()}-{df['year'].max()}\n")
+
+# ============================================================================
+# RUN LEAVE-ONE-SEASON-OUT FOLDS
+# ============================================================================
+print("="*80)
+print("RUNNING LEAVE-ONE-SEASON-OUT FOLDS (early + elite)")
+print("="*80 + "\n")
+
+report, n_cached = season_cross_validate(
+    df,
+    elite_params=load_elite_params(models_dir),
+    n_jobs=args.n_jobs,
+    cache_dir=cache_dir
+)
+
+n_folds = len(report[report['season'] != 'all'])
+print(f"✓ Completed {n_folds} folds ({n_cached} reused from cache)\n")
+
+# ============================================================================
+# REPORT
+# ============================================================================
+for model_name, model_report in report.groupby('model', sort=False):
+    print(f"{model_name.title()} Rounds Model (held-out season metrics):")
+    print(model_report.drop(columns=['model']).to_string(index=False, float_format='%.4f'))
+    print()
+
+report_path = os.path.join(models_dir, 'womens_cv_report.csv')
+report.to_csv(report_path, index=False)
+print(f"✓ Saved report to: {report_path}")
+
+print("\n" + "="*80)
+print("VALIDATION COMPLETE!")
+print("="*80)
@@ -2,16 +2,40 @@
 Model loading and inference module for NCAA Tournament predictions
 Based on Womens_Composite_Model and Womens_Tiers_Clustering notebooks
 """
+import copy
 import pandas as pd
 import numpy as np
 from pathlib import Path
+import joblib
+from joblib import Parallel, delayed
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import KMeans
+from scipy.optimize import linear_sum_assignment
 import warnings
 warnings.filterwarnings('ignore')
 
 
+def saved_tier_centroids(model_path):
+    """
+    Tier centroids of a saved predictor, for keeping its cluster numbering
+    when the tier model is refit from scratch
+    
+    Args:
+        model_path: Path to a joblib-saved NCAAPredictor
+        
+    Returns:
+        ndarray or None: Raw-space centroids, or None if there is no saved
+            model or it has no tier model
+    """
+    if not Path(model_path).exists():
+        return None
+    saved = joblib.load(model_path)
+    if getattr(saved, 'kmeans_model', None) is None:
+        return None
+    return saved.get_tier_centroids()
+
+
 class NCAAPredictor:
     """
     Handles composite scoring and tier predictions for NCAA Women's Basketball
@@ -30,6 +54,8 @@ class NCAAPredictor:
         self.weights = {}
         self.percentiles = {}
         self.kmeans_model = None
+        self.tier_counts = None
+        self.tier_seasons = []
         
         # Feature definitions from notebooks
         self.offensive_vars = ['adj_oe', 'efg_pct', 'tor', 'orb_pct', 'ftr', '2p_pct', '3p_pct', '3pr']
@@ -55,6 +81,22 @@ class NCAAPredictor:
         tournament = pd.read_csv(self.data_path / tournament_file)
         torvik = pd.read_csv(self.data_path / torvik_file)
         
+        df = self.prepare_historical_data(tournament, torvik)
+        print(f"✓ Loaded {len(df)} teams from {df['year'].min()}-{df['year'].max()}")
+        
+        return df
+    
+    def prepare_historical_data(self, tournament, torvik):
+        """
+        Merge tournament results with Torvik stats and derive model features
+        
+        Args:
+            tournament: DataFrame with tournament results (incl. torvik_id)
+            torvik: DataFrame with Torvik advanced statistics
+            
+        Returns:
+            DataFrame: Prepared historical data (also stored on the predictor)
+        """
         # Merge datasets
         df = tournament.merge(torvik, on='torvik_id', how='left', suffixes=('', '_torvik'))
         
@@ -77,7 +119,6 @@ class NCAAPredictor:
         df['3pd_pct_inv'] = -df['3pd_pct']
         
         self.historical_data = df
-        print(f"✓ Loaded {len(df)} teams from {df['year'].min()}-{df['year'].max()}")
         
         return df
     
@@ -168,7 +209,7 @@ class NCAAPredictor:
         # Calculate correlation importance
         correlations = {}
         for feature in features:
-            corr = df[feature].corr(pd.Series(target))
+            corr = df[feature].corr(pd.Series(target, index=df.index))
             correlations[feature] = abs(corr)
         
         # Calculate Random Forest importance
@@ -259,16 +300,25 @@ class NCAAPredictor:
         )
         
         # Normalize to 1-10 using percentile ranking (prevents ties at 10)
-        n = len(df)
+        n = max(len(df), 2)
         df['offense'] = (10 - (df['offensive_score'].rank(method='first', ascending=False) - 1) / (n - 1) * 9).round(2)
         df['defense'] = (10 - (df['defensive_score'].rank(method='first', ascending=False) - 1) / (n - 1) * 9).round(2)
         df['overall'] = (10 - (df['overall_score'].rank(method='first', ascending=False) - 1) / (n - 1) * 9).round(2)
         
         return df
     
-    def train_tier_model(self):
+    def train_tier_model(self, reference_centers=None):
         """
         Train K-Means clustering model for tier classification
+        
+        Cluster IDs from a fresh fit are arbitrary, while _assign_tier_labels
+        relies on fixed cluster numbers. When reference centroids are given (or
+        a previously trained model exists) the new clusters are renumbered to
+        match the closest reference centroid.
+        
+        Args:
+            reference_centers: Optional array of centroids in raw feature space
+                whose cluster numbering should be kept
         """
         if self.historical_data is None:
             raise ValueError("Must load historical data first")
@@ -277,6 +327,9 @@ class NCAAPredictor:
         print("TRAINING TIER CLUSTERING MODEL")
         print("="*80 + "\n")
         
+        if reference_centers is None and self.kmeans_model is not None:
+            reference_centers = self.get_tier_centroids()
+        
         df = self.historical_data
         
         # Prepare clustering features
@@ -297,8 +350,100 @@ class NCAAPredictor:
         self.kmeans_model.fit(scaled_data)
         self.scalers['tier'] = scaler
         
+        if reference_centers is not None:
+            reference_scaled = scaler.transform(
+                pd.DataFrame(reference_centers, columns=self.cluster_features)
+            )
+            self._align_clusters(reference_scaled)
+        
+        self.tier_counts = np.bincount(self.kmeans_model.labels_, minlength=5).astype(float)
+        self.tier_seasons = sorted(df['year'].unique().tolist()) if 'year' in df.columns else []
+        
         print("✓ Tier clustering model trained successfully!")
     
+    def update_tier_model(self, new_season_data, batch_size=32, random_state=123):
+        """
+        Incrementally update the tier clustering model with a new season
+        
+        Warm-starts from the stored centroids and runs a single mini-batch
+        k-means pass over the new season only. Each centroid moves towards its
+        newly assigned teams in proportion to how many teams it already
+        represents, so the result approximates a refit on all seasons while the
+        cluster numbering stays the same.
+        
+        Args:
+            new_season_data: DataFrame with the new season's team statistics
+            batch_size: Number of teams per mini-batch
+            random_state: Seed for the order in which teams are visited
+        """
+        if self.kmeans_model is None or self.tier_counts is None:
+            raise ValueError("Must train tier model first using train_tier_model()")
+        
+        print("\n" + "="*80)
+        print("UPDATING TIER CLUSTERING MODEL")
+        print("="*80 + "\n")
+        
+        cluster_df = new_season_data[self.cluster_features].dropna()
+        scaler = self.scalers['tier']
+        
+        # Update the scaler, then re-express the stored centroids in the new scale
+        raw_centers = self.get_tier_centroids()
+        scaler.partial_fit(cluster_df)
+        centers = scaler.transform(pd.DataFrame(raw_centers, columns=self.cluster_features))
+        counts = self.tier_counts.copy()
+        
+        scaled_data = scaler.transform(cluster_df)
+        order = np.random.RandomState(random_state).permutation(len(scaled_data))
+        
+        for start in range(0, len(order), batch_size):
+            batch = scaled_data[order[start:start + batch_size]]
+            
+            # Assign batch to nearest centroids
+            distances = ((batch[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+            labels = distances.argmin(axis=1)
+            
+            # Per-centroid learning rate 1 / count (running mean update)
+            for k in np.unique(labels):
+                members = batch[labels == k]
+                new_count = counts[k] + len(members)
+                centers[k] = (centers[k] * counts[k] + members.sum(axis=0)) / new_count
+                counts[k] = new_count
+        
+        self.kmeans_model.cluster_centers_ = centers
+        self.tier_counts = counts
+        
+        if 'year' in new_season_data.columns:
+            self.tier_seasons = sorted(set(self.tier_seasons) | set(new_season_data['year'].unique().tolist()))
+        
+        print(f"✓ Updated tier clustering model with {len(scaled_data)} teams")
+    
+    def get_tier_centroids(self):
+        """
+        Get tier cluster centroids in raw (unscaled) feature space
+        
+        Returns:
+            ndarray: Centroids with shape (n_clusters, n_cluster_features)
+        """
+        return self.scalers['tier'].inverse_transform(self.kmeans_model.cluster_centers_)
+    
+    def _align_clusters(self, reference_centers):
+        """
+        Renumber fitted clusters so each matches its closest reference centroid
+        
+        Args:
+            reference_centers: Reference centroids in the current scaled space
+        """
+        centers = self.kmeans_model.cluster_centers_
+        cost = ((reference_centers[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        _, mapping = linear_sum_assignment(cost)
+        
+        # mapping[k] is the fitted cluster that takes reference ID k
+        relabel = np.empty_like(mapping)
+        relabel[mapping] = np.arange(len(mapping))
+        
+        self.kmeans_model.cluster_centers_ = centers[mapping]
+        self.kmeans_model.labels_ = relabel[self.kmeans_model.labels_]
+    
     def predict_tiers(self, team_data):
         """
         Predict tier classification for teams
@@ -401,4 +546,40 @@ class NCAAPredictor:
         # Add rank based on overall score
         df['rank'] = df['overall_score'].rank(ascending=False, method='min').astype(int)
         
-        return df
\ No newline at end of file
+        return df
+    
+    def batch_predict_by_season(self, teams_data, season_col='year', n_jobs=-1):
+        """
+        Run all predictions with each season scored as an independent partition
+        
+        Percentile rankings (offense, defense, overall) and rank are computed
+        within each season instead of across the whole input. Partitions are
+        scored on a joblib worker pool and concatenated in season order, keeping
+        the original row order (and index) within each season.
+        
+        Args:
+            teams_data: DataFrame with team statistics for one or more seasons
+            season_col: Column used to partition the input
+            n_jobs: Number of workers (-1 uses all cores, 1 runs in-process)
+            
+        Returns:
+            DataFrame: Teams with all predictions added
+        """
+        if season_col not in teams_data.columns:
+            raise ValueError(f"Input data must contain '{season_col}' column for partitioned scoring")
+        
+        # Workers only need the fitted weights, bounds and tier model, so avoid
+        # shipping the full historical table to every process
+        scorer = copy.copy(self)
+        scorer.historical_data = None
+        
+        partitions = [season_df for _, season_df in teams_data.groupby(season_col, sort=True)]
+        if not partitions:
+            return self.batch_predict(teams_data)
+        
+        n_jobs = 1 if len(partitions) == 1 else n_jobs
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(scorer.batch_predict)(season_df) for season_df in partitions
+        )
+        
+        return pd.concat(results)
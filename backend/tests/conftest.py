@@ -0,0 +1,106 @@
+"""Shared fixtures: src/ and benchmarks/ on the path, synthetic brackets and history"""
+import importlib.util
+import os
+import sys
+
+import numpy as np
+import pytest
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(backend_dir, 'src'))
+sys.path.insert(0, os.path.join(backend_dir, 'benchmarks'))
+
+# `import app` is the API module, not src/app.py (src/ is first on the path)
+_spec = importlib.util.spec_from_file_location('app', os.path.join(backend_dir, 'app.py'))
+sys.modules['app'] = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(sys.modules['app'])
+
+import synthetic
+from matchup_features import build_template_matchups, invert_defensive_stats
+from probabilities import normalize_pairwise_probabilities, rating_win_probability
+
+
+def synthetic_matchups(n_teams, seed=0):
+    """Every possible matchup of a synthetic field with log5 win probabilities"""
+    teams = synthetic.generate_teams(n_teams, rng=np.random.default_rng(seed))
+    matchups = build_template_matchups(synthetic.generate_template(n_teams), invert_defensive_stats(teams))
+    barthag = teams.set_index('team')['barthag']
+    matchups['win_prob_raw'] = rating_win_probability(barthag.reindex(matchups['team']).to_numpy(),
+                                                      barthag.reindex(matchups['opponent']).to_numpy())
+    matchups['win_prob'] = normalize_pairwise_probabilities(matchups)
+    return matchups
+
+
+@pytest.fixture(scope='session')
+def history():
+    """Six seasons of simulated 64-team tournaments (tournament, torvik, games)"""
+    return synthetic.generate_history(64, 6, first_year=2000, rng=np.random.default_rng(0))
+
+
+@pytest.fixture(scope='session')
+def matchups():
+    """A 64-team field in women_matchups_with_probs.csv layout"""
+    return synthetic_matchups(64)
+
+
+@pytest.fixture(scope='session')
+def small_matchups():
+    """A 16-team field (four rounds), small enough to enumerate every bracket"""
+    return synthetic_matchups(16)
+
+
+@pytest.fixture(scope='session')
+def small_rounds():
+    return synthetic.round_names(4)
+
+
+@pytest.fixture(scope='session')
+def app_data_dir(tmp_path_factory):
+    """A synthetic 64-team dataset with every file app.py loads"""
+    directory = tmp_path_factory.mktemp('data')
+    synthetic.write_app_dataset(str(directory), n_seasons=3)
+    return directory
+
+
+@pytest.fixture(scope='session')
+def app(app_data_dir, tmp_path_factory):
+    """The API on the synthetic dataset (the app module is loaded once)"""
+    flask_api = sys.modules['app']
+    state = tmp_path_factory.mktemp('state')
+    flask_api.JOBS_DIR = state / 'jobs'
+    return flask_api.create_app(data_dir=app_data_dir, models_dir=state / 'models',
+                                contests_dir=state / 'contests')
+
+
+def play_bracket(layout, round_matrices, rng=None):
+    """
+    One complete bracket in layout game order: each game's winner is drawn
+    from the win probabilities, or is the favorite without rng
+    """
+    picks = np.full(len(layout), -1)
+    for g in np.argsort(layout.round_idx, kind='stable'):
+        r = layout.round_idx[g]
+        a, b = layout.game_teams[g] if r == 0 else picks[layout.feeders[g]]
+        p = round_matrices[r, a, b]
+        a_wins = p >= 0.5 if rng is None else rng.random() < p
+        picks[g] = a if a_wins else b
+    return picks
+
+
+@pytest.fixture(scope='session')
+def layout(matchups):
+    from scoring import BracketLayout
+    return BracketLayout(matchups)
+
+
+@pytest.fixture(scope='session')
+def round_matrices(matchups, layout):
+    """Win probability matrices in layout team order"""
+    from probabilities import build_round_matrices
+    return build_round_matrices(matchups, layout.teams)
+
+
+@pytest.fixture(scope='session')
+def reach(round_matrices):
+    from probabilities import calculate_advancement_probabilities
+    return calculate_advancement_probabilities(round_matrices)
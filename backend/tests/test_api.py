@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+import app as flask_api
+from profiling import ProfileStore
+
+
+@pytest.fixture
+def results_cleared(client):
+    yield
+    flask_api.contest_store.set_results({g: None for g in flask_api.contest_store.layout.game_ids})
+
+
+def test_health(client):
+    response = client.get('/api/health')
+    assert response.status_code == 200
+
+
+def test_inconsistent_results_get_400(client, results_cleared):
+    layout = flask_api.contest_store.layout
+    first = layout.game_ids[0]
+    winner, loser = (layout.teams[t] for t in layout.game_teams[0])
+    later = next(layout.game_ids[g] for g in np.argsort(layout.round_idx, kind='stable')
+                 if layout.round_idx[g] == 1 and layout.eligible[g, layout.game_teams[0][0]])
+
+    assert client.post('/api/women/results', json={first: winner}).status_code == 200
+    response = client.post('/api/women/results', json={later: loser})
+    assert response.status_code == 400
+    assert 'cannot win' in response.get_json()['error']
+    assert client.get('/api/women/results').get_json()[later] is None
+
+    assert client.post('/api/women/results', json={'no-such-game': winner}).status_code == 404
+    assert client.post('/api/women/results', json=['not', 'a', 'dict']).status_code == 400
+
+
+def test_results_move_the_live_probabilities(client, results_cleared):
+    layout = flask_api.contest_store.layout
+    version = flask_api.probability_feed.version
+    winner = layout.teams[layout.game_teams[0][1]]
+    assert client.post('/api/women/results', json={layout.game_ids[0]: winner}).status_code == 200
+    assert flask_api.probability_feed.version == version + 1
+
+
+def test_cache_ignores_arguments_the_route_does_not_read(client):
+    flask_api.response_cache.clear()
+    first = client.get('/api/women/stats?junk=1', headers={'Accept-Encoding': 'gzip'})
+    entries = len(flask_api.response_cache)
+    second = client.get('/api/women/stats?other=2', headers={'Accept-Encoding': 'gzip'})
+    assert first.status_code == second.status_code == 200
+    assert len(flask_api.response_cache) == entries == 1
+    assert first.data == second.data
+
+
+def test_profiled_requests_render_fresh(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(flask_api, 'profile_store', ProfileStore(str(tmp_path)))
+    team = flask_api.teams_data['team'].iloc[0]
+    expected = client.get('/api/women/matchups', query_string={'team': team}).get_json()
+    entries = len(flask_api.response_cache)
+
+    def cache_used(entry):
+        raise AssertionError('profiled request served from the cache')
+    monkeypatch.setattr(flask_api, 'send_cached', cache_used)
+
+    for query in ({'profile': 'cprofile'}, {'profile': 'sample', 'team': team}):
+        response = client.get('/api/women/matchups', query_string=query)
+        assert response.status_code == 200
+        assert flask_api.profile_store.get(response.headers['X-Profile-Id'])['route'] == '/api/women/matchups'
+    assert response.get_json() == expected
+    assert len(flask_api.response_cache) == entries
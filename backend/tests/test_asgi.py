@@ -0,0 +1,99 @@
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('starlette')
+from starlette.requests import Request
+
+from metrics import metrics
+from profiling import ProfileStore
+
+
+@pytest.fixture(scope='module')
+def asgi(app):
+    """asgi.py on the synthetic dataset (loaded after the app fixture, so
+    its create_app() call keeps that data)"""
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'asgi.py')
+    spec = importlib.util.spec_from_file_location('asgi', path)
+    module = sys.modules['asgi'] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    yield module
+    del sys.modules['asgi']
+
+
+async def no_body():
+    return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+
+def make_request(path, query='', headers=()):
+    return Request({
+        'type': 'http', 'method': 'GET', 'path': path, 'query_string': query.encode(),
+        'headers': [(k.lower().encode(), v.encode()) for k, v in headers],
+    }, receive=no_body)
+
+
+def requests_total(labels):
+    prefix = f'api_requests_total{{{labels}}} '
+    return next((float(line[len(prefix):]) for line in metrics.render().splitlines()
+                 if line.startswith(prefix)), 0)
+
+
+def test_cache_key_ignores_unread_query_arguments(asgi):
+    key = asgi._cache_key(make_request('/api/women/stats'))
+    assert key is not None
+    assert asgi._cache_key(make_request('/api/women/stats', 'junk=1&other=2')) == key
+
+    team = asgi.flask_api.teams_data['team'].iloc[0]
+    matchups = asgi._cache_key(make_request('/api/women/matchups', 'junk=1'))
+    assert asgi._cache_key(make_request('/api/women/matchups')) == matchups
+    assert asgi._cache_key(make_request('/api/women/matchups', f'team={team}')) != matchups
+    # A repeated argument keys on its first value, as Flask reads it
+    assert (asgi._cache_key(make_request('/api/women/matchups', f'team={team}&team=x'))
+            == asgi._cache_key(make_request('/api/women/matchups', f'team={team}')))
+
+
+def test_cache_key_varies_with_encoding_and_allowed_origin(asgi):
+    plain = asgi._cache_key(make_request('/api/women/stats'))
+    gzip = asgi._cache_key(make_request('/api/women/stats', headers=[('Accept-Encoding', 'gzip')]))
+    assert gzip != plain
+
+    allowed = asgi.flask_api.CORS_ORIGINS[0]
+    origins = [asgi._cache_key(make_request('/api/women/stats', headers=[('Origin', origin)]))
+               for origin in (allowed, 'https://a.example', 'https://b.example')]
+    assert origins[0] != origins[1] == origins[2] != plain
+
+
+def test_uncached_routes_have_no_key(asgi):
+    assert asgi._cache_key(make_request('/api/health')) is None
+    assert asgi._cache_key(make_request('/api/women/no-such-route')) is None
+
+
+def test_full_process_pool_gets_503(asgi, monkeypatch):
+    # No free slots: the request is turned away without reaching the pool
+    monkeypatch.setattr(asgi, '_pending', asyncio.Semaphore(0))
+    monkeypatch.setattr(asgi, '_pool', None)
+    route = 'route="/api/women/teams/<team_name>/paths",method="GET",status="503"'
+    before = requests_total(route)
+
+    team = asgi.flask_api.teams_data['team'].iloc[0]
+    response = asyncio.run(asgi.process_route(make_request(f'/api/women/teams/{team}/paths')))
+    assert response.status_code == 503
+    assert response.headers['retry-after'] == '1'
+    assert 'busy' in json.loads(response.body)['error']
+    assert requests_total(route) == before + 1
+
+
+def test_profiled_requests_bypass_the_cache(asgi, monkeypatch, tmp_path):
+    monkeypatch.setattr(asgi.flask_api, 'profile_store', ProfileStore(str(tmp_path)))
+    asgi._cache_clear()
+    response = asyncio.run(asgi.cached_route(make_request('/api/women/stats')))
+    assert response.status_code == 200 and len(asgi._response_cache) == 1
+
+    response = asyncio.run(asgi.cached_route(make_request('/api/women/stats', 'profile=cprofile')))
+    assert response.status_code == 200
+    assert asgi.flask_api.profile_store.get(response.headers['x-profile-id']) is not None
+    assert len(asgi._response_cache) == 1
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from bracket_paths import PathExplorer
+
+
+@pytest.fixture(scope='module')
+def explorer(matchups):
+    return PathExplorer(matchups)
+
+
+@pytest.mark.parametrize('position', [0, 7, 31, 63])
+@pytest.mark.parametrize('n_rounds', [1, 3, 4])
+def test_all_paths_sum_to_reach(explorer, position, n_rounds):
+    team = explorer.teams[position]
+    n_paths = int(np.prod([2 ** r for r in range(n_rounds)]))
+    total, paths = explorer.top_paths(team, k=n_paths + 10, n_rounds=n_rounds)
+    assert len(paths) == n_paths
+    assert total == pytest.approx(explorer.reach[n_rounds, position])
+    assert sum(p for p, _ in paths) == pytest.approx(total, rel=1e-9)
+
+
+def test_paths_are_distinct_and_ordered(explorer):
+    team = explorer.teams[0]
+    total, paths = explorer.top_paths(team, k=200)
+    probabilities = [p for p, _ in paths]
+    assert probabilities == sorted(probabilities, reverse=True)
+    assert len({tuple(opponents) for _, opponents in paths}) == 200
+    assert sum(probabilities) <= total + 1e-12
+
+
+def test_path_probability_factors_by_round(explorer):
+    position = 5
+    _, paths = explorer.top_paths(explorer.teams[position], k=10)
+    for probability, opponents in paths:
+        factors = [explorer.reach[r, j] * explorer.round_matrices[r, position, j]
+                   for r, j in enumerate(opponents)]
+        assert probability == pytest.approx(np.prod(factors), rel=1e-12)
+
+
+def test_unknown_team_suggests_matches(explorer):
+    with pytest.raises(KeyError, match='did you mean'):
+        explorer.top_paths(explorer.teams[0].replace('State', 'Stat'))
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from compression import ENCODINGS, CompressedCache, negotiate
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None),
+    ('', None),
+    ('identity', None),
+    ('gzip', 'gzip'),
+    ('GZIP', 'gzip'),
+    ('gzip;q=0', None),
+    ('*', ENCODINGS[0]),
+    ('*;q=0, gzip', 'gzip'),
+    ('br;q=0, gzip;q=0', None),
+])
+def test_negotiate(header, expected):
+    assert negotiate(header) == expected
+
+
+@pytest.mark.parametrize('header', [
+    'gzip;q=0.8;foo=1',
+    'gzip;foo=1;q=0.8',
+    'gzip; Q=0.8',
+    'gzip ; q = 0.8',
+    'gzip;q=oops',
+    'gzip;level=1',
+])
+def test_q_is_read_from_any_parameter(header):
+    # Every one of these accepts gzip: a parameter other than q, or a q that
+    # is not a number, leaves the default weight of 1
+    assert negotiate(header) == 'gzip'
+
+
+def test_highest_q_wins():
+    assert negotiate('gzip;q=0.9, br;q=0.1, *;q=0.5') == 'gzip'
+    assert negotiate('gzip;q=0.1, *;q=0.5') == ('br' if 'br' in ENCODINGS else 'gzip')
+    assert negotiate('gzip;foo=1;Q=0') is None
+
+
+def body(n, seed=0):
+    # Random bytes barely compress, so every entry has a predictable size
+    return np.random.default_rng(seed).bytes(n)
+
+
+def entry_size(entry):
+    return sum(len(v) for k, v in entry.items() if k is None or k in ENCODINGS)
+
+
+def test_cache_size_is_exact_through_eviction():
+    cache = CompressedCache(max_bytes=20000)
+    entries = {}
+    for i in range(6):
+        entries[i] = cache.put(i, body(2000 + i, seed=i), 'application/json')
+        assert cache.size == sum(entry_size(cache.get(k)) for k in range(i + 1) if cache.get(k))
+        assert cache.size <= cache.max_bytes
+    # The oldest entries went first, and an evicted key is a miss
+    assert len(cache) < 6
+    assert cache.get(0) is None
+    assert cache.get(5) is entries[5]
+
+
+def test_least_recently_used_is_evicted_first():
+    one = entry_size(CompressedCache().put(0, body(2000), 'text/plain'))
+    cache = CompressedCache(max_bytes=3 * one + 100)
+    for i in range(2):
+        cache.put(i, body(2000, seed=i), 'text/plain')
+    cache.get(0)
+    cache.put(2, body(2000, seed=2), 'text/plain')
+    cache.put(3, body(2000, seed=3), 'text/plain')
+    assert cache.get(0) is not None and cache.get(1) is None
+
+
+def test_replacing_and_oversized_entries():
+    cache = CompressedCache(max_bytes=5000)
+    cache.put('key', body(2000), 'text/plain')
+    replaced = cache.put('key', body(100), 'text/plain')
+    assert len(cache) == 1 and cache.size == entry_size(replaced) == 100
+    # Small bodies are kept uncompressed only
+    assert set(replaced) == {'content_type', 'etag', None}
+
+    oversized = cache.put('big', body(6000), 'text/plain')
+    assert oversized[None] == body(6000)
+    assert cache.get('big') is None and cache.size == 100
+
+    cache.clear()
+    assert len(cache) == 0 and cache.size == 0
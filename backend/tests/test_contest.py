@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+
+from conftest import play_bracket
+from contest import ContestStore
+from scoring import NO_PICK
+
+
+@pytest.fixture
+def store(layout, round_matrices, reach, tmp_path):
+    return ContestStore(layout, round_matrices, reach, storage_dir=str(tmp_path))
+
+
+@pytest.fixture
+def results(layout, round_matrices):
+    return play_bracket(layout, round_matrices, np.random.default_rng(0))
+
+
+def winners(layout, results, games):
+    return {layout.game_ids[g]: layout.teams[results[g]] for g in games}
+
+
+def path_games(layout, team):
+    """Games a team plays, first round first"""
+    return [g for g in np.argsort(layout.round_idx, kind='stable') if layout.eligible[g, team]]
+
+
+def test_results_apply_in_round_order(store, layout, results):
+    champion = results[np.flatnonzero(layout.round_idx == 5)[0]]
+    games = path_games(layout, champion)
+    # Listed last round first: applied first round first, so every game checks
+    store.set_results(winners(layout, results, games[::-1]))
+    assert (store.results[games] == champion).all()
+
+
+def test_winner_who_lost_a_recorded_game_is_rejected(store, layout, results):
+    first = 0
+    loser = next(t for t in layout.game_teams[first] if t != results[first])
+    store.set_results(winners(layout, results, [first]))
+    later = path_games(layout, loser)[1]
+
+    with pytest.raises(ValueError, match='cannot win'):
+        store.set_results({layout.game_ids[later]: layout.teams[loser]})
+    assert store.results[later] == NO_PICK
+
+    # Also when both games come in one request
+    store.set_results({layout.game_ids[first]: None})
+    with pytest.raises(ValueError):
+        store.set_results({layout.game_ids[first]: layout.teams[results[first]],
+                           layout.game_ids[later]: layout.teams[loser]})
+    assert (store.results == NO_PICK).all()
+
+
+def test_ineligible_and_unknown_winners_are_rejected(store, layout):
+    outsider = np.flatnonzero(~layout.eligible[0])[0]
+    with pytest.raises(ValueError, match='cannot play'):
+        store.set_results({layout.game_ids[0]: layout.teams[outsider]})
+    with pytest.raises(KeyError):
+        store.set_results({'no-such-game': layout.teams[0]})
+    with pytest.raises(KeyError):
+        store.set_results({layout.game_ids[0]: 'No Such Team'})
+
+
+def test_changing_a_result_clears_what_depended_on_it(store, layout, results):
+    champion = results[np.flatnonzero(layout.round_idx == 5)[0]]
+    games = path_games(layout, champion)
+    other_games = [g for g in range(len(layout)) if g not in games and layout.round_idx[g] == 0]
+    store.set_results(winners(layout, results, games + other_games))
+
+    # The champion now loses the second round: their later wins go, the
+    # unrelated first round results stay
+    second = games[1]
+    opponent = next(t for t in results[layout.feeders[second]] if t != champion)
+    store.set_results({layout.game_ids[second]: layout.teams[opponent]})
+    assert store.results[games[0]] == champion
+    assert store.results[second] == opponent
+    assert (store.results[games[2:]] == NO_PICK).all()
+    assert (store.results[other_games] == results[other_games]).all()
+
+    # The opponent's win did not come through the cleared game
+    store.set_results({layout.game_ids[games[0]]: None})
+    assert store.results[games[0]] == NO_PICK and store.results[second] == opponent
+
+
+def test_results_and_entries_are_shared_through_the_directory(store, layout, round_matrices, reach,
+                                                              results, tmp_path):
+    other = ContestStore(layout, round_matrices, reach, storage_dir=str(tmp_path))
+    store.add_entries('pool', ['perfect', 'chalk'], np.stack([results, play_bracket(layout, round_matrices)]))
+    store.set_results(winners(layout, results, range(len(layout))))
+
+    scores = other.scores('pool').set_index('name')
+    assert scores.loc['perfect', 'correct'] == 63
+    assert scores.loc['perfect', 'score'] == 192
+    assert scores.loc['perfect', 'rank'] == 1
+
+
+def test_clearing_a_result_clears_the_winners_later_games(store, layout, results):
+    champion = results[np.flatnonzero(layout.round_idx == 5)[0]]
+    games = path_games(layout, champion)
+    store.set_results(winners(layout, results, games))
+
+    store.set_results({layout.game_ids[games[2]]: None})
+    assert (store.results[games[:2]] == champion).all()
+    assert (store.results[games[2:]] == NO_PICK).all()
+
+
+def test_expected_scores_are_conditioned_on_results(store, layout, round_matrices, reach, results, tmp_path):
+    other = ContestStore(layout, round_matrices, reach, storage_dir=str(tmp_path))
+    rng = np.random.default_rng(1)
+    brackets = [results, play_bracket(layout, round_matrices)]
+    brackets += [play_bracket(layout, round_matrices, rng) for _ in range(8)]
+    store.add_entries('pool', [f'entry{i}' for i in range(len(brackets))], np.stack(brackets))
+    before = other.scores('pool').set_index('name')['expected_score']
+
+    # Expected final scores include the points already won
+    store.set_results(winners(layout, results, np.flatnonzero(layout.round_idx < 2)))
+    board = other.scores('pool').set_index('name')
+    assert board.loc['entry0', 'score'] == 64
+    assert (board['expected_score'] >= board['score']).all()
+    assert board.loc['entry0', 'expected_score'] > before['entry0']
+
+    store.set_results(winners(layout, results, range(len(layout))))
+    board = other.scores('pool')
+    np.testing.assert_allclose(board['expected_score'], board['score'])
+
+    store.set_results({g: None for g in layout.game_ids})
+    board = other.scores('pool').set_index('name')['expected_score']
+    np.testing.assert_allclose(board.reindex(before.index), before)
@@ -0,0 +1,47 @@
+import json
+
+import numpy as np
+import pytest
+
+from elite_param_search import build_season_folds, run_trial, sample_params, search_elite_params
+from matchup_models import ELITE_ROUNDS
+
+
+def elite_rows(training, season):
+    return training[(training['year'] == season) & training['round'].isin(ELITE_ROUNDS)]
+
+
+def test_held_out_season_never_decides_early_stopping(history):
+    _, _, training = history
+    folds = build_season_folds(training)
+    seasons = sorted(training['year'].unique())
+    assert [fold[0] for fold in folds] == seasons
+    for season, dtrain, dstop, dvalid in folds:
+        stop_season = max(s for s in seasons if s != season)
+        assert dvalid.num_row() == len(elite_rows(training, season))
+        assert dstop.num_row() == len(elite_rows(training, stop_season))
+        assert dtrain.num_row() == sum(len(elite_rows(training, s)) for s in seasons
+                                       if s not in (season, stop_season))
+
+
+def test_too_few_seasons(history):
+    _, _, training = history
+    with pytest.raises(ValueError):
+        build_season_folds(training[training['year'] < 2002])
+
+
+def test_trial_scores_held_out_seasons(history):
+    _, _, training = history
+    trial = run_trial(0, sample_params(0), build_season_folds(training))
+    assert 0 < trial['log_loss'] < 1
+    assert trial['params']['n_estimators'] >= 1
+
+
+def test_checkpoint_from_other_fold_scheme_is_rerun(history, tmp_path):
+    _, _, training = history
+    checkpoint = tmp_path / 'trials.jsonl'
+    stale = {'trial_id': 0, 'log_loss': 0.0, 'log_loss_std': 0.0, 'params': {}, 'seed': 42}
+    checkpoint.write_text(json.dumps(stale) + '\n')
+    best, results = search_elite_params(training, n_trials=1, n_jobs=1, checkpoint_path=str(checkpoint))
+    assert best['log_loss'] > 0
+    assert np.isclose(results['log_loss'].iloc[0], best['log_loss'])
@@ -0,0 +1,59 @@
+import json
+
+from instrumentation import RunRecorder, compare_reports, format_comparison
+
+
+def run_report(steps, total):
+    return {
+        'steps': [dict(zip(('name', 'wall_s', 'cpu_s', 'peak_rss_mb'), step)) for step in steps],
+        'total': dict(zip(('wall_s', 'cpu_s', 'peak_rss_mb'), total)),
+    }
+
+
+def test_regressions_are_flagged_above_the_floors():
+    baseline = run_report([('read', 1.0, 1.0, 100.0), ('tiny', 0.01, 0.01, 10.0),
+                           ('steady', 1.0, 1.0, 100.0), ('dropped', 1.0, 1.0, 100.0)],
+                          (3.01, 3.01, 100.0))
+    current = run_report([('read', 1.2, 2.0, 120.0), ('tiny', 0.03, 0.03, 14.0),
+                          ('steady', 1.05, 1.05, 100.0), ('added', 1.0, 1.0, 100.0)],
+                         (3.5, 4.08, 120.0))
+    rows = {row['name']: row for row in compare_reports(baseline, current)}
+
+    # Wall time and memory both grew by more than 10% and past the floors;
+    # CPU time is reported but never flagged
+    assert rows['read']['regression'] == ['wall_s', 'peak_rss_mb']
+    assert rows['read']['wall_s'] == (1.0, 1.2)
+    assert abs(rows['read']['cpu_s_change'] - 1.0) < 1e-12
+    # Tripled, but by less than min_seconds and min_mb
+    assert rows['tiny']['regression'] == []
+    # Past the floor, but within the threshold
+    assert rows['steady']['regression'] == []
+    assert rows['TOTAL']['regression'] == ['wall_s', 'peak_rss_mb']
+
+    assert rows['dropped']['wall_s'] == (1.0, None) and rows['dropped']['regression'] == []
+    assert rows['added']['wall_s'] == (None, 1.0) and rows['added']['wall_s_change'] is None
+    assert list(rows) == ['read', 'tiny', 'steady', 'added', 'dropped', 'TOTAL']
+
+
+def test_floors_can_be_lowered():
+    baseline = run_report([('tiny', 0.01, 0.01, 10.0)], (0.01, 0.01, 10.0))
+    current = run_report([('tiny', 0.03, 0.03, 14.0)], (0.03, 0.03, 14.0))
+    rows = compare_reports(baseline, current, min_seconds=0.01, min_mb=1.0)
+    assert rows[0]['regression'] == ['wall_s', 'peak_rss_mb']
+    assert 'tiny' in format_comparison(rows)
+
+
+def test_run_recorder_writes_a_report(tmp_path):
+    recorder = RunRecorder('women_create_data.py', params={'year': 2026}, report_dir=str(tmp_path))
+    recorder.step('read')
+    sum(range(10000))
+    recorder.step('write')
+    path = recorder.finish(quiet=True)
+    assert recorder.finish() is None
+
+    with open(path) as f:
+        report = json.load(f)
+    assert report['script'] == 'women_create_data' and report['status'] == 'completed'
+    assert [s['name'] for s in report['steps']] == ['read', 'write']
+    assert report['total']['wall_s'] >= sum(s['wall_s'] for s in report['steps']) - 1e-3
+    assert (tmp_path / 'women_create_data_latest.json').exists()
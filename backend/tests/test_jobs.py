@@ -0,0 +1,88 @@
+import json
+import os
+import time
+
+import pytest
+
+from jobs import DONE, FAILED, QUEUED, RUNNING, JobManager
+
+
+@pytest.fixture
+def manager(app_data_dir, tmp_path):
+    return JobManager(str(tmp_path / 'jobs'), paths={'data_dir': app_data_dir},
+                      data_files=[app_data_dir / 'women_matchups_with_probs.csv'],
+                      max_workers=1, max_queued=1)
+
+
+def write_status(manager, job_type, params, **status):
+    job_id = manager.job_id(job_type, params)
+    os.makedirs(os.path.join(manager.storage_dir, job_id))
+    with open(os.path.join(manager.storage_dir, job_id, 'status.json'), 'w') as f:
+        json.dump({'id': job_id, 'type': job_type, 'params': params, **status}, f)
+    return job_id
+
+
+def wait_for(manager, job_id, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = manager.status(job_id)
+        if status['state'] in (DONE, FAILED):
+            return status
+        time.sleep(0.2)
+    raise TimeoutError(job_id)
+
+
+def test_job_id_depends_on_type_params_and_data(manager, app_data_dir, tmp_path):
+    job_id = manager.job_id('simulate', {'n_simulations': 10, 'seed': 1})
+    assert job_id == manager.job_id('simulate', {'seed': 1, 'n_simulations': 10})
+    assert job_id != manager.job_id('simulate', {'n_simulations': 11, 'seed': 1})
+    assert job_id != manager.job_id('backtest', {'n_simulations': 10, 'seed': 1})
+
+    changed = tmp_path / 'changed.csv'
+    changed.write_text('different data\n')
+    other = JobManager(str(tmp_path / 'other'), paths={}, data_files=[changed])
+    assert other.job_id('simulate', {'n_simulations': 10, 'seed': 1}) != job_id
+
+
+def test_same_work_is_not_run_twice(manager):
+    job_id = write_status(manager, 'simulate', {'n_simulations': 10}, state=DONE)
+    status, queued = manager.submit('simulate', {'n_simulations': 10})
+    assert status['id'] == job_id and status['state'] == DONE and not queued
+
+
+def test_queue_limit_counts_live_jobs_in_the_directory(manager):
+    write_status(manager, 'simulate', {'n_simulations': 1}, state=RUNNING, pid=os.getpid())
+    write_status(manager, 'simulate', {'n_simulations': 2}, state=QUEUED, owner=os.getpid())
+    assert manager.active_jobs() == 2
+    with pytest.raises(RuntimeError):
+        manager.submit('simulate', {'n_simulations': 3})
+
+
+def test_orphaned_jobs_are_stale(manager):
+    # Queued by a web process that is gone, or without any owner
+    write_status(manager, 'simulate', {'n_simulations': 1}, state=QUEUED, owner=2**22 + 1)
+    write_status(manager, 'simulate', {'n_simulations': 2}, state=QUEUED)
+    write_status(manager, 'simulate', {'n_simulations': 3}, state=RUNNING, pid=2**22 + 1)
+    assert manager.active_jobs() == 0
+
+
+def test_submit_runs_once_then_reuses(manager):
+    params = {'n_simulations': 200, 'seed': 0}
+    status, queued = manager.submit('simulate', params)
+    assert queued and status['state'] in (QUEUED, RUNNING)
+    assert 'owner' in status
+
+    done = wait_for(manager, status['id'])
+    assert done['state'] == DONE, done.get('error')
+    assert manager.result(status['id'])['n_simulations'] == 200
+
+    again, queued = manager.submit('simulate', dict(reversed(list(params.items()))))
+    assert again['id'] == status['id'] and not queued
+
+
+def test_failed_jobs_are_requeued(manager):
+    job_id = write_status(manager, 'simulate', {'n_simulations': 0}, state=FAILED, error='boom')
+    status, queued = manager.submit('simulate', {'n_simulations': 0})
+    assert queued and status['id'] == job_id
+    # n_simulations=0 is rejected by the job itself
+    assert wait_for(manager, job_id)['state'] == FAILED
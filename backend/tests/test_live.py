@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+import pytest
+
+from conftest import play_bracket
+from live import ProbabilityFeed, condition_on_results
+from probabilities import calculate_advancement_probabilities
+from scoring import NO_PICK
+
+
+@pytest.fixture(scope='module')
+def results(layout, round_matrices):
+    return play_bracket(layout, round_matrices, np.random.default_rng(0))
+
+
+def conditioned_reach(layout, round_matrices, results):
+    return calculate_advancement_probabilities(condition_on_results(layout, round_matrices, results))
+
+
+def test_no_results_changes_nothing(layout, round_matrices):
+    conditioned = condition_on_results(layout, round_matrices, np.full(len(layout), NO_PICK))
+    np.testing.assert_array_equal(conditioned, round_matrices)
+
+
+def test_all_results_make_the_bracket_certain(layout, round_matrices, results):
+    reach = conditioned_reach(layout, round_matrices, results)
+    for g, winner in enumerate(results):
+        assert reach[layout.round_idx[g] + 1, winner] == pytest.approx(1.0)
+    np.testing.assert_allclose(reach.sum(axis=1), [64, 32, 16, 8, 4, 2, 1])
+    assert set(np.unique(reach.round(12))) <= {0.0, 1.0}
+
+
+def test_decided_games_only_move_their_teams(layout, round_matrices, reach, results):
+    first_round = np.flatnonzero(layout.round_idx == 0)[:4]
+    decided = np.full(len(layout), NO_PICK)
+    decided[first_round] = results[first_round]
+    conditioned = conditioned_reach(layout, round_matrices, decided)
+
+    for g in first_round:
+        winner = results[g]
+        loser = next(t for t in layout.game_teams[g] if t != winner)
+        assert conditioned[1, winner] == 1.0 and conditioned[1, loser] == 0.0
+    far = np.flatnonzero(layout.eligible[np.flatnonzero(layout.round_idx == 0)[-1]])
+    np.testing.assert_allclose(conditioned[1, far], reach[1, far])
+    np.testing.assert_allclose(conditioned.sum(axis=1), reach.sum(axis=1))
+
+
+def test_one_result_scales_the_winners_chances(layout, round_matrices, reach, results):
+    decided = np.full(len(layout), NO_PICK)
+    decided[0] = results[0]
+    conditioned = conditioned_reach(layout, round_matrices, decided)
+    # Given the win, every later round is P(reach) / P(win the game)
+    np.testing.assert_allclose(conditioned[2:, results[0]], reach[2:, results[0]] / reach[1, results[0]])
+
+
+def test_a_later_result_implies_the_earlier_wins(layout, round_matrices, results):
+    elite_eight = np.flatnonzero(layout.round_idx == 3)[0]
+    decided = np.full(len(layout), NO_PICK)
+    decided[elite_eight] = results[elite_eight]
+    reach = conditioned_reach(layout, round_matrices, decided)
+    np.testing.assert_allclose(reach[1:5, results[elite_eight]], 1.0)
+
+
+def test_feed_publishes_only_changed_teams(layout, round_matrices, results):
+    feed = ProbabilityFeed(layout, round_matrices)
+    assert feed.update(results=np.full(len(layout), NO_PICK)) is None
+
+    decided = np.full(len(layout), NO_PICK)
+    decided[0] = results[0]
+    event_id = feed.update(results=decided)
+    messages, last_id = feed.events_since(0)
+    assert last_id == event_id == 1
+    data = json.loads(messages[0].split('data: ', 1)[1])
+    changed = {layout.teams.get_loc(name) for name in data['teams']}
+    assert set(layout.game_teams[0]) <= changed
+    assert len(changed) < len(layout.teams)
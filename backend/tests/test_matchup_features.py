@@ -0,0 +1,39 @@
+import os
+
+import pandas as pd
+
+from matchup_features import STAT_COLS, build_game_matchups, invert_defensive_stats, sort_training_matchups
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'women')
+
+
+def test_sort_training_matchups_ignores_row_order(history):
+    _, _, training = history
+    shuffled = training.sample(frac=1, random_state=0)
+    pd.testing.assert_frame_equal(sort_training_matchups(shuffled), sort_training_matchups(training))
+
+
+def test_sort_training_matchups_orders_rounds(history):
+    _, _, training = history
+    rounds = sort_training_matchups(training.sample(frac=1, random_state=1))
+    first_season = rounds[rounds['year'] == rounds['year'].min()]
+    assert first_season['round'].iloc[0] == 'First Round'
+    assert first_season['round'].iloc[-1] == 'Championship'
+
+
+def test_rebuild_matches_checked_in_training_file():
+    games = pd.read_csv(os.path.join(DATA_DIR, 'women_games_historical.csv'))
+    teams = pd.read_csv(os.path.join(DATA_DIR, 'women_teams_historical.csv'))
+    torvik = pd.read_csv(os.path.join(DATA_DIR, 'women_torvik_historical.csv'), encoding='utf-8-sig')
+    checked_in = pd.read_csv(os.path.join(DATA_DIR, 'women_matchups_training.csv'))
+
+    # Same steps as women_create_training_matchups.py --rebuild
+    torvik = invert_defensive_stats(torvik).set_index('torvik_id')[STAT_COLS]
+    torvik_ids = teams.set_index('team_id')['torvik_id']
+    rebuilt = pd.concat([build_game_matchups(games[games['year'] == season], torvik_ids, torvik)
+                         for season in sorted(games['year'].unique())], ignore_index=True)
+
+    def written(df):
+        return sort_training_matchups(df[checked_in.columns]).to_csv(index=False, float_format='%.10g')
+
+    assert written(rebuilt) == written(checked_in)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+import synthetic
+from matchup_features import invert_defensive_stats
+from matchup_matrix import MatchupMatrix
+
+
+@pytest.fixture
+def team_stats():
+    teams = synthetic.generate_teams(16, rng=np.random.default_rng(0))
+    return invert_defensive_stats(teams)
+
+
+# The 16-team field has no early-round games, so every early pair is missing
+def test_missing_pairs_are_predicted_once(small_matchups, team_stats):
+    matrix = MatchupMatrix(small_matchups, team_stats)
+    everyone = np.arange(len(matrix.teams))
+    probs = matrix.submatrix(everyone, 'early')
+    assert not np.isnan(probs).any()
+    np.testing.assert_allclose(probs + probs.T, 1.0)
+
+    inferred = matrix.n_inferred
+    assert inferred > 0
+    matrix.submatrix(everyone, 'early')
+    assert matrix.n_inferred == inferred
+
+
+def test_unpredictable_pairs_skip_the_model(small_matchups, team_stats, monkeypatch):
+    # A team missing from women_teams_enriched.csv can't be predicted
+    missing = small_matchups['team'].iloc[0]
+    matrix = MatchupMatrix(small_matchups, team_stats[team_stats['team'] != missing])
+    everyone = np.arange(len(matrix.teams))
+    probs = matrix.submatrix(everyone, 'early')
+    gap = matrix.teams.get_loc(missing)
+    others = np.delete(everyone, gap)
+    assert not np.isnan(probs[np.ix_(others, others)]).any()
+    assert np.isnan(probs[gap]).any()
+
+    def fill_missing(family, positions):
+        raise AssertionError('nothing left to predict')
+    monkeypatch.setattr(matrix, '_fill_missing', fill_missing)
+    np.testing.assert_array_equal(matrix.submatrix(everyone, 'early'), probs)
@@ -0,0 +1,61 @@
+import pytest
+
+from metrics import LATENCY_BUCKETS, SIZE_BUCKETS, MetricsRegistry
+
+
+def series(text, name):
+    """Sample lines of one metric, as {name-and-labels: value}"""
+    return {line.rsplit(' ', 1)[0]: float(line.rsplit(' ', 1)[1]) for line in text.splitlines()
+            if line.startswith(name)}
+
+
+def test_histogram_with_labels():
+    registry = MetricsRegistry()
+    labels = (('route', '/api/women/teams'), ('method', 'GET'))
+    for seconds in (0.0005, 0.003, 0.003, 20.0):
+        registry.observe('api_stage_duration_seconds', labels, seconds)
+    text = registry.render()
+
+    assert '# TYPE api_stage_duration_seconds histogram' in text
+    samples = series(text, 'api_stage_duration_seconds')
+    label_text = 'route="/api/women/teams",method="GET"'
+    # Buckets are cumulative, end with +Inf and count everything observed
+    assert samples[f'api_stage_duration_seconds_bucket{{{label_text},le="0.001"}}'] == 1
+    assert samples[f'api_stage_duration_seconds_bucket{{{label_text},le="0.0025"}}'] == 1
+    assert samples[f'api_stage_duration_seconds_bucket{{{label_text},le="0.005"}}'] == 3
+    assert samples[f'api_stage_duration_seconds_bucket{{{label_text},le="10.0"}}'] == 3
+    assert samples[f'api_stage_duration_seconds_bucket{{{label_text},le="+Inf"}}'] == 4
+    assert samples[f'api_stage_duration_seconds_count{{{label_text}}}'] == 4
+    assert samples[f'api_stage_duration_seconds_sum{{{label_text}}}'] == pytest.approx(20.0065)
+    assert len([s for s in samples if '_bucket' in s]) == len(LATENCY_BUCKETS) + 1
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.inc('cache_requests_total', (('cache', 'a"b\\c\nd'),))
+    assert 'cache_requests_total{cache="a\\"b\\\\c\\nd"} 1' in registry.render()
+
+
+def test_observe_request():
+    registry = MetricsRegistry()
+    registry.observe_request('/api/women/teams', 'GET', 200, 0.01, 2000)
+    registry.observe_request('/api/women/teams', 'GET', 503, 0.02)
+    registry.observe_request('/api/women/teams', 'GET', 503, 0.03)
+    text = registry.render()
+
+    route = 'route="/api/women/teams",method="GET"'
+    assert f'api_requests_total{{{route},status="200"}} 1' in text
+    assert f'api_requests_total{{{route},status="503"}} 2' in text
+    assert f'api_request_errors_total{{{route}}} 2' in text
+    assert f'api_request_duration_seconds_count{{{route}}} 3' in text
+    # Only requests with a known size are in the size histogram
+    assert f'api_response_size_bytes_count{{{route}}} 1' in text
+    assert f'api_response_size_bytes_bucket{{{route},le="{SIZE_BUCKETS[2]}"}} 1' in text
+    assert f'api_response_size_bytes_bucket{{{route},le="{SIZE_BUCKETS[1]}"}} 0' in text
+
+
+def test_only_recorded_metrics_are_rendered():
+    text = MetricsRegistry().render()
+    assert '# TYPE process_start_time_seconds gauge' in text
+    assert 'api_requests_total' not in text
+    assert text.endswith('\n')
@@ -0,0 +1,62 @@
+import numpy as np
+
+from probabilities import (ADVANCEMENT_COLUMNS, calculate_advancement_probabilities,
+                           calculate_advancement_sensitivities, normalize_pairwise_probabilities,
+                           simulate_tournament)
+
+
+def test_pairwise_probabilities_sum_to_one(matchups):
+    reverse = matchups.set_index(['game_id', 'opponent', 'team'])['win_prob']
+    forward = matchups.set_index(['game_id', 'team', 'opponent'])['win_prob']
+    np.testing.assert_allclose(forward + reverse.reindex(forward.index).to_numpy(), 1.0)
+
+
+def test_normalize_keeps_unpaired_rows(matchups):
+    one_sided = matchups.iloc[:1].assign(win_prob_raw=0.8)
+    assert normalize_pairwise_probabilities(one_sided)[0] == 0.8
+
+
+def test_advancement_probabilities_sum_to_games_left(reach):
+    # Every round, each remaining game sends exactly one team on
+    np.testing.assert_allclose(reach.sum(axis=1), [64, 32, 16, 8, 4, 2, 1])
+    assert (np.diff(reach, axis=0) <= 1e-12).all()
+
+
+def test_advancement_batches(round_matrices, reach):
+    batch = np.stack([round_matrices, round_matrices])
+    np.testing.assert_allclose(calculate_advancement_probabilities(batch), np.stack([reach, reach]))
+
+
+def test_simulation_matches_exact_recursion(matchups, layout, reach):
+    n = 20000
+    simulated = simulate_tournament(matchups, matchups, n_simulations=n, seed=0, batch_size=5000)
+    advancement = simulated['advancement'].set_index('team').reindex(layout.teams)[ADVANCEMENT_COLUMNS]
+    exact = reach[1:].T
+    # Within five binomial standard errors (and a few simulations, for
+    # rare events) for every team and round
+    tolerance = 5 * np.sqrt(exact * (1 - exact) / n) + 3 / n
+    assert (np.abs(advancement.to_numpy() - exact) <= tolerance).all()
+    assert simulated['champions'].sum() == n
+
+
+def test_sensitivities_equal_the_exact_swing(round_matrices):
+    (r, i, j), derivatives = calculate_advancement_sensitivities(round_matrices)
+    rng = np.random.default_rng(0)
+    for k in rng.choice(len(r), 25, replace=False):
+        # Advancement is linear in one matchup, so the derivative is the
+        # difference between i surely winning and j surely winning
+        swings = []
+        for p in (1.0, 0.0):
+            matrices = round_matrices.copy()
+            matrices[r[k], i[k], j[k]], matrices[r[k], j[k], i[k]] = p, 1 - p
+            swings.append(calculate_advancement_probabilities(matrices))
+        np.testing.assert_allclose(derivatives[k], swings[0] - swings[1], atol=1e-12)
+
+
+def test_sensitivities_cover_every_possible_matchup(round_matrices):
+    (r, i, j), derivatives = calculate_advancement_sensitivities(round_matrices)
+    # 32 games of 2 teams, 16 of 4, ... : n/2 * n/2 pairs per round of 64 teams
+    assert len(r) == sum(64 // 2 ** (k + 1) * 2 ** (2 * k) for k in range(6))
+    assert (i < j).all()
+    # Each derivative moves probability between teams without creating any
+    np.testing.assert_allclose(derivatives.sum(axis=2), 0.0, atol=1e-12)
@@ -0,0 +1,55 @@
+import json
+from collections import Counter
+
+import pytest
+
+from profiling import ProfileStore, frame_label, read_collapsed, summarize_samples
+
+
+def test_summarize_samples():
+    root = frame_label(test_summarize_samples.__code__)
+    app_leaf = frame_label(summarize_samples.__code__)
+    json_leaf = frame_label(json.dumps.__code__)
+    stacks = Counter({(root, app_leaf): 3, (root, json_leaf): 1})
+    report = summarize_samples(stacks, duration=0.4)
+
+    assert report['samples'] == 4
+    assert report['top_stacks'][0] == {'stack': [root, app_leaf], 'samples': 3, 'percent': 75.0}
+    # Time is the share of samples applied to the measured duration
+    functions = {f['function']: f for f in report['functions']}
+    assert functions[app_leaf] == {'function': app_leaf, 'self_ms': 300.0, 'total_ms': 300.0}
+    assert functions[json_leaf]['self_ms'] == 100.0
+    assert root not in functions
+    assert report['breakdown'] == {'app': 75.0, 'serialization': 25.0}
+
+
+def test_summarize_no_samples():
+    report = summarize_samples(Counter(), duration=0.01)
+    assert report['samples'] == 0 and report['functions'] == [] and report['breakdown'] == {}
+
+
+def test_store_merges_collapsed_stacks(tmp_path):
+    store = ProfileStore(str(tmp_path))
+    stack = ('handler (app.py:10)', 'to_json (pandas/core/generic.py:2000)')
+    first = store.save({'route': '/api/women/teams'}, Counter({stack: 2, stack[:1]: 1}))
+    store.save({'route': '/api/women/teams'}, Counter({stack: 3}))
+    store.save({'route': '/api/women/stats'}, Counter({stack[:1]: 5}))
+
+    path = store.collapsed_path('/api/women/teams')
+    assert path.endswith('api_women_teams.collapsed')
+    assert read_collapsed(path) == {';'.join(stack): 5, stack[0]: 1}
+    assert read_collapsed(store.collapsed_path('/api/women/stats')) == {stack[0]: 5}
+    assert store.get(first) == {'route': '/api/women/teams', 'id': first}
+
+
+@pytest.mark.parametrize('profile_id', ['unknown', '../../etc/passwd', '0' * 16])
+def test_unknown_profiles(tmp_path, profile_id):
+    assert ProfileStore(str(tmp_path)).get(profile_id) is None
+
+
+def test_store_keeps_the_newest_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=2)
+    for i in range(4):
+        store.save({'route': '/api/health', 'status': 200, 'duration_ms': i})
+    assert len(store.recent()) == 2
+    assert len(list((tmp_path / 'requests').iterdir())) == 2
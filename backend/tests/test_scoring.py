@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from conftest import play_bracket
+from probabilities import BRACKET_POINTS
+from scoring import (NO_PICK, SCORING_SCHEMES, calculate_bracket_values, expected_points_table,
+                     expected_scores, pick_points, score_brackets)
+
+
+def test_layout_structure(layout):
+    assert len(layout) == 63
+    assert np.bincount(layout.round_idx).tolist() == [32, 16, 8, 4, 2, 1]
+    later = np.flatnonzero(layout.round_idx > 0)
+    # Each later game's teams are exactly those of its two feeders
+    for g in later:
+        fed = layout.eligible[layout.feeders[g]].any(axis=0)
+        np.testing.assert_array_equal(fed, layout.eligible[g])
+
+
+def test_encode_decode_round_trip(layout, round_matrices):
+    picks = play_bracket(layout, round_matrices)
+    named = layout.decode(picks)
+    np.testing.assert_array_equal(layout.encode([named])[0], picks)
+    np.testing.assert_array_equal(layout.encode([[named[g] for g in layout.game_ids]])[0], picks)
+
+
+def test_validate_rejects_inconsistent_brackets(layout, round_matrices):
+    picks = play_bracket(layout, round_matrices)
+    champion = np.flatnonzero(layout.round_idx == 5)[0]
+    first_round_loser = np.flatnonzero(layout.eligible[0] & (np.arange(len(layout.teams)) != picks[0]))[0]
+
+    wrong_champion = picks.copy()
+    wrong_champion[champion] = first_round_loser
+    missing = picks.copy()
+    missing[champion] = NO_PICK
+    assert layout.validate(np.stack([picks, wrong_champion, missing])).tolist() == [True, False, False]
+
+
+def test_score_brackets_counts_correct_picks(layout, round_matrices):
+    rng = np.random.default_rng(0)
+    results = play_bracket(layout, round_matrices, rng)
+    picks = np.stack([results, play_bracket(layout, round_matrices, rng)])
+    points = pick_points(layout, SCORING_SCHEMES['standard'], results)
+
+    scores, correct = score_brackets(picks, results, points)
+    assert scores[0] == sum(BRACKET_POINTS[r] * n for r, n in enumerate(np.bincount(layout.round_idx)))
+    assert correct[0] == 63
+    hits = picks[1] == results
+    assert correct[1] == hits.sum()
+    assert scores[1] == np.array(BRACKET_POINTS)[layout.round_idx[hits]].sum()
+
+    # Undecided games score nothing
+    undecided = np.where(layout.round_idx < 2, results, NO_PICK)
+    scores, correct = score_brackets(picks[:1], undecided, points)
+    assert correct[0] == 48
+
+
+def test_expected_score_of_standard_scheme(layout, round_matrices, reach):
+    table = expected_points_table(layout, SCORING_SCHEMES['standard'], round_matrices, reach)
+    picks = play_bracket(layout, round_matrices)[None, :]
+    expected = sum(reach[r + 1, t] * BRACKET_POINTS[r] for r, t in zip(layout.round_idx, picks[0]))
+    assert expected_scores(layout, picks, table)[0] == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('scheme', sorted(SCORING_SCHEMES))
+def test_bracket_values_match_expected_points(layout, round_matrices, reach, scheme):
+    # Two routes to a team's expected points: the per-round table and the
+    # scheme matrix product
+    table = expected_points_table(layout, SCORING_SCHEMES[scheme], round_matrices, reach)
+    values = calculate_bracket_values(reach, layout.seeds, [SCORING_SCHEMES[scheme]], round_matrices)[0]
+    np.testing.assert_allclose(table.sum(axis=0), values, rtol=1e-9, atol=1e-12)
+
+
+def test_expected_score_matches_simulation(layout, round_matrices, reach):
+    scheme = SCORING_SCHEMES['upset_bonus']
+    picks = play_bracket(layout, round_matrices)[None, :]
+    expected = expected_scores(layout, picks, expected_points_table(layout, scheme, round_matrices, reach))[0]
+
+    rng = np.random.default_rng(1)
+    scores = []
+    for _ in range(3000):
+        results = play_bracket(layout, round_matrices, rng)
+        points = pick_points(layout, scheme, results, layout.losers(results))
+        scores.append(score_brackets(picks, results, points)[0][0])
+    assert np.mean(scores) == pytest.approx(expected, abs=4 * np.std(scores) / np.sqrt(len(scores)))
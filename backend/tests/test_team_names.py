@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import TeamNameIndex, normalize_team_name
+
+NAMES = ['Connecticut', "St. John's", 'Mississippi', 'NC State', 'South Carolina']
+
+
+@pytest.fixture
+def index():
+    return TeamNameIndex(NAMES)
+
+
+def test_spellings_share_a_key():
+    assert normalize_team_name("St. John's") == normalize_team_name('ST JOHNS') == normalize_team_name("Saint John's")
+    assert normalize_team_name('Ole Miss') == normalize_team_name('Mississippi')
+    assert normalize_team_name('Iowa St.') == 'iowa state'
+
+
+def test_positions_resolve_aliases(index):
+    np.testing.assert_array_equal(index.positions(['UConn', 'saint johns', 'Ole Miss', 'North Carolina State']),
+                                  [0, 1, 2, 3])
+    assert index.resolve('uconn') == 'Connecticut'
+    assert 'South Carolina' in index and 'Stanford' not in index
+
+
+@pytest.mark.parametrize('make', [list, tuple, pd.Series, iter, lambda names: (n for n in names)])
+def test_positions_accepts_any_iterable(index, make):
+    np.testing.assert_array_equal(index.positions(make(['South Carolina', 'UConn'])), [4, 0])
+
+
+@pytest.mark.parametrize('make', [list, iter, lambda names: (n for n in names)])
+def test_strict_positions_report_every_unknown_name(index, make):
+    with pytest.raises(KeyError) as error:
+        index.positions(make(['UConn', 'Conneticut', 'Stanford']))
+    message = str(error.value)
+    assert "'Conneticut' (did you mean Connecticut" in message
+    assert "'Stanford'" in message
+
+
+def test_lenient_positions(index):
+    np.testing.assert_array_equal(index.positions(iter(['Stanford', 'UConn', None]), strict=False), [-1, 0, -1])
+
+
+def test_indistinguishable_names_rejected():
+    with pytest.raises(ValueError):
+        TeamNameIndex(['Connecticut', 'UConn'])
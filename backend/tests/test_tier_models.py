@@ -0,0 +1,60 @@
+import contextlib
+import io
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from womens_composite_tier_models import NCAAPredictor, saved_tier_centroids
+
+
+def fit_tiers(history, years, reference_centers=None, shuffle_seed=None):
+    tournament, torvik, _ = history
+    predictor = NCAAPredictor()
+    with contextlib.redirect_stdout(io.StringIO()):
+        data = predictor.prepare_historical_data(tournament[tournament['year'].isin(years)],
+                                                 torvik[torvik['year'].isin(years)])
+        if shuffle_seed is not None:
+            # Row order changes which cluster ids a fresh fit hands out
+            data = data.sample(frac=1, random_state=shuffle_seed)
+        predictor.historical_data = data
+        predictor.train_tier_model(reference_centers=reference_centers)
+    return predictor
+
+
+def closest_reference(predictor, reference):
+    """Cluster id of the reference centroid closest to each fitted centroid"""
+    def scaled(p):
+        return reference.scalers['tier'].transform(
+            pd.DataFrame(p.get_tier_centroids(), columns=p.cluster_features))
+
+    ref, fitted = scaled(reference), scaled(predictor)
+    return ((fitted[:, None, :] - ref[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+
+
+@pytest.mark.parametrize('shuffle_seed', [0, 1, 2])
+def test_refit_with_reference_keeps_cluster_ids(history, shuffle_seed):
+    saved = fit_tiers(history, range(2000, 2005))
+    refit = fit_tiers(history, range(2000, 2006), saved.get_tier_centroids(), shuffle_seed)
+    np.testing.assert_array_equal(closest_reference(refit, saved), np.arange(5))
+
+
+def test_refit_relabels_training_rows(history):
+    saved = fit_tiers(history, range(2000, 2005))
+    refit = fit_tiers(history, range(2000, 2006), saved.get_tier_centroids(), shuffle_seed=0)
+    scaled = refit.scalers['tier'].transform(refit.historical_data[refit.cluster_features])
+    np.testing.assert_array_equal(refit.kmeans_model.labels_, refit.kmeans_model.predict(scaled))
+    assert refit.tier_counts.sum() == len(refit.historical_data)
+
+
+def test_saved_tier_centroids(history, tmp_path):
+    assert saved_tier_centroids(tmp_path / 'missing.joblib') is None
+
+    joblib.dump(NCAAPredictor(), tmp_path / 'untrained.joblib')
+    assert saved_tier_centroids(tmp_path / 'untrained.joblib') is None
+
+    saved = fit_tiers(history, range(2000, 2005))
+    joblib.dump(saved, tmp_path / 'womens_predictor.joblib')
+    np.testing.assert_allclose(saved_tier_centroids(tmp_path / 'womens_predictor.joblib'),
+                               saved.get_tier_centroids())
@@ -0,0 +1,82 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from probabilities import build_round_matrices
+from scoring import BracketLayout
+from top_brackets import TopBrackets
+
+
+def bracket_probability(layout, round_matrices, picks):
+    """Product of the win probabilities of a complete bracket's picks"""
+    probability = 1.0
+    for g, winner in enumerate(picks):
+        r = layout.round_idx[g]
+        a, b = layout.game_teams[g] if r == 0 else picks[layout.feeders[g]]
+        loser = b if winner == a else a
+        probability *= round_matrices[r, winner, loser]
+    return probability
+
+
+def all_brackets(layout):
+    """Every complete bracket: one outcome bit per game, in round order"""
+    order = np.argsort(layout.round_idx, kind='stable')
+    for outcome in itertools.product((0, 1), repeat=len(layout)):
+        picks = np.empty(len(layout), dtype=int)
+        for g, bit in zip(order, outcome):
+            r = layout.round_idx[g]
+            pair = layout.game_teams[g] if r == 0 else picks[layout.feeders[g]]
+            picks[g] = pair[bit]
+        yield picks
+
+
+def best_bracket_probability(layout, round_matrices):
+    """Max-product DP: best[g][t] is the most likely sub-bracket of g won by t"""
+    best = {}
+    for g in np.argsort(layout.round_idx, kind='stable'):
+        r = layout.round_idx[g]
+        if r == 0:
+            a, b = layout.game_teams[g]
+            sides = [{a: 1.0}, {b: 1.0}]
+        else:
+            sides = [best[f] for f in layout.feeders[g]]
+        best[g] = {}
+        for side, other in (sides, sides[::-1]):
+            for t, p in side.items():
+                best[g][t] = p * max(q * round_matrices[r, t, u] for u, q in other.items())
+    return max(best[np.flatnonzero(layout.round_idx == layout.round_idx.max())[0]].values())
+
+
+def encoded(layout, brackets):
+    return np.stack([layout.encode([picks])[0] for _, picks in brackets])
+
+
+def test_top_brackets_match_full_enumeration(small_matchups, small_rounds):
+    layout = BracketLayout(small_matchups, small_rounds)
+    round_matrices = build_round_matrices(small_matchups, layout.teams, small_rounds)
+    probabilities = sorted((bracket_probability(layout, round_matrices, picks)
+                            for picks in all_brackets(layout)), reverse=True)
+    assert sum(probabilities) == pytest.approx(1.0)
+
+    top = TopBrackets(small_matchups, small_rounds).top(50)
+    np.testing.assert_allclose([p for p, _ in top], probabilities[:50], rtol=1e-9)
+    picks = encoded(layout, top)
+    assert layout.validate(picks).all()
+    assert len({tuple(row) for row in picks}) == 50
+    for (p, _), row in zip(top, picks):
+        assert bracket_probability(layout, round_matrices, row) == pytest.approx(p, rel=1e-9)
+
+
+def test_top_bracket_is_the_max_product_bracket(matchups, layout, round_matrices):
+    (probability, _), = TopBrackets(matchups).top(1)
+    assert probability == pytest.approx(best_bracket_probability(layout, round_matrices), rel=1e-9)
+
+
+def test_more_brackets_continue_the_same_order(matchups, layout):
+    explorer = TopBrackets(matchups)
+    first = explorer.top(5)
+    more = explorer.top(20)
+    assert [p for p, _ in more[:5]] == [p for p, _ in first]
+    assert all(a[0] >= b[0] for a, b in zip(more, more[1:]))
+    assert layout.validate(encoded(layout, more)).all()